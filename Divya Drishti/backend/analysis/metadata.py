@@ -14,7 +14,8 @@ def calculate_hashes(file_path: str) -> dict:
     
     try:
         with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
+            # One pass, 1 MB reads, both digests fed from the same buffer
+            for byte_block in iter(lambda: f.read(1024 * 1024), b""):
                 sha256_hash.update(byte_block)
                 md5_hash.update(byte_block)
                 
@@ -15,7 +15,7 @@ BASE_URL = "https://www.virustotal.com/api/v3"
 def calculate_sha256(file_path: str) -> str:
     sha256_hash = hashlib.sha256()
     with open(file_path, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
+        for byte_block in iter(lambda: f.read(1024 * 1024), b""):  # 1 MB: hashlib drops the GIL on large updates
             sha256_hash.update(byte_block)
     return sha256_hash.hexdigest()
 
@@ -328,7 +328,7 @@ def extract_location_via_dumpsys(connector):
     Fallback: Extracts last known location from dumpsys.
     """
     try:
-        output = connector.shell("dumpsys location")
+        output = connector.shell("dumpsys location", timeout=120)
         # Regex to find: Location[gps 37.421998,-122.084000 acc=...
         # Or: Location[fused 37.421998,-122.084000 acc=...
         # Pattern: Location\[\w+ (\-?\d+\.\d+),(\-?\d+\.\d+)
@@ -366,7 +366,7 @@ def extract_calls_via_content_provider(connector):
         # Query the call_log provider
         # Columns: number, date, duration, type, name, formatted_number, normalized_number
         cmd = "content query --uri content://call_log/calls --projection number:date:duration:type:name:formatted_number:normalized_number"
-        output = connector.shell(cmd)
+        output = connector.shell(cmd, timeout=300)
         
         logger.info(f"Raw Call Log Output (First 500 chars): {output[:500]}") # Debug logging
         
@@ -440,7 +440,7 @@ def extract_sms_via_content_provider(connector):
     try:
         # Query the sms provider
         cmd = "content query --uri content://sms/"
-        output = connector.shell(cmd)
+        output = connector.shell(cmd, timeout=300)
         
         # Use our robust parser
         data = SMSParser.parse_adb_output(output)
@@ -463,7 +463,7 @@ def extract_real_apps():
     try:
         # 1. Get List of User (3rd Party) Apps only to avoid system noise
         # This fixes "Fake apps" complaint
-        output_list = connector.shell("pm list packages -3")
+        output_list = connector.shell("pm list packages -3", timeout=120)
         user_packages = []
         for line in output_list.splitlines():
             if line.startswith("package:"):
@@ -472,7 +472,7 @@ def extract_real_apps():
         # 2. Get details via dumpsys (one big pull)
         # We process this to find version and date
         logger.info("Pulling package details (dumpsys)...")
-        dumpsys_out = connector.shell("dumpsys package")
+        dumpsys_out = connector.shell("dumpsys package", timeout=300)
         
         apps = []
         current_pkg = None
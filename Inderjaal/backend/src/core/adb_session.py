@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# Vendored copy of chitragupta/backend/python_engine/adb_session.py - do not edit here.
+# Edit the canonical file and run: python tools/sync_vendored.py
+"""
+ADB Session - Persistent, multiplexed 'adb shell' per device.
+Keeps one long-lived shell open and frames every command with a unique
+sentinel and its exit code, so small commands (getprop, ls, pm ...) cost a
+write and a read instead of a fresh adb fork/exec/handshake each time.
+"""
+
+import atexit
+import collections
+import itertools
+import os
+import shlex
+import socket
+import subprocess
+import threading
+import uuid
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Dict, List, Optional, Tuple
+
+
+class AdbSessionError(RuntimeError):
+    """The shell session died (device unplugged, adb restarted, ...)."""
+
+
+class AdbShellSession:
+    """
+    One persistent 'adb shell' process that runs commands back to back.
+
+    Each command is written as
+
+        ( eval '<command>' ) </dev/null 2>/dev/null; printf '\\n%s %d\\n' <sentinel> $?
+
+    so it runs in a subshell (a stray 'exit' or 'cd' cannot break the
+    session), never reads the session's stdin, and its output is terminated
+    by a sentinel line carrying the exit code. Commands can be submitted from
+    several threads and are answered in order by a reader thread, so callers
+    may pipeline many commands before collecting the first result. stderr of
+    the device command is discarded, as the callers only ever parsed stdout.
+
+    If the shell exits, pending commands fail with AdbSessionError and the
+    next command transparently respawns it.
+    """
+
+    def __init__(self, serial: Optional[str] = None, adb_path: str = "adb", timeout: float = 30.0):
+        self.serial = serial
+        self.adb_path = adb_path
+        self.timeout = timeout
+        self._token = uuid.uuid4().hex[:12]
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        self._proc: Optional[subprocess.Popen] = None
+        self._pending: collections.deque = collections.deque()
+
+    # --- Process lifecycle ---
+
+    def _spawn(self) -> subprocess.Popen:
+        cmd = [self.adb_path]
+        if self.serial:
+            cmd += ['-s', self.serial]
+        cmd += ['shell', '-T']  # No PTY: no echo, no CRLF translation
+        proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0
+        )
+        pending = collections.deque()
+        self._proc, self._pending = proc, pending
+        threading.Thread(target=self._read_loop, args=(proc, pending), daemon=True).start()
+        return proc
+
+    def _read_loop(self, proc: subprocess.Popen, pending: collections.deque):
+        """Match output to pending commands in submission order."""
+        stdout = proc.stdout
+        chunks: List[bytes] = []
+        try:
+            for line in iter(stdout.readline, b''):
+                if not pending:
+                    continue  # Noise before the first command (motd etc.)
+                sentinel, future, text = pending[0]
+                if not line.startswith(sentinel):
+                    chunks.append(line)
+                    continue
+                pending.popleft()
+                # Drop the newline printf added in front of the sentinel
+                output = b''.join(chunks)[:-1]
+                chunks = []
+                try:
+                    returncode = int(line[len(sentinel):].strip() or -1)
+                except ValueError:
+                    returncode = -1
+                if not future.done():
+                    future.set_result((output.decode('utf-8', 'replace') if text else output, returncode))
+        except (OSError, ValueError):
+            pass
+        finally:
+            with self._lock:
+                if self._proc is proc:
+                    self._proc = None
+            while pending:
+                _, future, _ = pending.popleft()
+                if not future.done():
+                    future.set_exception(AdbSessionError("adb shell session closed"))
+            stdout.close()
+
+    def _kill(self, proc: Optional[subprocess.Popen]):
+        if proc is None:
+            return
+        with self._lock:
+            if self._proc is proc:
+                self._proc = None
+        try:
+            proc.kill()
+            proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+
+    def close(self):
+        """Stop the shell; pending commands fail with AdbSessionError."""
+        with self._lock:
+            proc, self._proc = self._proc, None
+        if proc is not None:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+            self._kill(proc)
+
+    # --- Commands ---
+
+    def submit(self, command: str, text: bool = True) -> Future:
+        """Queue a command without waiting; the Future yields (stdout, returncode)."""
+        n = next(self._counter)
+        sentinel = f"__CG_{self._token}_{n}__"
+        framed = (
+            f"( eval {shlex.quote(command)} ) </dev/null 2>/dev/null; "
+            f"printf '\\n%s %d\\n' {sentinel} $?\n"
+        ).encode()
+
+        future: Future = Future()
+        with self._lock:
+            proc = self._proc
+            if proc is None or proc.poll() is not None:
+                proc = self._spawn()
+            self._pending.append(((sentinel + ' ').encode(), future, text))
+            try:
+                proc.stdin.write(framed)
+                proc.stdin.flush()
+            except (OSError, ValueError) as e:
+                self._pending.pop()
+                self._proc = None
+                future.set_exception(AdbSessionError(f"adb shell session write failed: {e}"))
+        future.proc = proc
+        return future
+
+    def _collect(self, command: str, future: Future, timeout: Optional[float]) -> subprocess.CompletedProcess:
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            output, returncode = future.result(timeout)
+        except FutureTimeout:
+            # The shell is stuck behind this command; start over with a fresh one
+            self._kill(future.proc)
+            raise subprocess.TimeoutExpired(command, timeout)
+        return subprocess.CompletedProcess(command, returncode, output, '' if isinstance(output, str) else b'')
+
+    def run(
+        self,
+        command: str,
+        timeout: Optional[float] = None,
+        text: bool = True,
+        retry: bool = False
+    ) -> subprocess.CompletedProcess:
+        """
+        Run one command and wait for it.
+
+        Returns a subprocess.CompletedProcess like subprocess.run(capture_output=True),
+        raises subprocess.TimeoutExpired on timeout. If the session dies the
+        command fails with AdbSessionError; with retry=True (only for
+        idempotent commands, as it may already have run) it is retried once
+        on a respawned shell.
+        """
+        try:
+            return self._collect(command, self.submit(command, text), timeout)
+        except AdbSessionError:
+            if not retry:
+                raise
+            return self._collect(command, self.submit(command, text), timeout)
+
+    def run_many(
+        self,
+        commands: List[str],
+        timeout: Optional[float] = None,
+        text: bool = True
+    ) -> List[subprocess.CompletedProcess]:
+        """Pipeline several commands: write them all, then collect the results in order."""
+        futures = [self.submit(command, text) for command in commands]
+        return [self._collect(command, future, timeout) for command, future in zip(commands, futures)]
+
+
+# --- Per-device registry ---
+
+_sessions: Dict[Tuple[str, Optional[str], int], AdbShellSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(serial: Optional[str] = None, adb_path: str = "adb", channel: int = 0) -> AdbShellSession:
+    """
+    Shared session for a device (serial=None means adb's default device).
+
+    A shell runs one command at a time, so callers that want device-side
+    parallelism use different channel numbers to get separate shells.
+    """
+    key = (adb_path, serial, channel)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _sessions[key] = AdbShellSession(serial, adb_path)
+        return session
+
+
+def close_sessions(serial: Optional[str] = None):
+    """Close all sessions, or only those of one device."""
+    with _sessions_lock:
+        keys = [key for key in _sessions if serial is None or key[1] == serial]
+        sessions = [_sessions.pop(key) for key in keys]
+    for session in sessions:
+        session.close()
+
+
+atexit.register(close_sessions)
+
+
+# --- Host queries answered by the adb server ---
+
+def _adb_server_query(service: str, timeout: float) -> str:
+    """Ask the running adb server directly (no adb client fork)."""
+    port = int(os.environ.get('ANDROID_ADB_SERVER_PORT', 5037))
+    with socket.create_connection(('127.0.0.1', port), timeout=timeout) as sock:
+        request = service.encode()
+        sock.sendall(b'%04x' % len(request) + request)
+        reply = sock.makefile('rb')
+        status = reply.read(4)
+        length = int(reply.read(4) or b'0', 16)
+        payload = reply.read(length).decode('utf-8', 'replace')
+    if status != b'OKAY':
+        raise OSError(f"adb server refused {service}: {payload}")
+    return payload
+
+
+def _host_command(service: str, args: List[str], adb_path: str, timeout: float) -> str:
+    try:
+        return _adb_server_query(service, timeout)
+    except (OSError, ValueError):
+        # Server not running yet (the adb client starts it) or unusual setup
+        result = subprocess.run([adb_path] + args, capture_output=True, text=True, timeout=timeout)
+        return result.stdout
+
+
+def adb_devices(long: bool = False, adb_path: str = "adb", timeout: float = 2) -> str:
+    """Output of 'adb devices' ('adb devices -l' with long=True), header line included."""
+    output = _host_command(
+        'host:devices-l' if long else 'host:devices',
+        ['devices', '-l'] if long else ['devices'],
+        adb_path,
+        timeout
+    )
+    if not output.startswith('List of devices attached'):
+        output = 'List of devices attached\n' + output
+    return output
+
+
+def adb_serialno(adb_path: str = "adb", timeout: float = 5) -> str:
+    """Serial of adb's default device ('adb get-serialno')."""
+    return _host_command('host:get-serialno', ['get-serialno'], adb_path, timeout).strip()
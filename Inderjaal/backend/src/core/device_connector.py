@@ -3,6 +3,8 @@ import subprocess
 from typing import List, Optional, Dict
 import time
 
+from src.core.adb_session import AdbSessionError, adb_devices, get_session
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -36,7 +38,12 @@ class DeviceConnector:
         """
         Returns a list of connected devices with their details.
         """
-        output = self._run_adb_command(["devices", "-l"])
+        try:
+            # Answered by the adb server directly; a cold adb start can take several seconds
+            output = adb_devices(long=True, adb_path=self.adb_path, timeout=10).strip()
+        except subprocess.TimeoutExpired:
+            logger.error("ADB Command Timed Out")
+            return []
         devices = []
         lines = output.split('\n')
         # Skip the first line usually "List of devices attached"
@@ -121,14 +128,28 @@ class DeviceConnector:
 
         return props
 
-    def shell(self, command: str) -> str:
+    def shell(self, command: str, timeout: float = 30) -> str:
         """
         Runs a shell command on the connected device.
+        Raises subprocess.TimeoutExpired if it runs longer than timeout seconds,
+        so slow commands (dumpsys, content query) should pass a longer one.
         """
         if not self.connected_device_serial:
             raise RuntimeError("No device connected.")
         
-        return self._run_adb_command(["-s", self.connected_device_serial, "shell", command])
+        # Reuses one persistent shell per device instead of forking adb per command
+        try:
+            result = get_session(self.connected_device_serial, self.adb_path).run(command, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            logger.error(f"ADB Command Timed Out after {timeout}s: '{command}'")
+            raise
+        except AdbSessionError as e:
+            logger.error(f"ADB Command Failed: {e}")
+            return ""
+        if result.returncode != 0:
+            logger.error(f"ADB Command Failed: '{command}' exited with {result.returncode}")
+            return ""
+        return result.stdout.strip()
 
     def pull_file(self, remote_path: str, local_path: str) -> bool:
         """
@@ -15,7 +15,7 @@ def calculate_file_hash(filepath: str, algorithm: str = "sha256") -> str:
 
         with open(filepath, 'rb') as f:
             while True:
-                chunk = f.read(65536)
+                chunk = f.read(1024 * 1024)
                 if not chunk:
                     break
                 hasher.update(chunk)
@@ -67,7 +67,6 @@ def trigger_attack():
     
     return {"status": "triggered"}
 
-<<<<<<< Updated upstream
 from pydantic import BaseModel
 class ScanRequest(BaseModel):
     file_path: str
@@ -97,9 +96,6 @@ def trigger_extraction():
 @app.get("/api/sudarshana/extraction_status")
 def get_extraction_status():
     return forensics_manager.get_status()
-=======
-
->>>>>>> Stashed changes
 
 @app.websocket("/ws/sudarshana")
 async def websocket_endpoint(websocket: WebSocket):
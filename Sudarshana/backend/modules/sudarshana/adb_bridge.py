@@ -6,19 +6,13 @@ import re
 import os
 import shutil
 from .vt_scanner import VirusTotalScanner
+from .log_classifier import log_classifier
 from dotenv import load_dotenv
 
 load_dotenv()
 VT_API_KEY = os.getenv("VIRUSTOTAL_API_KEY")
 
 class ADBBridge:
-    def __init__(self):
-        self.device_connected = False
-        self.logs = []
-        self.interesting_events = []
-        self.lock = threading.Lock()
-        self.monitoring = False
-        self.monitor_thread = None
     def __init__(self):
         self.device_connected = False
         self.logs = []
@@ -189,22 +183,17 @@ class ADBBridge:
             events = []
             for line in result.stdout.split('\n'):
                 if not line.strip(): continue
-                # Basic classification
-                etype = "system"
-                if any(x in line.lower() for x in ["auth", "login", "password"]): etype = "user"
-                elif any(x in line.lower() for x in ["socket", "connect", "http", "ip"]): etype = "network"
-                
+                # One pass over the compiled rule set (user/network/system by default)
                 events.append({
                     "timestamp": line[:18].strip(), # Approx timestamp from -v time
                     "description": line[18:].strip(),
-                    "type": etype
+                    "type": log_classifier.category(line)
                 })
             return events
         except Exception as e:
              print(f"System extraction error: {e}")
              return []
 
-<<<<<<< Updated upstream
     def scan_device_file(self, remote_path):
         """Scans a file on the device using VirusTotal."""
         if not self.check_connection():
@@ -258,7 +247,7 @@ class ADBBridge:
         except Exception as e:
             print(f"Scan error: {e}")
             return {"error": str(e)}
-=======
+
     def list_files(self, path="/sdcard"):
         """Lists files in a directory on the device."""
         if not self.check_connection():
@@ -334,8 +323,8 @@ class ADBBridge:
             import hashlib
             sha256_hash = hashlib.sha256()
             with open(local_destination, "rb") as f:
-                # Read and update hash string value in blocks of 4K
-                for byte_block in iter(lambda: f.read(4096), b""):
+                # Read and update hash string value in blocks of 1 MB
+                for byte_block in iter(lambda: f.read(1024 * 1024), b""):
                     sha256_hash.update(byte_block)
             
             file_hash = sha256_hash.hexdigest()
@@ -352,7 +341,6 @@ class ADBBridge:
         except Exception as e:
             print(f"Pull/Hash error: {e}")
             return {"success": False, "error": str(e)}
->>>>>>> Stashed changes
 
     def stop(self):
         self.monitoring = False
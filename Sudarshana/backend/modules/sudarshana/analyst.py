@@ -1,7 +1,13 @@
 from modules.sudarshana.device_connector import device_connector
+from modules.sudarshana.log_classifier import LogClassifier, Rule
 import os
 import datetime
 
+# Suspicious keywords in package names, compiled once into a single matcher
+SUSPICIOUS_PACKAGES = LogClassifier([
+    Rule("suspicious", keywords=["spy", "track", "keylog", "agent", "rat", "hack", "remote", "monitor"], severity="high")
+])
+
 class Analyst:
     def __init__(self):
         pass
@@ -43,22 +49,18 @@ class Analyst:
             
             alerts = []
             # Check for suspicious keywords in REAL packages
-            keywords = ["spy", "track", "keylog", "agent", "rat", "hack", "remote", "monitor"] 
-            
             found_suspicious = False
             for line in lines:
-                for k in keywords:
-                    if k in line.lower():
-                        pkg = line.split("=")[-1]
-                        alerts.append({
-                            "type": "MALWARE",
-                            "status": "DETECTED",
-                            "detail": f"Suspicious Package: {pkg}",
-                            "timestamp": datetime.datetime.now().strftime("%I:%M:%S %p"),
-                            "risk": "HIGH"
-                        })
-                        found_suspicious = True
-                        break
+                if SUSPICIOUS_PACKAGES.classify(line):
+                    pkg = line.split("=")[-1]
+                    alerts.append({
+                        "type": "MALWARE",
+                        "status": "DETECTED",
+                        "detail": f"Suspicious Package: {pkg}",
+                        "timestamp": datetime.datetime.now().strftime("%I:%M:%S %p"),
+                        "risk": "HIGH"
+                    })
+                    found_suspicious = True
                 if len(alerts) >= 1: break # Just showing one for update speed
 
             if not found_suspicious and lines:
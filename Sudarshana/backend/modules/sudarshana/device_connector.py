@@ -3,6 +3,8 @@ import subprocess
 from typing import List, Optional, Dict
 import time
 
+from modules.sudarshana.adb_session import adb_devices, get_session
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -41,7 +43,15 @@ class DeviceConnector:
         """
         Returns a list of connected devices with their details.
         """
-        output = self._run_adb_command(["devices", "-l"])
+        try:
+            # Answered by the adb server directly when it is running
+            output = adb_devices(long=True, adb_path=self.adb_path, timeout=10).strip()
+        except subprocess.TimeoutExpired:
+            logger.error("ADB Command Timed Out")
+            return []
+        except Exception as e:
+            logger.error(f"ADB Execution Failed: {e}")
+            return []
         devices = []
         lines = output.split('\n')
         for line in lines[1:]:
@@ -92,7 +102,16 @@ class DeviceConnector:
             if not self.connect():
                 return ""
         
-        return self._run_adb_command(["-s", self.connected_device_serial, "shell", command])
+        # Reuses one persistent shell per device instead of forking adb per command
+        try:
+            result = get_session(self.connected_device_serial, self.adb_path).run(command, timeout=10)
+            return result.stdout.strip()
+        except subprocess.TimeoutExpired:
+            logger.error("ADB Command Timed Out")
+            return ""
+        except Exception as e:
+            logger.error(f"ADB Execution Failed: {e}")
+            return ""
 
     def get_device_info(self) -> Dict[str, str]:
         if not self.connected_device_serial: return {}
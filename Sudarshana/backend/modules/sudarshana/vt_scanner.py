@@ -18,8 +18,8 @@ class VirusTotalScanner:
         sha256_hash = hashlib.sha256()
         try:
             with open(file_path, "rb") as f:
-                # Read and update hash string value in blocks of 4K
-                for byte_block in iter(lambda: f.read(4096), b""):
+                # Read and update hash string value in blocks of 1 MB
+                for byte_block in iter(lambda: f.read(1024 * 1024), b""):
                     sha256_hash.update(byte_block)
             return sha256_hash.hexdigest()
         except FileNotFoundError:
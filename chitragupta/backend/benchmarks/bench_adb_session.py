@@ -0,0 +1,56 @@
+"""
+Per-command latency: subprocess.run(['adb', 'shell', ...]) vs the persistent AdbShellSession.
+
+Needs a connected device (or anything answering as 'adb' on PATH).
+
+Usage (from chitragupta/backend):
+    python benchmarks/bench_adb_session.py [iterations] [command]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python_engine'))
+
+from adb_session import AdbShellSession
+
+
+def timed(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def report(label, samples):
+    ms = [s * 1000 for s in samples]
+    print(f"{label:<28} mean {statistics.mean(ms):8.2f} ms | "
+          f"median {statistics.median(ms):8.2f} ms | max {max(ms):8.2f} ms")
+
+
+def run(iterations, command):
+    print(f"{iterations} x '{command}'")
+    report("subprocess.run", timed(
+        lambda: subprocess.run(['adb', 'shell', command], capture_output=True, text=True, timeout=30),
+        iterations
+    ))
+
+    session = AdbShellSession()
+    session.run('true')  # Spawn outside the measurement
+    report("AdbShellSession.run", timed(lambda: session.run(command), iterations))
+
+    start = time.perf_counter()
+    session.run_many([command] * iterations)
+    per_command = (time.perf_counter() - start) / iterations
+    report("AdbShellSession.run_many", [per_command])
+    session.close()
+
+
+if __name__ == '__main__':
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    command = sys.argv[2] if len(sys.argv) > 2 else 'getprop ro.product.model'
+    run(iterations, command)
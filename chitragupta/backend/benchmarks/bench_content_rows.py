@@ -0,0 +1,66 @@
+"""
+'content query' row parsing: the previous per-line regex (body projected
+before type) vs the single-pass tokenizer used by ADBBridge.iter_content_rows
+(_id first, body last). Reports rows/s and how many rows each gets wrong
+when bodies contain ", type=" or similar text.
+
+Usage (from chitragupta/backend):
+    python benchmarks/bench_content_rows.py [rows]
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python_engine'))
+
+from adb_bridge import _content_row_parser
+
+LEGACY_RE = r"address=(.*?), date=(.*?), body=(.*?), type=(.*)"
+BODIES = ['ok see you at 5', 'Your OTP is 482913, type=SMS, do not share', 'meeting, date=tomorrow',
+          'lol', 'Call me back, address=home']
+
+
+def synthetic_rows(count):
+    rng = random.Random(4)
+    rows = []
+    for i in range(count):
+        rows.append({'_id': str(i + 1), 'address': f"+9198{rng.randrange(10 ** 8):08d}",
+                     'date': str(1700000000000 + i), 'type': str(rng.choice((1, 2))),
+                     'body': rng.choice(BODIES) + ' ' + 'x' * rng.randrange(0, 120)})
+    return rows
+
+
+def run(count):
+    rows = synthetic_rows(count)
+    legacy_lines = [f"Row: {n} address={r['address']}, date={r['date']}, body={r['body']}, type={r['type']}"
+                    for n, r in enumerate(rows)]
+    paged_lines = [f"Row: {n} _id={r['_id']}, address={r['address']}, date={r['date']}, type={r['type']}, "
+                   f"body={r['body']}" for n, r in enumerate(rows)]
+
+    start = time.perf_counter()
+    legacy = []
+    for line in legacy_lines:
+        if "Row" in line:
+            match = re.search(LEGACY_RE, line)
+            if match:
+                legacy.append({'address': match.group(1), 'date': match.group(2),
+                               'body': match.group(3), 'type': match.group(4)})
+    legacy_time = time.perf_counter() - start
+
+    parse = _content_row_parser(['_id', 'address', 'date', 'type', 'body'])
+    start = time.perf_counter()
+    tokenized = [parse(line) for line in paged_lines]
+    tokenizer_time = time.perf_counter() - start
+
+    fields = ('address', 'date', 'type', 'body')
+    legacy_wrong = sum(any(got[f] != want[f] for f in fields) for got, want in zip(legacy, rows))
+    tokenizer_wrong = sum(got != want for got, want in zip(tokenized, rows))
+    print(f"{count:,} SMS rows")
+    print(f"  per-line regex       {count / legacy_time:>12,.0f} rows/s   {legacy_wrong:>8,} rows misparsed")
+    print(f"  single-pass tokenizer{count / tokenizer_time:>12,.0f} rows/s   {tokenizer_wrong:>8,} rows misparsed")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,68 @@
+"""
+Memory benchmark: list-of-dicts scan results vs FileRecordStore.
+
+Usage (from chitragupta/backend):
+    python benchmarks/bench_file_records.py [record_count ...]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python_engine'))
+
+from file_records import FileRecordStore
+
+DIRS = [
+    '/sdcard/DCIM/Camera',
+    '/sdcard/Android/media/com.whatsapp/WhatsApp/Media/WhatsApp Images',
+    '/sdcard/Download',
+    '/sdcard/Pictures/Screenshots',
+]
+
+
+def synthetic_records(count, dirs_per_root=250):
+    """Yield scanner-shaped records spread over a realistic number of directories."""
+    for i in range(count):
+        root = DIRS[i % len(DIRS)]
+        directory = f"{root}/sub_{(i // len(DIRS)) % dirs_per_root:04d}"
+        name = f"IMG_2024{i:08d}.jpg"
+        yield {
+            'name': name,
+            'path': f"{directory}/{name}",
+            'size': 1024 + i,
+            'is_dir': False,
+            'is_link': False,
+            'permissions': '-rw-rw----',
+            'mtime': 1700000000 + i,
+            'sha256': f"{i:064x}",
+        }
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    container = build()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return container, current, peak, elapsed
+
+
+def run(count):
+    _, dict_bytes, dict_peak, dict_time = measure(lambda: list(synthetic_records(count)))
+    store, store_bytes, store_peak, store_time = measure(
+        lambda: FileRecordStore(synthetic_records(count))
+    )
+    assert len(store) == count
+
+    print(f"{count:>10,} records | "
+          f"list[dict]: {dict_bytes / count:7.1f} B/rec, {dict_peak / 2**20:8.1f} MB peak, {dict_time:6.2f}s | "
+          f"FileRecordStore: {store_bytes / count:7.1f} B/rec, {store_peak / 2**20:8.1f} MB peak, {store_time:6.2f}s | "
+          f"{dict_bytes / store_bytes:4.1f}x smaller")
+
+
+if __name__ == '__main__':
+    counts = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    for count in counts:
+        run(count)
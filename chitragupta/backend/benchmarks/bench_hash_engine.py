@@ -0,0 +1,55 @@
+"""
+File hashing throughput: the old 4 KB loop (one algorithm per pass, one file at a
+time) vs HashEngine (single pass, large buffers/mmap, thread pool).
+
+Usage (from chitragupta/backend):
+    python benchmarks/bench_hash_engine.py [file_count] [file_size_mb]
+"""
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python_engine'))
+
+from hash_engine import HashEngine
+
+ALGORITHMS = ('sha256', 'sha1', 'md5')
+
+
+def legacy_hash(path, algorithm):
+    digest = hashlib.new(algorithm)
+    with open(path, 'rb') as f:
+        for byte_block in iter(lambda: f.read(4096), b""):
+            digest.update(byte_block)
+    return digest.hexdigest()
+
+
+def run(count, size_mb):
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(count):
+            path = os.path.join(tmp, f"evidence_{i:04d}.bin")
+            with open(path, 'wb') as f:
+                f.write(os.urandom(size_mb * 1024 * 1024))
+            paths.append(path)
+        total_mb = count * size_mb
+
+        start = time.perf_counter()
+        legacy = {path: {name: legacy_hash(path, name) for name in ALGORITHMS} for path in paths}
+        legacy_time = time.perf_counter() - start
+        print(f"{count} files x {size_mb} MB, {'/'.join(ALGORITHMS)}")
+        print(f"  4 KB loop, 3 passes     {legacy_time:7.2f}s  {total_mb / legacy_time:8.1f} MB/s")
+
+        for workers in (1, os.cpu_count() or 1):
+            engine = HashEngine(workers=workers)
+            run_stats = engine.hash_files(paths, ALGORITHMS)
+            assert run_stats['results'] == legacy
+            print(f"  HashEngine, {workers:>2} threads  {run_stats['seconds']:7.2f}s  {run_stats['mb_per_s']:8.1f} MB/s")
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    size_mb = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    run(count, size_mb)
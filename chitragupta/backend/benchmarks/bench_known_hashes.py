@@ -0,0 +1,61 @@
+"""
+Known-hash set cost: compile time for a text hash list, mmap load time and
+lookup rate (half hits, half misses) compared with a Python set of hex strings.
+
+Usage (from chitragupta/backend):
+    python benchmarks/bench_known_hashes.py [hash_count]
+"""
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python_engine'))
+
+from known_hashes import KnownHashSet, compile_hash_set
+
+
+def run(count):
+    digests = [hashlib.sha256(i.to_bytes(8, 'little')).hexdigest() for i in range(count)]
+    queries = random.sample(digests, min(count, 100000))
+    queries += [hashlib.sha256(b'miss%d' % i).hexdigest() for i in range(len(queries))]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        text_path = os.path.join(tmp, 'known.txt')
+        with open(text_path, 'w') as f:
+            f.writelines(f"{digest}\n" for digest in digests)
+        compiled_path = os.path.join(tmp, 'known.cgkh')
+
+        start = time.perf_counter()
+        compile_hash_set(text_path, compiled_path)
+        compile_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with open(text_path) as f:
+            plain = {line.strip() for line in f}
+        set_load = time.perf_counter() - start
+
+        start = time.perf_counter()
+        known = KnownHashSet(compiled_path)
+        mmap_load = time.perf_counter() - start
+
+        start = time.perf_counter()
+        set_hits = sum(q in plain for q in queries)
+        set_lookup = time.perf_counter() - start
+
+        start = time.perf_counter()
+        mmap_hits = sum(q in known for q in queries)
+        mmap_lookup = time.perf_counter() - start
+        assert set_hits == mmap_hits == len(queries) // 2
+
+        print(f"{count:,} SHA-256 hashes ({os.path.getsize(compiled_path) / 1e6:.1f} MB compiled, "
+              f"compile {compile_time:.2f}s)")
+        print(f"  python set   load {set_load * 1000:9.1f} ms   {set_lookup / len(queries) * 1e6:6.2f} us/lookup")
+        print(f"  mmap .cgkh   load {mmap_load * 1000:9.1f} ms   {mmap_lookup / len(queries) * 1e6:6.2f} us/lookup")
+        known.close()
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000000)
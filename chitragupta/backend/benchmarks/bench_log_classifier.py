@@ -0,0 +1,88 @@
+"""
+Log classification throughput: the keyword loops used so far (any(k in
+line.lower() ...) per category) vs LogClassifier's compiled rule set, for
+ADBBridge's default user/network rules and for a large IOC-style rule set
+(several hundred keywords across a handful of categories). Both approaches
+must agree on every line.
+
+Usage (from chitragupta/backend):
+    python benchmarks/bench_log_classifier.py [lines] [keywords_per_rule]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python_engine'))
+
+from log_classifier import DEFAULT_RULES, LogClassifier, Rule
+from logcat_store import LogcatParser
+
+TAGS = ['ActivityManager', 'WindowManager', 'ConnectivityService', 'chatty', 'AudioFlinger', 'Auth']
+PHRASES = ['socket connected', 'http GET /api/v1/sync', 'Login attempt', 'password changed',
+           'ip=10.0.0.1', 'battery level 80', 'Auth token refresh', 'screen on', 'gc freed 12MB', '']
+
+
+def synthetic_lines(count, extra_words):
+    rng = random.Random(5)
+    return [
+        f"10-18 12:{(i // 60000) % 60:02d}:{(i // 1000) % 60:02d}.{i % 1000:03d} "
+        f"{rng.choice('VDIWE')}/{rng.choice(TAGS)}({rng.randrange(1, 30000):5d}): "
+        f"{rng.choice(PHRASES)} {rng.choice(extra_words) if rng.random() < 0.05 else ''} event {i} "
+        + 'x' * rng.randrange(10, 80)
+        for i in range(count)
+    ]
+
+
+def ioc_rules(per_rule):
+    rng = random.Random(9)
+    alphabet = 'abcdefghijklmnopqrstuvwxyz'
+
+    def word():
+        return ''.join(rng.choice(alphabet) for _ in range(rng.randrange(6, 14)))
+
+    return [
+        Rule('spyware', keywords=[f"com.{word()}.{word()}" for _ in range(per_rule)], severity='critical'),
+        Rule('c2', keywords=[f"{word()}.{rng.choice(['ru', 'cn', 'xyz', 'top'])}" for _ in range(per_rule)],
+             severity='high'),
+        Rule('exfil', keywords=[word() for _ in range(per_rule)], severity='high'),
+    ] + list(DEFAULT_RULES)
+
+
+def keyword_loops(rules, default='system'):
+    """The existing style: one any() over each category's keywords, lowercasing per test."""
+    def classify(line):
+        for rule in rules:
+            if any(keyword in line.lower() for keyword in rule.keywords):
+                return rule.name
+        return default
+    return classify
+
+
+def timed(label, classify, lines):
+    start = time.perf_counter()
+    results = [classify(line) for line in lines]
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<34}{len(lines) / elapsed:>12,.0f} lines/s")
+    return results
+
+
+def run(count, per_rule):
+    for title, rules in (("default rules (7 keywords)", DEFAULT_RULES),
+                         (f"IOC rules ({per_rule * 3 + 7} keywords)", ioc_rules(per_rule))):
+        keywords = [keyword for rule in rules for keyword in rule.keywords]
+        lines = synthetic_lines(count, keywords)
+        classifier = LogClassifier(rules)
+        print(f"{count:,} lines, {title}")
+        expected = timed("any(k in line.lower()) loops", keyword_loops(rules), lines)
+        got = timed("LogClassifier.category", classifier.category, lines)
+        assert got == expected, "classifier disagrees with the keyword loops"
+
+        records = [LogcatParser().parse(line) for line in lines]
+        timed("LogClassifier.classify_record", classifier.classify_record, records)
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    per_rule = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    run(count, per_rule)
@@ -0,0 +1,80 @@
+"""
+Logcat archive: append throughput, on-disk size and query latency over a
+synthetic day of logs (lines spread evenly over 24 hours, a rare tag and
+mostly low-priority levels, like a real device).
+
+Usage (from chitragupta/backend):
+    python benchmarks/bench_logcat_archive.py [lines]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python_engine'))
+
+from logcat_archive import LogcatArchive
+from logcat_store import LogcatParser
+
+TAGS = ['ActivityManager', 'WindowManager', 'ConnectivityService', 'chatty', 'AudioFlinger',
+        'PackageManager', 'InputDispatcher', 'BatteryService']
+
+
+def synthetic_day(count):
+    rng = random.Random(11)
+    for i in range(count):
+        second = i * 86400 // count
+        tag = 'Auth' if rng.random() < 0.002 else rng.choice(TAGS)
+        level = rng.choices('VDIWE', weights=(30, 40, 24, 5, 1))[0]
+        yield (f"10-17 {second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}.{rng.randrange(1000):03d} "
+               f"{level}/{tag}({rng.randrange(1, 30000):5d}): event {i} " + 'x' * rng.randrange(10, 120))
+
+
+def timed_query(archive, label, **kwargs):
+    start = time.perf_counter()
+    matched = sum(1 for _ in archive.query(**kwargs))
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<34}{matched:>10,} records  {elapsed * 1000:9.1f} ms")
+
+
+def run(count):
+    parser = LogcatParser()
+    with tempfile.TemporaryDirectory() as root:
+        archive = LogcatArchive(root)
+        batch, write_time, raw_bytes = [], 0.0, 0
+        for line in synthetic_day(count):
+            raw_bytes += len(line) + 1
+            batch.append(parser.parse(line))
+            if len(batch) == 512:
+                start = time.perf_counter()
+                archive.append(batch)
+                write_time += time.perf_counter() - start
+                batch = []
+        start = time.perf_counter()
+        archive.append(batch)
+        archive.flush()
+        write_time += time.perf_counter() - start
+
+        stats = archive.stats()
+        print(f"{count:,} lines over one day: {raw_bytes / 1e6:.1f} MB raw -> {stats['bytes'] / 1e6:.1f} MB in "
+              f"{stats['segments']} segments / {stats['blocks']:,} blocks, "
+              f"appended at {count / write_time:,.0f} lines/s")
+
+        start = time.perf_counter()
+        LogcatArchive(root)
+        print(f"  reopen (load indexes)            {(time.perf_counter() - start) * 1000:21.1f} ms")
+
+        day = stats['first_timestamp']
+        timed_query(archive, "5 minutes at noon", start=day + 43200, end=day + 43500)
+        timed_query(archive, "1 hour, level >= W", start=day + 36000, end=day + 39600, min_level='W')
+        timed_query(archive, "whole day, tag Auth", tags='Auth')
+        timed_query(archive, "whole day, level >= E", min_level='E')
+        timed_query(archive, "whole day, tag Auth, level >= W", tags='Auth', min_level='W')
+        timed_query(archive, "whole day, message contains", contains='event 4242')
+        timed_query(archive, "whole day, first 1000", limit=1000)
+        archive.close()
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000000)
@@ -0,0 +1,144 @@
+"""
+Logcat ingestion under a storm: the old list buffers (append + pop(0) under the
+lock, one raw string and one event dict per line) vs LogcatStore (parse once,
+O(1) ring-buffer appends, one lock acquisition per read batch). A reader thread
+polls the latest 100 entries meanwhile, as the dashboard API does, and its
+worst wait is reported.
+
+A second pass compares what a client polling every 10 ms receives when it
+fetches the latest 100 records each time versus following a read_since()
+cursor: records transferred, duplicates, and lines it never saw.
+
+Usage (from chitragupta/backend):
+    python benchmarks/bench_logcat_store.py [lines] [capacity]
+"""
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python_engine'))
+
+from logcat_store import LogcatStore
+
+TAGS = ['ActivityManager', 'WindowManager', 'ConnectivityService', 'chatty', 'AudioFlinger', 'Auth']
+
+
+def synthetic_lines(count):
+    rng = random.Random(7)
+    return [
+        f"10-18 12:{(i // 60000) % 60:02d}:{(i // 1000) % 60:02d}.{i % 1000:03d} "
+        f"{rng.choice('VDIWE')}/{rng.choice(TAGS)}({rng.randrange(1, 30000):5d}): "
+        f"event {i} " + 'x' * rng.randrange(10, 120)
+        for i in range(count)
+    ]
+
+
+class LegacyBuffers:
+    """ADBBridge's previous scheme: two lists trimmed with pop(0) under one lock."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.logs, self.events, self.lock = [], [], threading.Lock()
+
+    def ingest(self, lines):
+        for line in lines:
+            with self.lock:
+                self.logs.append(line)
+                if len(self.logs) > self.capacity:
+                    self.logs.pop(0)
+                self.events.append({"timestamp": time.time(), "raw": line, "type": "system"})
+                if len(self.events) > self.capacity // 4:
+                    self.events.pop(0)
+        return len(lines)
+
+    def latest_events(self):
+        with self.lock:
+            return list(self.events)[-100:]
+
+
+def timed(label, ingest, reader):
+    worst = [0.0]
+    stop = threading.Event()
+
+    def poll():
+        while not stop.is_set():
+            start = time.perf_counter()
+            reader()
+            worst[0] = max(worst[0], time.perf_counter() - start)
+            time.sleep(0.001)
+
+    thread = threading.Thread(target=poll, daemon=True)
+    thread.start()
+    start = time.perf_counter()
+    count = ingest()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    thread.join()
+    print(f"  {label:<24}{count / elapsed:>12,.0f} lines/s   worst reader wait {worst[0] * 1000:7.2f} ms")
+
+
+def client_coverage(lines, capacity):
+    store = LogcatStore(capacity)
+    stop = threading.Event()
+    results = {}
+
+    def snapshot_client():
+        seen, transferred = set(), 0
+        while not stop.is_set():
+            batch = store.latest(100)
+            transferred += len(batch)
+            seen.update(record.seq for record in batch)
+            time.sleep(0.01)
+        results['latest(100)'] = (transferred, seen)
+
+    def cursor_client():
+        seen, transferred, cursor = set(), 0, 0
+        while not (stop.is_set() and cursor == store.cursor):
+            batch, cursor, _ = store.wait_since(cursor, limit=5000, timeout=0.01)
+            transferred += len(batch)
+            seen.update(record.seq for record in batch)
+            time.sleep(0.01)
+        results['read_since(cursor)'] = (transferred, seen)
+
+    clients = [threading.Thread(target=snapshot_client), threading.Thread(target=cursor_client)]
+    for client in clients:
+        client.start()
+    for start in range(0, len(lines), 512):
+        store.ingest_many(lines[start:start + 512])
+        time.sleep(0.001)  # Roughly a device under load, not a flat-out replay
+    stop.set()
+    for client in clients:
+        client.join()
+
+    for label, (transferred, seen) in results.items():
+        print(f"  {label:<24}{transferred:>10,} records sent   {transferred - len(seen):>10,} duplicates"
+              f"   {len(lines) - len(seen):>8,} lines never seen")
+
+
+def run(count, capacity):
+    lines = synthetic_lines(count)
+    print(f"{count:,} logcat lines, capacity {capacity:,}")
+
+    legacy = LegacyBuffers(capacity)
+    timed("list + pop(0)", lambda: legacy.ingest(lines), legacy.latest_events)
+
+    store = LogcatStore(capacity)
+
+    def ring():
+        for start in range(0, len(lines), 512):
+            store.ingest_many(lines[start:start + 512])
+        return count
+
+    timed("LogcatStore (parsed)", ring, lambda: [r.to_line() for r in store.latest(100)])
+    print(f"  {store.stats()}")
+
+    print("Polling clients (every 10 ms)")
+    client_coverage(lines, capacity)
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    capacity = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    run(count, capacity)
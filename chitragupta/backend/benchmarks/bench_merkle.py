@@ -0,0 +1,69 @@
+"""
+Merkle tree benchmark: the old hex-text build_merkle_tree (full rebuild) vs MerkleTree.
+
+Usage (from chitragupta/backend):
+    python benchmarks/bench_merkle.py [leaf_count] [appends]
+"""
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python_engine'))
+
+from hasher import MerkleTree
+
+
+def legacy_merkle_root(hashes):
+    """The previous Hasher.build_merkle_tree: sha256 over concatenated hex text, odd node doubled."""
+    layer = hashes
+    while len(layer) > 1:
+        layer = [hashlib.sha256((layer[i] + (layer[i + 1] if i + 1 < len(layer) else layer[i])).encode()).hexdigest()
+                 for i in range(0, len(layer), 2)]
+    return layer[0]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run(count, appends):
+    hashes = [hashlib.sha256(i.to_bytes(8, 'little')).hexdigest() for i in range(count)]
+    extra = [hashlib.sha256(b'extra' + i.to_bytes(8, 'little')).hexdigest() for i in range(appends)]
+
+    _, legacy_build = timed(lambda: legacy_merkle_root(hashes))
+    tree, tree_build = timed(lambda: MerkleTree(hashes))
+    print(f"{count:,} leaves")
+    print(f"  full build          legacy {legacy_build:8.3f}s | MerkleTree {tree_build:8.3f}s")
+
+    # Legacy has no append: every new file means a full rebuild
+    _, tree_appends = timed(lambda: [tree.append(h) for h in extra])
+    print(f"  {appends} appends        legacy ~{legacy_build * appends:7.1f}s (rebuild each) | "
+          f"MerkleTree {tree_appends * 1000:8.2f} ms ({tree_appends / appends * 1e6:.1f} us/append)")
+
+    root = tree.root_hex()
+    leaves = hashes + extra
+    proofs, proof_time = timed(lambda: [tree.proof(i) for i in range(0, len(tree), max(1, len(tree) // 1000))])
+    _, verify_time = timed(lambda: [
+        MerkleTree.verify_proof(leaves[i * max(1, len(tree) // 1000)], proof, root)
+        for i, proof in enumerate(proofs)
+    ])
+    print(f"  {len(proofs)} proofs         build {proof_time / len(proofs) * 1e6:6.1f} us/proof | "
+          f"verify {verify_time / len(proofs) * 1e6:6.1f} us/proof | {len(proofs[0])} steps")
+
+    size = sum(len(level) for level in tree.levels)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'tree.bin')
+        _, save_time = timed(lambda: tree.save(path))
+        loaded, load_time = timed(lambda: MerkleTree.load(path))
+    assert loaded.root_hex() == root
+    print(f"  storage             {size / 2**20:.1f} MB of levels | save {save_time:.3f}s | load {load_time:.3f}s")
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    appends = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    run(count, appends)
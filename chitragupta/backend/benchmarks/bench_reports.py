@@ -0,0 +1,218 @@
+"""
+Report build benchmark: times chitragupta's PDF ReportGenerator and Inderjaal's
+HTML ReportGenerator on synthetic cases (files, calls, SMS, timeline,
+locations, media) at several scales.
+
+Every run happens in a fresh subprocess so peak RSS is per run. Wall time,
+peak RSS and output size go to results.json; the slowest runs are repeated
+under cProfile and their stats saved as <generator>_<scale>.prof (plus a
+.txt with the top functions). With --baseline, runs that got slower than
+--tolerance x the baseline make the script exit non-zero.
+
+Usage (from chitragupta/backend):
+    python benchmarks/bench_reports.py [--scales 1000,10000,100000] [--generators pdf,html]
+        [--out benchmarks/results] [--profile-top 2] [--baseline old/results.json]
+"""
+import argparse
+import contextlib
+import cProfile
+import hashlib
+import io
+import json
+import os
+import pstats
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.abspath(os.path.join(HERE, '..', '..', '..'))
+PYTHON_ENGINE = os.path.join(HERE, '..', 'python_engine')
+INDERJAAL_BACKEND = os.path.join(REPO, 'Inderjaal', 'backend')
+
+GENERATORS = ('pdf', 'html')
+
+
+# --- Synthetic cases ---
+
+def synthetic_case(scale, seed=1):
+    """files_data at scale; calls/sms/timeline/locations/media at scale // 10."""
+    rng = random.Random(seed)
+    side = max(10, scale // 10)
+    files = [
+        {'name': f"IMG_{i:07d}.jpg", 'hash': hashlib.sha256(i.to_bytes(8, 'little')).hexdigest()}
+        for i in range(scale)
+    ]
+    calls = [
+        {'number': f"+9198{rng.randrange(10 ** 8):08d}", 'date': str(1700000000000 + i * 60000),
+         'duration': str(rng.randrange(600)), 'type': rng.choice(['1', '2', '3']),
+         'type_label': rng.choice(['Incoming', 'Outgoing', 'Missed']), 'name': rng.choice(['', 'Contact'])}
+        for i in range(side)
+    ]
+    sms = [
+        {'address': f"+9198{rng.randrange(10 ** 8):08d}", 'date': str(1700000000000 + i * 30000),
+         'body': ' '.join(rng.choice(['meet', 'at', 'the', 'usual', 'place', 'tomorrow', 'ok', 'call', 'me'])
+                          for _ in range(rng.randrange(3, 40))),
+         'type': rng.choice(['1', '2']), 'type_label': rng.choice(['Inbox', 'Sent'])}
+        for i in range(side)
+    ]
+    timeline = [
+        {'timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(1700000000 + i * 45)),
+         'description': f"Event {i}: " + 'x' * rng.randrange(20, 120),
+         'type': rng.choice(['call', 'sms', 'file', 'app'])}
+        for i in range(side)
+    ]
+    locations = [
+        {'time': str(1700000000 + i * 300), 'lat_decimal': 28.6 + rng.random() / 10,
+         'lng_decimal': 77.2 + rng.random() / 10, 'dest_title': rng.choice(['', 'Office']),
+         'dest_address': 'Connaught Place, New Delhi'}
+        for i in range(side)
+    ]
+    return {'files': files, 'calls': calls, 'sms': sms, 'timeline': timeline,
+            'locations': locations, 'media': side}
+
+
+def run_pdf(case, workdir):
+    sys.path.insert(0, PYTHON_ENGINE)
+    from report_gen import ReportGenerator
+
+    output = os.path.join(workdir, 'report.pdf')
+    metadata = {'case_id': 'BENCH-001', 'investigator': 'bench', 'agency': 'bench', 'suspect': 'synthetic'}
+    extras = {'calls': case['calls'], 'sms': case['sms'], 'timeline': case['timeline']}
+    ReportGenerator().generate_report(metadata, case['files'], 'ab' * 32, 'c2ln' * 128, output, extras)
+    return [output] + [os.path.join(workdir, name) for name in os.listdir(workdir) if '_integrity.' in name]
+
+
+def prepare_html(case, workdir):
+    for filename, key in (('call_logs.json', 'calls'), ('sms_messages.json', 'sms'),
+                          ('location_history.json', 'locations')):
+        with open(os.path.join(workdir, filename), 'w') as f:
+            json.dump(case[key], f)
+    media_dir = os.path.join(workdir, 'extracted_media', 'DCIM')
+    os.makedirs(media_dir)
+    for i in range(case['media']):
+        with open(os.path.join(media_dir, f"IMG_{i:06d}.jpg"), 'wb') as f:
+            f.write(b'\xff\xd8' + bytes(i % 512))
+
+
+def run_html(case, workdir):
+    sys.path.insert(0, INDERJAAL_BACKEND)
+    from src.reporting.report_generator import ReportGenerator
+
+    return [ReportGenerator(output_dir=workdir).generate_html_report()]
+
+
+# --- One run (child process) ---
+
+def child(generator, scale, profile_path):
+    case = synthetic_case(scale)
+    with tempfile.TemporaryDirectory() as workdir:
+        if generator == 'html':
+            prepare_html(case, workdir)
+        run = run_pdf if generator == 'pdf' else run_html
+        profiler = cProfile.Profile() if profile_path else None
+        with contextlib.redirect_stdout(sys.stderr):
+            start = time.perf_counter()
+            if profiler:
+                profiler.enable()
+            outputs = run(case, workdir)
+            if profiler:
+                profiler.disable()
+            elapsed = time.perf_counter() - start
+        if profiler:
+            profiler.dump_stats(profile_path)
+            text = io.StringIO()
+            pstats.Stats(profile_path, stream=text).sort_stats('cumulative').print_stats(30)
+            with open(os.path.splitext(profile_path)[0] + '.txt', 'w') as f:
+                f.write(text.getvalue())
+        output_bytes = sum(os.path.getsize(path) for path in outputs)
+    # ru_maxrss is KB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_mb = rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+    print(json.dumps({'generator': generator, 'scale': scale, 'seconds': round(elapsed, 3),
+                      'peak_rss_mb': round(rss_mb, 1), 'output_bytes': output_bytes}))
+
+
+def measure(generator, scale, profile_path=None, timeout=3600):
+    command = [sys.executable, os.path.abspath(__file__), '--child', generator, str(scale)]
+    if profile_path:
+        command.append(profile_path)
+    result = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    if result.returncode != 0:
+        return {'generator': generator, 'scale': scale, 'error': result.stderr.strip().splitlines()[-1:]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+# --- Driver ---
+
+def compare(results, baseline_path, tolerance):
+    with open(baseline_path) as f:
+        baseline = {(r['generator'], r['scale']): r for r in json.load(f)['runs'] if 'seconds' in r}
+    regressions = []
+    for run in results:
+        before = baseline.get((run['generator'], run['scale']))
+        if before and 'seconds' in run and run['seconds'] > before['seconds'] * tolerance:
+            regressions.append(f"{run['generator']} @ {run['scale']}: "
+                               f"{before['seconds']:.2f}s -> {run['seconds']:.2f}s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', default='1000,10000,100000')
+    parser.add_argument('--generators', default=','.join(GENERATORS))
+    parser.add_argument('--out', default=os.path.join(HERE, 'results'))
+    parser.add_argument('--profile-top', type=int, default=2, help="Profile the N slowest runs")
+    parser.add_argument('--baseline', help="results.json from an earlier run")
+    parser.add_argument('--tolerance', type=float, default=1.25)
+    parser.add_argument('--timeout', type=int, default=3600, help="Per-run timeout in seconds")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    scales = [int(s) for s in args.scales.split(',')]
+    generators = [g for g in args.generators.split(',') if g in GENERATORS]
+
+    runs = []
+    print(f"{'generator':<10}{'scale':>10}{'seconds':>10}{'peak MB':>10}{'output MB':>11}")
+    for generator in generators:
+        for scale in scales:
+            try:
+                run = measure(generator, scale, timeout=args.timeout)
+            except subprocess.TimeoutExpired:
+                run = {'generator': generator, 'scale': scale, 'error': f"timed out after {args.timeout}s"}
+            runs.append(run)
+            if 'error' in run:
+                print(f"{generator:<10}{scale:>10}  failed: {run['error']}")
+            else:
+                print(f"{generator:<10}{scale:>10}{run['seconds']:>10.2f}{run['peak_rss_mb']:>10.1f}"
+                      f"{run['output_bytes'] / 1e6:>11.2f}")
+
+    slowest = sorted((r for r in runs if 'seconds' in r), key=lambda r: r['seconds'], reverse=True)
+    for run in slowest[:args.profile_top]:
+        profile_path = os.path.join(args.out, f"{run['generator']}_{run['scale']}.prof")
+        measure(run['generator'], run['scale'], profile_path, timeout=args.timeout * 2)
+        run['profile'] = profile_path
+        print(f"profiled {run['generator']} @ {run['scale']} -> {profile_path}")
+
+    results_path = os.path.join(args.out, 'results.json')
+    with open(results_path, 'w') as f:
+        json.dump({'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': sys.version.split()[0],
+                   'cpus': os.cpu_count(), 'runs': runs}, f, indent=2)
+    print(f"results -> {results_path}")
+
+    if args.baseline:
+        regressions = compare(runs, args.baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        child(sys.argv[2], int(sys.argv[3]), sys.argv[4] if len(sys.argv) > 4 else None)
+    else:
+        main()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Bulk Pull - Acquire many device files in one tar stream.
+Streams 'adb exec-out tar cf - -T <list>' to the host and untars on the fly,
+hashing every member while it is written and restoring the device mtime and
+permission bits. Paths tar could not deliver are retried one by one with
+'adb pull'. With an EvidenceStore, members land in the shared blob store and
+are linked into the destination; files whose device-side hash is already
+stored are not transferred at all.
+"""
+
+import os
+import posixpath
+import subprocess
+import tarfile
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Sequence
+
+from file_records import encode_permissions
+from hash_engine import DEFAULT_ALGORITHMS, MultiDigest, hash_engine
+
+
+class BulkPuller:
+    """Tar-stream acquisition of a file selection (e.g. a ForensicScanner result)."""
+
+    DEVICE_TMP = '/data/local/tmp'
+
+    def __init__(self, adb_path: str = "adb", batch_size: int = 5000, read_size: int = 1024 * 1024):
+        self.adb_path = adb_path
+        self.batch_size = batch_size
+        self.read_size = read_size
+
+    # --- Helpers ---
+
+    def _adb(self, serial: Optional[str]) -> List[str]:
+        return [self.adb_path] + (['-s', serial] if serial else [])
+
+    @staticmethod
+    def _device_paths(files) -> List[str]:
+        """Accept a scan result dict, file records or plain paths."""
+        if isinstance(files, dict):
+            files = files.get('files', [])
+        paths = []
+        for entry in files:
+            if isinstance(entry, str):
+                paths.append(entry)
+            elif not entry.get('is_dir'):
+                paths.append(entry['path'])
+        return list(dict.fromkeys(paths))
+
+    @staticmethod
+    def _local_path(destination: str, device_path: str) -> Optional[str]:
+        """Map a device path below destination; None if it would escape it."""
+        relative = posixpath.normpath('/' + device_path).lstrip('/')
+        if not relative or relative == '.' or relative.startswith('..'):
+            return None
+        local = os.path.join(destination, *relative.split('/'))
+        root = os.path.abspath(destination)
+        if os.path.commonpath([root, os.path.abspath(local)]) != root:
+            return None
+        return local
+
+    def _upload_list(self, serial: Optional[str], list_path: str, paths: Sequence[str]):
+        """Write the tar member list to a temp file on the device."""
+        payload = ''.join(f"{path}\n" for path in paths).encode('utf-8', 'surrogateescape')
+        result = subprocess.run(
+            self._adb(serial) + ['shell', f"cat > {list_path}"],
+            input=payload,
+            capture_output=True,
+            timeout=60
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Could not write file list to device: {result.stderr.decode(errors='replace').strip()}")
+
+    def _remove_list(self, serial: Optional[str], list_path: str):
+        """Delete the member list from the device (best effort: a leftover only costs device space)."""
+        try:
+            subprocess.run(self._adb(serial) + ['shell', f"rm -f {list_path}"], capture_output=True, timeout=30)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"Could not remove {list_path} from the device: {e}")
+
+    def _write_member(self, tar: tarfile.TarFile, member: tarfile.TarInfo, local: str,
+                      algorithms: Sequence[str], store=None, case_id=None) -> Dict:
+        os.makedirs(os.path.dirname(local), exist_ok=True)
+        source = tar.extractfile(member)
+        if store is not None:
+            blob = store.put_stream(source, algorithms)
+            # A hard link keeps the blob's times; the store records this file's mtime and mode
+            method = store.materialize(blob['sha256'], local, case_id, mtime=member.mtime,
+                                       mode=(member.mode & 0o777) | 0o600, overwrite=True)
+            return {
+                'size': blob['size'],
+                'mtime': int(member.mtime),
+                'mode': oct(member.mode & 0o7777),
+                'storage': method,
+                **{name: blob[name] for name in algorithms}
+            }
+        digest = MultiDigest(algorithms)
+        with open(local, 'wb') as out:
+            while True:
+                chunk = source.read(self.read_size)
+                if not chunk:
+                    break
+                out.write(chunk)
+                digest.update(chunk)
+        os.chmod(local, (member.mode & 0o777) | 0o600)  # Keep device bits, stay readable for us
+        os.utime(local, (member.mtime, member.mtime))
+        return {
+            'size': digest.bytes_hashed,
+            'mtime': int(member.mtime),
+            'mode': oct(member.mode & 0o7777),
+            **digest.hexdigests()
+        }
+
+    # --- Acquisition ---
+
+    def _pull_batch(self, serial, paths, destination, algorithms, acquired, progress, store=None, case_id=None,
+                    cancel_event=None):
+        """Stream one tar of paths; returns the tar exit status and stderr. Stops early once cancel_event is set."""
+        # Removed in finally: an in-command 'rm' never runs when the stream is killed or cut off
+        list_path = f"{self.DEVICE_TMP}/cg_bulk_{uuid.uuid4().hex}.lst"
+        try:
+            self._upload_list(serial, list_path, paths)
+            wanted = {posixpath.normpath(path): path for path in paths}
+            process = subprocess.Popen(
+                self._adb(serial) + ['exec-out', f"tar cf - -T {list_path} 2>/dev/null"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+            try:
+                with tarfile.open(fileobj=process.stdout, mode='r|') as tar:
+                    for member in tar:
+                        if cancel_event is not None and cancel_event.is_set():
+                            process.kill()
+                            break
+                        device_path = wanted.get('/' + posixpath.normpath(member.name).lstrip('/'))
+                        if device_path is None:
+                            continue  # Parent directories and anything we did not ask for
+                        if member.issym():
+                            # Keep the link itself as evidence, never follow it on the host
+                            acquired[device_path] = {
+                                'path': device_path, 'local_path': None, 'method': 'tar',
+                                'size': 0, 'mtime': int(member.mtime), 'link_target': member.linkname
+                            }
+                            continue
+                        if not member.isfile():
+                            continue
+                        local = self._local_path(destination, device_path)
+                        if local is None:
+                            continue
+                        record = self._write_member(tar, member, local, algorithms, store, case_id)
+                        acquired[device_path] = {'path': device_path, 'local_path': local, 'method': 'tar', **record}
+                        if progress:
+                            progress(acquired[device_path])
+            except tarfile.ReadError:
+                pass  # Truncated/empty stream: whatever is missing gets retried below
+            finally:
+                process.stdout.close()
+                stderr = process.stderr.read().decode('utf-8', 'replace')
+                process.wait()
+            return process.returncode, stderr
+        finally:
+            self._remove_list(serial, list_path)
+
+    def _pull_single(self, serial, device_path, destination, algorithms, store=None, case_id=None) -> Dict:
+        local = self._local_path(destination, device_path)
+        if local is None:
+            raise ValueError("Path escapes the destination directory")
+        os.makedirs(os.path.dirname(local), exist_ok=True)
+        result = subprocess.run(
+            self._adb(serial) + ['pull', '-a', device_path, local],
+            capture_output=True,
+            text=True,
+            timeout=600
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or 'adb pull failed')
+        stat = os.stat(local)
+        record = {
+            'path': device_path,
+            'local_path': local,
+            'method': 'pull',
+            'size': stat.st_size,
+            'mtime': int(stat.st_mtime),
+            'mode': oct(stat.st_mode & 0o7777),
+            **hash_engine.hash_file(local, algorithms)
+        }
+        if store is not None:
+            record['storage'] = store.ingest(local, case_id, sha256=record.get('sha256'))['method']
+        return record
+
+    @staticmethod
+    def _hashed_records(files) -> Dict[str, Dict]:
+        """Scan records with a SHA-256 per path from a hashed ForensicScanner result, if there is one."""
+        if isinstance(files, dict):
+            files = files.get('files', [])
+        records = {}
+        for entry in files:
+            if not isinstance(entry, str):
+                sha256 = entry.get('sha256')
+                if isinstance(sha256, str) and len(sha256) == 64:
+                    records[entry['path']] = entry
+        return records
+
+    @staticmethod
+    def _record_mode(record: Dict) -> Optional[int]:
+        """Device permission bits from a scan record's 'ls -l' string, or None if it has none."""
+        mode = encode_permissions(record.get('permissions') or '')
+        return None if mode is None else mode & 0o7777
+
+    def pull(
+        self,
+        files,
+        destination: str,
+        serial: Optional[str] = None,
+        algorithms: Sequence[str] = DEFAULT_ALGORITHMS,
+        retry_failed: bool = True,
+        progress_callback: Optional[Callable[[Dict], None]] = None,
+        store=None,
+        case_id: Optional[str] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> Dict:
+        """
+        Acquire files into destination (mirroring device paths below it).
+
+        Args:
+            files: ForensicScanner result, its 'files' list, or device paths
+            destination: Local evidence directory
+            serial: Device serial (adb's default device if None)
+            algorithms: Digests computed per member during extraction
+            retry_failed: Retry paths missing from the tar stream with 'adb pull'
+            progress_callback: Called with each acquired file record
+            store: EvidenceStore to keep the bytes in (linked into destination)
+            case_id: Case recorded on the store references
+            cancel_event: Once set, stop after the current file; the result
+                covers what was acquired so far and has 'cancelled' set
+
+        Returns:
+            Dictionary with acquired 'files', 'failed' paths and transfer stats
+        """
+        start = time.time()
+        paths = self._device_paths(files)
+
+        def stopped() -> bool:
+            return cancel_event is not None and cancel_event.is_set()
+        os.makedirs(destination, exist_ok=True)
+
+        acquired: Dict[str, Dict] = {}
+        reused = 0
+        if store is not None:
+            # Content the store already holds (by device-side hash) never crosses USB again
+            for device_path, record in self._hashed_records(files).items():
+                sha256 = record['sha256']
+                local = self._local_path(destination, device_path)
+                if local is None or not store.has(sha256) or set(algorithms) - {'sha256'}:
+                    continue
+                mtime, mode = record.get('mtime'), self._record_mode(record)
+                try:
+                    method = store.materialize(sha256, local, case_id, mtime=mtime, overwrite=True,
+                                               mode=None if mode is None else (mode & 0o777) | 0o600)
+                except FileNotFoundError:
+                    continue  # gc removed the blob after has(); the tar stream delivers it instead
+                acquired[device_path] = {
+                    'path': device_path, 'local_path': local, 'method': 'store', 'storage': method,
+                    'size': os.path.getsize(local), 'mtime': mtime,
+                    'mode': None if mode is None else oct(mode), 'sha256': sha256
+                }
+                reused += 1
+                if progress_callback:
+                    progress_callback(acquired[device_path])
+
+        # tar -T reads one path per line; anything with a newline goes straight to retry
+        streamable = [p for p in paths if '\n' not in p and p not in acquired]
+        tar_errors = []
+        for offset in range(0, len(streamable), self.batch_size):
+            if stopped():
+                break
+            batch = streamable[offset:offset + self.batch_size]
+            try:
+                returncode, stderr = self._pull_batch(
+                    serial, batch, destination, algorithms, acquired, progress_callback, store, case_id,
+                    cancel_event
+                )
+                if returncode != 0 and stderr.strip():
+                    tar_errors.append(stderr.strip())
+            except (OSError, RuntimeError, subprocess.TimeoutExpired) as e:
+                tar_errors.append(str(e))
+
+        missing = [] if stopped() else [p for p in paths if p not in acquired]
+        failed = []
+        retried = 0
+        for device_path in missing:
+            if stopped():
+                break
+            if not retry_failed:
+                failed.append({'path': device_path, 'error': 'Not delivered by tar stream'})
+                continue
+            retried += 1
+            try:
+                acquired[device_path] = self._pull_single(
+                    serial, device_path, destination, algorithms, store, case_id
+                )
+                if progress_callback:
+                    progress_callback(acquired[device_path])
+            except (OSError, ValueError, RuntimeError, subprocess.TimeoutExpired) as e:
+                failed.append({'path': device_path, 'error': str(e)})
+
+        elapsed = time.time() - start
+        total_bytes = sum(record['size'] for record in acquired.values())
+        print(f"Bulk pull: {len(acquired)} files ({total_bytes / (1024 * 1024):.1f} MB) in "
+              f"{elapsed:.1f}s, {reused} from the evidence store, {retried} retried individually, "
+              f"{len(failed)} failed")
+        return {
+            'success': not failed and not stopped(),
+            'cancelled': stopped(),
+            'destination': destination,
+            'files': [acquired[p] for p in paths if p in acquired],
+            'failed': failed,
+            'requested': len(paths),
+            'retried': retried,
+            'reused_from_store': reused,
+            'tar_errors': tar_errors,
+            'bytes': total_bytes,
+            'seconds': round(elapsed, 2),
+            'mb_per_s': round(total_bytes / (1024 * 1024) / elapsed, 1) if elapsed > 0 else 0.0
+        }
+
+
+bulk_puller = BulkPuller()
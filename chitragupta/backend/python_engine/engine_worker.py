@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Engine Worker - Resident Python engine for the chitragupta backend.
+Speaks line-delimited JSON-RPC 2.0 over stdio so the Node server can keep one
+warm interpreter (modules imported, signing key loaded, adb shells open) instead
+of spawning 'python3 -c' for every request.
+
+Request:   {"jsonrpc": "2.0", "id": 7, "method": "scanner.scan_device", "params": {...}}
+Partial:   {"jsonrpc": "2.0", "id": 7, "partial": {...}}      zero or more, streaming methods only
+Response:  {"jsonrpc": "2.0", "id": 7, "result": ...}  or  {"jsonrpc": "2.0", "id": 7, "error": {...}}
+
+Requests run concurrently on a thread pool (long-polls on a separate one, so
+waiting clients never hold up scans and pulls), so responses may arrive out of
+order; match them by id. A '$/cancel' notification ({"params": {"id": 7}})
+stops a streaming call early. Anything the engine modules print goes to
+stderr, stdout carries protocol messages only.
+"""
+
+import inspect
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from file_records import json_default
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+REQUEST_CANCELLED = -32800
+
+# Methods that mostly wait for data; they run on their own, capped pool
+LONG_POLL_METHODS = {'bridge.read_events_since'}
+
+
+class Cancelled(Exception):
+    pass
+
+
+class InvalidParams(Exception):
+    pass
+
+
+class EngineWorker:
+    """Dispatches JSON-RPC requests to the engine modules on a thread pool."""
+
+    def __init__(self, out, max_workers: int = 8, max_long_polls: int = 16):
+        self.out = out
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='engine')
+        self.poll_pool = ThreadPoolExecutor(max_workers=max_long_polls, thread_name_prefix='engine-poll')
+        self._outbox = queue.Queue()
+        self._cancelled: Dict[object, threading.Event] = {}
+        self._cancelled_lock = threading.Lock()
+        self._singletons: Dict[str, object] = {}
+        self._singletons_lock = threading.Lock()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+        self.methods: Dict[str, Callable] = {
+            'ping': lambda params, emit, cancelled: 'pong',
+
+            'bridge.check_connection': self._call('bridge', 'check_connection'),
+            'bridge.get_device_details': self._call('bridge', 'get_device_details'),
+            'bridge.get_installed_packages': self._call('bridge', 'get_installed_packages'),
+            'bridge.list_files': self._call('bridge', 'list_files'),
+            'bridge.extract_call_logs': self._call('bridge', 'extract_call_logs'),
+            'bridge.extract_sms_logs': self._call('bridge', 'extract_sms_logs'),
+            'bridge.extract_system_logs': self._call('bridge', 'extract_system_logs'),
+            'bridge.pull_file_with_hash': self._call('bridge', 'pull_file_with_hash'),
+            'bridge.start_logcat_monitor': self._call('bridge', 'start_logcat_monitor'),
+            'bridge.get_latest_logs': self._call('bridge', 'get_latest_logs'),
+            'bridge.get_interesting_events': self._call('bridge', 'get_interesting_events'),
+            'bridge.read_events_since': self._read_events_since,
+            'bridge.query_logs': self._call('bridge', 'query_logs'),
+
+            'scanner.scan_device': self._scan_device,
+            'scanner.iter_scan': self._iter_scan,
+
+            'bulk.pull': self._bulk_pull,
+
+            'hasher.calculate_file_hash': self._call('hasher', 'calculate_file_hash'),
+            'hasher.build_merkle_tree': self._call('hasher', 'build_merkle_tree'),
+
+            'known.load': self._call('known', 'load'),
+            'known.lookup': self._call('known', 'lookup'),
+            'known.stats': self._call('known', 'stats'),
+
+            'signer.sign_data': self._call('signer', 'sign_data'),
+            'signer.sign_many': self._call('signer', 'sign_many'),
+            'signer.verify': self._call('signer', 'verify'),
+            'signer.get_public_key_pem': self._call('signer', 'get_public_key_pem'),
+
+            'report.generate_report': self._call('report', 'generate_report'),
+
+            'packager.extract_real_data': self._call('packager', 'extract_real_data'),
+            'packager.create_package': self._call('packager', 'create_package'),
+        }
+
+    # --- Engine objects, imported on first use and then kept warm ---
+
+    def _singleton(self, name: str):
+        with self._singletons_lock:
+            if name not in self._singletons:
+                if name == 'bridge':
+                    from pipeline_wrapper import ADBBridge
+                    instance = ADBBridge()
+                elif name == 'hasher':
+                    from hasher import hasher as instance
+                elif name == 'known':
+                    from known_hashes import known_hashes as instance
+                elif name == 'signer':
+                    from signer import signer as instance
+                elif name == 'report':
+                    from report_gen import report_gen as instance
+                elif name == 'packager':
+                    from packager import packager as instance
+                else:
+                    raise KeyError(name)
+                self._singletons[name] = instance
+            return self._singletons[name]
+
+    @staticmethod
+    def _invoke(fn: Callable, params, **extra):
+        """
+        Call fn with the request's params (a list or an object) plus extra
+        keywords. Params are bound to fn's signature first, so only a mismatch
+        there is InvalidParams; a TypeError raised inside fn stays an internal error.
+        """
+        if isinstance(params, list):
+            args, kwargs = params, extra
+        elif params is None or isinstance(params, dict):
+            args, kwargs = [], {**(params or {}), **extra}
+        else:
+            raise InvalidParams("params must be an array or an object")
+        try:
+            inspect.signature(fn).bind(*args, **kwargs)
+        except TypeError as e:
+            raise InvalidParams(str(e)) from None
+        return fn(*args, **kwargs)
+
+    def _call(self, target: str, method: str) -> Callable:
+        def handler(params, emit, cancelled):
+            return self._invoke(getattr(self._singleton(target), method), params)
+        return handler
+
+    @staticmethod
+    def _scanner():
+        # Scanners keep per-scan totals, so every call gets its own instance
+        from forensic_scanner import ForensicScanner
+        return ForensicScanner()
+
+    def _scan_device(self, params, emit, cancelled):
+        return self._invoke(self._scanner().scan_device, params)
+
+    def _iter_scan(self, params, emit, cancelled):
+        """Stream scan events as partials; the result is the summary event."""
+        summary = None
+        events = self._invoke(self._scanner().iter_scan, params)
+        try:
+            for event in events:
+                if cancelled.is_set():
+                    raise Cancelled()
+                if event['event'] in ('summary', 'error'):
+                    summary = event
+                emit(event)
+        finally:
+            events.close()
+        return summary
+
+    def _read_events_since(self, params, emit, cancelled):
+        """Long-poll for logcat events past a cursor; waits in short slices so $/cancel works."""
+        if params is not None and not isinstance(params, dict):
+            raise InvalidParams("params must be an object")
+        params = dict(params or {})
+        bridge = self._singleton('bridge')
+        try:
+            deadline = time.monotonic() + float(params.pop('timeout', 0) or 0)
+        except (TypeError, ValueError):
+            raise InvalidParams("timeout must be a number") from None
+        while True:
+            remaining = deadline - time.monotonic()
+            result = self._invoke(bridge.read_events_since, params,
+                                  timeout=min(remaining, 0.5) if remaining > 0 else 0)
+            if result['events'] or result['missed'] or remaining <= 0:
+                return result
+            if cancelled.is_set():
+                raise Cancelled()
+            params['cursor'] = result['cursor']
+
+    def _bulk_pull(self, params, emit, cancelled):
+        """Tar-stream acquisition; every acquired file is streamed as a partial."""
+        from bulk_pull import bulk_puller
+        result = self._invoke(bulk_puller.pull, params, progress_callback=emit, cancel_event=cancelled)
+        if cancelled.is_set():
+            raise Cancelled()
+        return result
+
+    # --- Protocol ---
+
+    def _send(self, message: Dict):
+        self._outbox.put(message)
+
+    def _write_loop(self):
+        """Single writer: serialises messages and flushes once the outbox is drained."""
+        while True:
+            message = self._outbox.get()
+            if message is None:
+                self.out.flush()
+                return
+            try:
+                line = json.dumps(message, default=json_default)
+            except (TypeError, ValueError) as e:
+                line = json.dumps({
+                    'jsonrpc': '2.0',
+                    'id': message.get('id'),
+                    'error': {'code': INTERNAL_ERROR, 'message': f"Unserialisable result: {e}"}
+                })
+            self.out.write(line + '\n')
+            if self._outbox.empty():
+                self.out.flush()
+
+    def _error(self, request_id, code: int, message: str, data=None):
+        error = {'code': code, 'message': message}
+        if data is not None:
+            error['data'] = data
+        self._send({'jsonrpc': '2.0', 'id': request_id, 'error': error})
+
+    def _run(self, request_id, handler: Callable, params, cancelled: threading.Event):
+        def emit(partial):
+            self._send({'jsonrpc': '2.0', 'id': request_id, 'partial': partial})
+
+        try:
+            result = handler(params, emit, cancelled)
+            if request_id is not None:
+                self._send({'jsonrpc': '2.0', 'id': request_id, 'result': result})
+        except Cancelled:
+            self._error(request_id, REQUEST_CANCELLED, 'Request cancelled')
+        except InvalidParams as e:
+            self._error(request_id, INVALID_PARAMS, str(e))
+        except Exception as e:
+            self._error(request_id, INTERNAL_ERROR, str(e), traceback.format_exc())
+        finally:
+            if request_id is not None:
+                with self._cancelled_lock:
+                    self._cancelled.pop(request_id, None)
+
+    def handle_line(self, line: str):
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            self._error(None, PARSE_ERROR, f"Parse error: {e}")
+            return
+        if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+            self._error(request.get('id') if isinstance(request, dict) else None,
+                        INVALID_REQUEST, 'Invalid request')
+            return
+
+        request_id = request.get('id')
+        method = request['method']
+        params = request.get('params')
+
+        if method == '$/cancel':
+            with self._cancelled_lock:
+                event = self._cancelled.get((params or {}).get('id'))
+            if event is not None:
+                event.set()
+            return
+
+        handler = self.methods.get(method)
+        if handler is None:
+            self._error(request_id, METHOD_NOT_FOUND, f"Method not found: {method}")
+            return
+
+        cancelled = threading.Event()
+        if request_id is not None:  # Notifications cannot be cancelled: nothing names them
+            with self._cancelled_lock:
+                self._cancelled[request_id] = cancelled
+        pool = self.poll_pool if method in LONG_POLL_METHODS else self.pool
+        pool.submit(self._run, request_id, handler, params, cancelled)
+
+    def serve(self, stream):
+        for line in stream:
+            if line.strip():
+                self.handle_line(line)
+        self.pool.shutdown(wait=True)
+        self.poll_pool.shutdown(wait=True)
+        self._outbox.put(None)
+        self._writer.join()
+
+
+def main():
+    # Keep the protocol channel to ourselves: module prints go to stderr
+    protocol_out = sys.stdout
+    sys.stdout = sys.stderr
+    EngineWorker(protocol_out).serve(sys.stdin)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+Evidence Store - Content-addressed blob store shared by every case.
+Each distinct file is kept once under objects/<aa>/<sha256> and materialised
+into case folders as a reflink (copy-on-write clone) or a hard link, so
+re-acquisitions and duplicate media cost no extra disk. A SQLite index
+reference-counts the blobs per materialised path for garbage collection.
+
+Usage:
+    python evidence_store.py ingest <dir> [--case ID] [--no-link]   # dedupe an existing folder in place
+    python evidence_store.py gc                          # drop dangling refs and unreferenced blobs
+    python evidence_store.py stats
+"""
+
+import contextlib
+import errno
+import fcntl
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from typing import BinaryIO, Dict, Optional, Sequence
+
+from hash_engine import DEFAULT_ALGORITHMS, MultiDigest, hash_engine
+
+DEFAULT_STORE_PATH = os.path.join(os.path.expanduser("~"), ".chitragupta", "evidence_store")
+
+GC_GRACE_SECONDS = 3600  # Unreferenced blobs younger than this may be about to be materialised
+
+FICLONE = 0x40049409  # Linux ioctl: clone the source file's extents (btrfs, XFS, ...)
+
+METHODS = ('auto', 'reflink', 'hardlink', 'copy')
+
+
+class EvidenceStore:
+    """SHA-256 keyed blob store with reflink/hard-link materialisation and ref counting."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS blobs (
+            sha256      TEXT PRIMARY KEY,
+            size        INTEGER NOT NULL,
+            refcount    INTEGER NOT NULL DEFAULT 0,
+            created     REAL NOT NULL,
+            touched     REAL
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS refs (
+            path        TEXT PRIMARY KEY,
+            sha256      TEXT NOT NULL REFERENCES blobs(sha256),
+            case_id     TEXT,
+            method      TEXT NOT NULL,
+            created     REAL NOT NULL,
+            mtime       REAL,
+            mode        INTEGER
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS refs_by_blob ON refs(sha256);
+    """
+
+    def __init__(self, root: Optional[str] = None, read_size: int = 1024 * 1024):
+        self.root = root or os.environ.get("CHITRAGUPTA_EVIDENCE_STORE", DEFAULT_STORE_PATH)
+        self.read_size = read_size
+        self.objects = os.path.join(self.root, "objects")
+        self.tmp = os.path.join(self.root, "tmp")
+        os.makedirs(self.objects, exist_ok=True)
+        os.makedirs(self.tmp, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(self.root, "index.sqlite"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        # Stores created before gc grace and per-reference metadata
+        self._add_columns('blobs', {'touched': 'REAL'})
+        self._add_columns('refs', {'mtime': 'REAL', 'mode': 'INTEGER'})
+        self.conn.commit()
+        self._copy_warned = False
+
+    def _add_columns(self, table: str, columns: Dict[str, str]):
+        existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+        for name, kind in columns.items():
+            if name not in existing:
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {kind}")
+
+    def close(self):
+        self.conn.close()
+
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.objects, sha256[:2], sha256)
+
+    def has(self, sha256: str) -> bool:
+        """True if the blob is stored (e.g. a device-side hash seen in an earlier acquisition)."""
+        return os.path.exists(self.blob_path(sha256))
+
+    # --- Adding blobs ---
+
+    def _commit_blob(self, temp_path: str, sha256: str, size: int) -> bool:
+        """Move a fully written temp file into place; returns False if the blob already existed."""
+        final = self.blob_path(sha256)
+        with self._lock, self._write_transaction():
+            # Under the same write lock gc deletes under, so the blob cannot vanish in between
+            if os.path.exists(final):
+                os.remove(temp_path)
+                created = False
+            else:
+                os.makedirs(os.path.dirname(final), exist_ok=True)
+                os.chmod(temp_path, 0o444)  # Blobs are shared through hard links: never edit in place
+                os.replace(temp_path, final)
+                created = True
+            self._record_blob(sha256, size)
+        return created
+
+    @contextlib.contextmanager
+    def _write_transaction(self):
+        """
+        Caller holds self._lock. BEGIN IMMEDIATE takes SQLite's write lock up
+        front, which also serialises against other processes using the store.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+
+    def _record_blob(self, sha256: str, size: int):
+        # Caller holds self._lock inside a write transaction. touched holds off
+        # gc until the caller has had time to materialise the blob.
+        now = time.time()
+        self.conn.execute(
+            "INSERT INTO blobs (sha256, size, refcount, created, touched) VALUES (?, ?, 0, ?, ?) "
+            "ON CONFLICT (sha256) DO UPDATE SET touched = excluded.touched",
+            (sha256, size, now, now)
+        )
+
+    def put_stream(self, source: BinaryIO, algorithms: Sequence[str] = DEFAULT_ALGORITHMS) -> Dict:
+        """
+        Store a stream, hashing it while it is written. Returns the digests plus
+        'size' and 'stored' (False when the content was already in the store).
+        """
+        if 'sha256' not in algorithms:
+            algorithms = ('sha256',) + tuple(algorithms)
+        digest = MultiDigest(algorithms)
+        temp_path = os.path.join(self.tmp, uuid.uuid4().hex)
+        try:
+            with open(temp_path, 'wb') as out:
+                while True:
+                    chunk = source.read(self.read_size)
+                    if not chunk:
+                        break
+                    out.write(chunk)
+                    digest.update(chunk)
+            digests = digest.hexdigests()
+            stored = self._commit_blob(temp_path, digests['sha256'], digest.bytes_hashed)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return {**digests, 'size': digest.bytes_hashed, 'stored': stored}
+
+    def put_file(self, path: str, sha256: Optional[str] = None) -> Dict:
+        """Store a local file (hashed unless sha256 is already known)."""
+        if sha256 is None:
+            sha256 = hash_engine.hash_file(path)['sha256']
+        size = os.path.getsize(path)
+        if self.has(sha256):
+            with self._lock, self._write_transaction():
+                if self.has(sha256):
+                    self._record_blob(sha256, size)
+                    return {'sha256': sha256, 'size': size, 'stored': False}
+        temp_path = os.path.join(self.tmp, uuid.uuid4().hex)
+        self._clone_or_copy(path, temp_path)
+        return {'sha256': sha256, 'size': size, 'stored': self._commit_blob(temp_path, sha256, size)}
+
+    # --- Materialisation ---
+
+    @staticmethod
+    def _reflink(source: str, destination: str):
+        with open(source, 'rb') as src, open(destination, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+    def _clone_or_copy(self, source: str, destination: str) -> str:
+        try:
+            self._reflink(source, destination)
+            return 'reflink'
+        except OSError:
+            shutil.copyfile(source, destination)
+            return 'copy'
+
+    def materialize(self, sha256: str, destination: str, case_id: Optional[str] = None,
+                    method: str = 'auto', mtime: Optional[float] = None, mode: Optional[int] = None,
+                    link: bool = True, overwrite: bool = False) -> str:
+        """
+        Place blob sha256 at destination and record the reference. 'auto'
+        tries a reflink, then a hard link (unless link=False), then a plain
+        copy, which costs the full size again and is reported. Returns the
+        method used. mtime/mode are applied to reflinks and copies; a hard
+        link shares the blob's read-only inode and timestamps, so they are
+        kept on the reference instead (see reference()). An existing
+        destination is only replaced if it is a store reference, or with
+        overwrite=True.
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown materialisation method: {method}")
+        blob = self.blob_path(sha256)
+        if not os.path.exists(blob):
+            raise FileNotFoundError(f"Blob {sha256} is not in the store")
+        destination = os.path.abspath(destination)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        if os.path.lexists(destination):
+            if not self.release(destination) and not overwrite:
+                raise FileExistsError(f"{destination} exists and is not managed by the evidence store")
+            if os.path.lexists(destination):
+                os.remove(destination)
+
+        used = None
+        fallback = 'hard links disabled'
+        if method in ('auto', 'reflink'):
+            try:
+                self._reflink(blob, destination)
+                used = 'reflink'
+            except OSError:
+                if os.path.exists(destination):
+                    os.remove(destination)
+                if method == 'reflink':
+                    raise
+        if used is None and (method == 'hardlink' or (method == 'auto' and link)):
+            try:
+                os.link(blob, destination)
+                used = 'hardlink'
+            except OSError as e:
+                if method == 'hardlink' or e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                    raise
+                fallback = os.strerror(e.errno)
+        if used is None:
+            shutil.copyfile(blob, destination)
+            used = 'copy'
+            if method == 'auto' and not self._copy_warned:
+                self._copy_warned = True
+                print(f"Evidence store: copying blobs into place ({fallback}), so they are not deduplicated; "
+                      f"first at {destination}. 'stats' counts references by method.")
+        if used != 'hardlink':
+            os.chmod(destination, 0o644 if mode is None else mode)
+            if mtime is not None:
+                os.utime(destination, (mtime, mtime))
+
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO refs (path, sha256, case_id, method, created, mtime, mode) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (destination, sha256, case_id, used, time.time(), mtime, mode)
+            )
+            self.conn.execute("UPDATE blobs SET refcount = refcount + 1 WHERE sha256 = ?", (sha256,))
+            self.conn.commit()
+        return used
+
+    def reference(self, path: str) -> Optional[Dict]:
+        """The store reference at path with the mtime/mode the file should carry, or None."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT sha256, case_id, method, mtime, mode FROM refs WHERE path = ?", (os.path.abspath(path),)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('sha256', 'case_id', 'method', 'mtime', 'mode'), row))
+
+    def release(self, path: str, remove: bool = True) -> bool:
+        """
+        Drop the reference held by path, deleting the file unless remove=False.
+        Returns False (and leaves the file alone) if path is not a store reference.
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            row = self.conn.execute("SELECT sha256 FROM refs WHERE path = ?", (path,)).fetchone()
+            if row:
+                self.conn.execute("DELETE FROM refs WHERE path = ?", (path,))
+                self.conn.execute("UPDATE blobs SET refcount = refcount - 1 WHERE sha256 = ?", row)
+                self.conn.commit()
+        if row is None:
+            return False
+        if remove and os.path.lexists(path):
+            os.remove(path)
+        return True
+
+    def ingest(self, path: str, case_id: Optional[str] = None, method: str = 'auto',
+               sha256: Optional[str] = None, link: bool = True) -> Dict:
+        """
+        Deduplicate an existing file: store a copy and replace the file with a
+        reflink or hard link of the blob. Hard-linked files are read-only; pass
+        link=False where something (e.g. root) may still write to them, as the
+        write would alter the stored copy.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        blob = self.put_file(path, sha256)
+        temp_path = f"{path}.cgstore-{uuid.uuid4().hex[:8]}"
+        os.replace(path, temp_path)
+        try:
+            used = self.materialize(blob['sha256'], path, case_id, method, mtime=stat.st_mtime,
+                                    mode=stat.st_mode & 0o7777, link=link)
+        except BaseException:
+            os.replace(temp_path, path)
+            raise
+        os.remove(temp_path)
+        return {**blob, 'path': path, 'method': used}
+
+    def ingest_tree(self, root: str, case_id: Optional[str] = None, method: str = 'auto',
+                    link: bool = True) -> Dict:
+        """Deduplicate every regular file below root in place."""
+        known = {}
+        with self._lock:
+            for path, in self.conn.execute("SELECT path FROM refs WHERE path LIKE ?",
+                                           (os.path.abspath(root).rstrip(os.sep) + os.sep + '%',)):
+                known[path] = True
+        files = duplicates = saved = 0
+        for directory, _, names in os.walk(root):
+            for name in names:
+                path = os.path.abspath(os.path.join(directory, name))
+                if path in known or os.path.islink(path) or not os.path.isfile(path):
+                    continue
+                result = self.ingest(path, case_id, method, link=link)
+                files += 1
+                if not result['stored']:
+                    duplicates += 1
+                    saved += result['size']
+        return {'files': files, 'duplicates': duplicates, 'bytes_saved': saved}
+
+    # --- Maintenance ---
+
+    def _ref_is_live(self, path: str, sha256: str, method: str) -> bool:
+        if not os.path.isfile(path) or os.path.islink(path):
+            return False
+        if method == 'hardlink':
+            try:
+                return os.path.samefile(path, self.blob_path(sha256))
+            except OSError:
+                return False
+        return True
+
+    def gc(self, dry_run: bool = False) -> Dict:
+        """
+        Drop references whose file was deleted or replaced, then delete blobs
+        nobody references any more. Blobs stored or re-stored within
+        GC_GRACE_SECONDS are kept, as their materialisation may be under way.
+        """
+        with self._lock:
+            refs = self.conn.execute("SELECT path, sha256, method FROM refs").fetchall()
+        dangling = [(path, sha256) for path, sha256, method in refs if not self._ref_is_live(path, sha256, method)]
+
+        cutoff = time.time() - GC_GRACE_SECONDS
+        find_unreferenced = (
+            "SELECT sha256, size FROM blobs WHERE refcount = 0 AND COALESCE(touched, created) < ?"
+        )
+        if dry_run:
+            with self._lock:
+                unreferenced = self.conn.execute(find_unreferenced, (cutoff,)).fetchall()
+        else:
+            # Selection, row delete and unlink all happen under one write transaction,
+            # so a concurrent put cannot re-reference a blob that is being removed
+            with self._lock, self._write_transaction():
+                self.conn.executemany("DELETE FROM refs WHERE path = ?", [(path,) for path, _ in dangling])
+                # Recount from refs so the counters also heal after crashes
+                self.conn.execute(
+                    "UPDATE blobs SET refcount = (SELECT COUNT(*) FROM refs WHERE refs.sha256 = blobs.sha256)"
+                )
+                unreferenced = []
+                for sha256, size in self.conn.execute(find_unreferenced, (cutoff,)).fetchall():
+                    deleted = self.conn.execute(
+                        "DELETE FROM blobs WHERE sha256 = ? AND refcount = 0", (sha256,)
+                    ).rowcount
+                    if not deleted:
+                        continue
+                    unreferenced.append((sha256, size))
+                    blob = self.blob_path(sha256)
+                    if os.path.exists(blob):
+                        os.chmod(blob, 0o644)
+                        os.remove(blob)
+                    try:
+                        os.rmdir(os.path.dirname(blob))  # Only succeeds once the fan-out dir is empty
+                    except OSError:
+                        pass
+
+        if not dry_run:
+            # Temp files left by interrupted writes
+            for name in os.listdir(self.tmp):
+                temp_path = os.path.join(self.tmp, name)
+                if os.path.getmtime(temp_path) < cutoff:
+                    os.remove(temp_path)
+
+        return {
+            'dangling_refs': len(dangling),
+            'blobs_removed': len(unreferenced),
+            'bytes_freed': sum(size for _, size in unreferenced),
+            'dry_run': dry_run
+        }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            blobs, stored = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+            refs, logical = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(blobs.size), 0) FROM refs JOIN blobs USING (sha256)"
+            ).fetchone()
+            methods = dict(self.conn.execute("SELECT method, COUNT(*) FROM refs GROUP BY method"))
+            copied, = self.conn.execute(
+                "SELECT COALESCE(SUM(blobs.size), 0) FROM refs JOIN blobs USING (sha256) WHERE method = 'copy'"
+            ).fetchone()
+        return {
+            'blobs': blobs,
+            'stored_bytes': stored,
+            'references': refs,
+            'referenced_bytes': logical,
+            'bytes_saved': max(0, logical - stored - copied),  # Copies take their own space
+            'methods': methods
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> EvidenceStore:
+    """Process-wide store at CHITRAGUPTA_EVIDENCE_STORE (opened on first use)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = EvidenceStore()
+        return _store
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Chitragupta content-addressed evidence store")
+    parser.add_argument('--root', help="Store directory (default: $CHITRAGUPTA_EVIDENCE_STORE)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    ingest_cmd = commands.add_parser('ingest', help="Deduplicate folders in place")
+    ingest_cmd.add_argument('paths', nargs='+')
+    ingest_cmd.add_argument('--case')
+    ingest_cmd.add_argument('--method', choices=METHODS, default='auto')
+    ingest_cmd.add_argument('--no-link', dest='link', action='store_false',
+                            help="Never hard-link to the blobs (reflink or copy instead)")
+    gc_cmd = commands.add_parser('gc', help="Remove dangling refs and unreferenced blobs")
+    gc_cmd.add_argument('--dry-run', action='store_true')
+    commands.add_parser('stats')
+    args = parser.parse_args()
+
+    store = EvidenceStore(args.root)
+    if args.command == 'ingest':
+        for folder in args.paths:
+            print(json.dumps({'path': folder, **store.ingest_tree(folder, args.case, args.method, args.link)}))
+    elif args.command == 'gc':
+        print(json.dumps(store.gc(args.dry_run)))
+    else:
+        print(json.dumps(store.stats()))
+    store.close()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+File Records - Compact storage for forensic scan catalogs.
+Keeps one column per field (interned directory prefixes, typed arrays and a
+permission bitfield) instead of one dict per file, while still handing out
+dict-like records to existing callers.
+"""
+
+from array import array
+from collections.abc import Mapping, MutableMapping
+from typing import Dict, Iterator, List, Optional
+
+
+# ls-style type characters; the index is stored in the top bits of the mode
+_FILE_TYPES = '-dlcbps'
+_TYPE_SHIFT = 12
+
+# (position in the 9-char permission string, bit, special bit, char when both set, char when only special set)
+_PERM_BITS = [
+    (0, 0o400, 0, '', ''), (1, 0o200, 0, '', ''), (2, 0o100, 0o4000, 's', 'S'),
+    (3, 0o040, 0, '', ''), (4, 0o020, 0, '', ''), (5, 0o010, 0o2000, 's', 'S'),
+    (6, 0o004, 0, '', ''), (7, 0o002, 0, '', ''), (8, 0o001, 0o1000, 't', 'T'),
+]
+
+# Mode strings repeat heavily on a device, so decoded strings are cached
+_mode_strings: Dict[int, str] = {}
+
+_NO_MTIME = -1
+_FIELDS = ('name', 'path', 'size', 'is_dir', 'is_link', 'permissions', 'mtime')
+
+
+def encode_permissions(permissions: str) -> Optional[int]:
+    """Pack an 'ls -l' mode string (e.g. 'drwxr-x--x') into a 16-bit field."""
+    if len(permissions) != 10 or permissions[0] not in _FILE_TYPES:
+        return None
+
+    mode = _FILE_TYPES.index(permissions[0]) << _TYPE_SHIFT
+    perms = permissions[1:]
+    for pos, bit, special, both, only_special in _PERM_BITS:
+        char = perms[pos]
+        if special and char == both:
+            mode |= bit | special
+        elif special and char == only_special:
+            mode |= special
+        elif char != '-':
+            mode |= bit
+
+    # Reject anything we would not reproduce exactly (ACL markers, odd chars)
+    if decode_permissions(mode) != permissions:
+        return None
+    return mode
+
+
+def decode_permissions(mode: int) -> str:
+    """Rebuild the 'ls -l' mode string from a packed permission field."""
+    cached = _mode_strings.get(mode)
+    if cached is not None:
+        return cached
+
+    chars = [_FILE_TYPES[mode >> _TYPE_SHIFT]]
+    for pos, bit, special, both, only_special in _PERM_BITS:
+        if special and mode & special:
+            chars.append(both if mode & bit else only_special)
+        elif mode & bit:
+            chars.append('rwx'[pos % 3])
+        else:
+            chars.append('-')
+
+    result = ''.join(chars)
+    _mode_strings[mode] = result
+    return result
+
+
+class FileRecord(MutableMapping):
+    """Dict-like view of one entry in a FileRecordStore."""
+
+    __slots__ = ('_store', '_index')
+
+    def __init__(self, store: 'FileRecordStore', index: int):
+        self._store = store
+        self._index = index
+
+    def __getitem__(self, key):
+        return self._store._get_field(self._index, key)
+
+    def __setitem__(self, key, value):
+        self._store._set_field(self._index, key, value)
+
+    def __delitem__(self, key):
+        self._store._del_field(self._index, key)
+
+    def __iter__(self):
+        return iter(self._store._keys(self._index))
+
+    def __len__(self):
+        return len(self._store._keys(self._index))
+
+    def __repr__(self):
+        return f"FileRecord({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict:
+        return {key: self[key] for key in self._store._keys(self._index)}
+
+
+class FileRecordStore:
+    """
+    Column-oriented container for scan results.
+
+    Directory prefixes are interned once, sizes/mtimes/modes live in typed
+    arrays and hashes are packed as raw 32-byte digests in one bytearray. Indexing and iteration
+    return FileRecord views that behave like the per-file dicts the scanner
+    used to build.
+    """
+
+    def __init__(self, records=None):
+        self._dirs: List[str] = []
+        self._dir_index: Dict[str, int] = {}
+        self._dir_ids = array('I')
+        self._names: List[str] = []
+        self._sizes = array('q')
+        self._mtimes = array('q')
+        self._modes = array('H')
+        self._digests = bytearray()            # 32 bytes per record
+        self._hashed = bytearray()             # 1 when the digest slot is set
+        self._extra: Dict[int, Dict] = {}     # Sparse: any other keys
+        if records:
+            self.extend(records)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __bool__(self) -> bool:
+        return bool(self._names)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [FileRecord(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('record index out of range')
+        return FileRecord(self, index)
+
+    def __iter__(self) -> Iterator[FileRecord]:
+        for index in range(len(self)):
+            yield FileRecord(self, index)
+
+    def append(self, file_info: Mapping):
+        """Add one scanner record (a dict or another FileRecord)."""
+        index = len(self._names)
+        directory, _, name = file_info['path'].rpartition('/')
+        dir_id = self._dir_index.get(directory)
+        if dir_id is None:
+            dir_id = len(self._dirs)
+            self._dirs.append(directory)
+            self._dir_index[directory] = dir_id
+
+        self._dir_ids.append(dir_id)
+        self._names.append(name)
+        self._sizes.append(file_info['size'])
+        mtime = file_info.get('mtime')
+        self._mtimes.append(_NO_MTIME if mtime is None else mtime)
+        self._digests.extend(bytes(32))
+        self._hashed.append(0)
+
+        extra = {}
+        mode = encode_permissions(file_info.get('permissions', ''))
+        if mode is None:
+            # Unusual mode string (e.g. ACL marker): keep the text, pack only the type
+            permissions = file_info.get('permissions', '')
+            file_type = permissions[:1]
+            mode = _FILE_TYPES.index(file_type) << _TYPE_SHIFT if file_type and file_type in _FILE_TYPES else 0
+            extra['permissions'] = permissions
+        self._modes.append(mode)
+
+        if f"{directory}/{name}" != file_info['path']:
+            extra['path'] = file_info['path']  # Relative or otherwise odd path
+        if file_info.get('name', name) != name:
+            extra['name'] = file_info['name']
+        for key, value in file_info.items():
+            if key not in _FIELDS and key != 'sha256':
+                extra[key] = value
+        if extra:
+            self._extra[index] = extra
+
+        sha256 = file_info.get('sha256')
+        if sha256 is not None:
+            self._set_field(index, 'sha256', sha256)
+
+    def extend(self, records):
+        for file_info in records:
+            self.append(file_info)
+
+    def to_list(self) -> List[Dict]:
+        """Materialise every record as a plain dict."""
+        return [record.to_dict() for record in self]
+
+    def iter_dicts(self) -> Iterator[Dict]:
+        for record in self:
+            yield record.to_dict()
+
+    # --- Field access used by FileRecord ---
+
+    def _keys(self, index: int) -> List[str]:
+        keys = list(_FIELDS)
+        if self._hashed[index]:
+            keys.append('sha256')
+        extra = self._extra.get(index)
+        if extra:
+            keys.extend(key for key in extra if key not in keys)
+        return keys
+
+    def _get_field(self, index: int, key: str):
+        extra = self._extra.get(index)
+        if extra and key in extra:
+            return extra[key]
+        if key == 'name':
+            return self._names[index]
+        if key == 'path':
+            return f"{self._dirs[self._dir_ids[index]]}/{self._names[index]}"
+        if key == 'size':
+            return self._sizes[index]
+        if key == 'mtime':
+            mtime = self._mtimes[index]
+            return None if mtime == _NO_MTIME else mtime
+        if key == 'permissions':
+            return decode_permissions(self._modes[index])
+        if key == 'is_dir':
+            return self._modes[index] >> _TYPE_SHIFT == 1
+        if key == 'is_link':
+            return self._modes[index] >> _TYPE_SHIFT == 2
+        if key == 'sha256' and self._hashed[index]:
+            return self._digests[index * 32:(index + 1) * 32].hex()
+        raise KeyError(key)
+
+    def _set_field(self, index: int, key: str, value):
+        if key == 'sha256' and isinstance(value, str) and len(value) == 64:
+            try:
+                self._digests[index * 32:(index + 1) * 32] = bytes.fromhex(value)
+                self._hashed[index] = 1
+                extra = self._extra.get(index)
+                if extra:
+                    extra.pop('sha256', None)
+                return
+            except ValueError:
+                pass
+        elif key == 'size':
+            self._sizes[index] = value
+            return
+        elif key == 'mtime':
+            self._mtimes[index] = _NO_MTIME if value is None else value
+            return
+        elif key in ('path', 'is_dir', 'is_link'):
+            raise KeyError(f"'{key}' is derived and cannot be changed")
+
+        if key == 'sha256':
+            # Error strings and other non-digest values are kept verbatim
+            self._hashed[index] = 0
+        self._extra.setdefault(index, {})[key] = value
+
+    def _del_field(self, index: int, key: str):
+        extra = self._extra.get(index)
+        if extra and key in extra:
+            del extra[key]
+        elif key == 'sha256' and self._hashed[index]:
+            self._hashed[index] = 0
+        else:
+            raise KeyError(key)
+
+
+def json_default(obj):
+    """json.dumps hook so scan results holding a FileRecordStore serialise as before."""
+    if isinstance(obj, FileRecordStore):
+        return obj.to_list()
+    if isinstance(obj, FileRecord):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -6,12 +6,136 @@ Recursively scans device storage, calculates hashes, and generates forensic cata
 
 import subprocess
 import json
-import hashlib
+import contextlib
+import queue
+import sys
+import itertools
 import os
 import re
-from typing import List, Dict, Optional
+import shlex
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Iterator, Optional, TextIO
 from datetime import datetime
 
+from adb_session import AdbSessionError, adb_devices, adb_serialno, get_session
+from hash_engine import hash_engine
+from file_records import FileRecordStore, json_default
+from known_hashes import KNOWN_GOOD, known_hashes
+from scan_catalog import MTIME_PRECISION, ScanCatalog
+
+
+class PrefixTrie:
+    """Character trie answering 'does this path start with any stored prefix?'."""
+    
+    def __init__(self, prefixes: List[str]):
+        self.root = {}
+        self.has_empty = False
+        for prefix in prefixes:
+            if not prefix:
+                self.has_empty = True
+                continue
+            node = self.root
+            for char in prefix:
+                node = node.setdefault(char, {})
+            node[None] = True  # Terminal marker
+    
+    def matches_prefix(self, path: str) -> bool:
+        if self.has_empty:
+            return True
+        node = self.root
+        for char in path:
+            node = node.get(char)
+            if node is None:
+                return False
+            if None in node:
+                return True
+        return False
+
+
+class ScanFilter:
+    """
+    Compiled scan criteria: file-type categories, size range and mtime window.
+    
+    The same object answers the host-side check for every record and renders
+    the equivalent device-side find predicates, so listings can be narrowed
+    before they cross the USB link.
+    """
+    
+    def __init__(
+        self,
+        file_types: List[str],
+        extension_categories: Dict[str, frozenset],
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        modified_after: Optional[float] = None,
+        modified_before: Optional[float] = None
+    ):
+        self.file_types = file_types
+        self.min_size = min_size
+        self.max_size = max_size
+        self.modified_after = modified_after
+        self.modified_before = modified_before
+        self.device_now = None  # Device clock, set before mtime predicates are rendered
+        
+        # None means every extension is accepted
+        wanted = set(file_types)
+        if not file_types or 'all' in wanted:
+            self.extensions = None
+        else:
+            self.extensions = frozenset(
+                ext for ext, categories in extension_categories.items() if categories & wanted
+            )
+    
+    def matches_name(self, filename: str) -> bool:
+        if self.extensions is None:
+            return True
+        _, dot, ext = filename.rpartition('.')
+        return bool(dot) and '.' + ext.lower() in self.extensions
+    
+    def matches(self, file_info: Dict) -> bool:
+        if not self.matches_name(file_info['name']):
+            return False
+        size = file_info['size']
+        if self.min_size is not None and size < self.min_size:
+            return False
+        if self.max_size is not None and size > self.max_size:
+            return False
+        # Unknown mtimes are kept: a forensic listing errs on inclusion
+        mtime = file_info.get('mtime')
+        if mtime is not None:
+            if self.modified_after is not None and mtime < self.modified_after:
+                return False
+            if self.modified_before is not None and mtime > self.modified_before:
+                return False
+        return True
+    
+    def find_predicates(self) -> List[str]:
+        """
+        Render the criteria as find(1) predicates. They may be looser than the
+        exact host-side check (mtime is rounded to minutes) but never stricter.
+        """
+        predicates = []
+        if self.extensions:
+            names = ' -o '.join(
+                f"-iname {shlex.quote('*' + ext)}" for ext in sorted(self.extensions)
+            )
+            predicates += ['\\(', names, '\\)']
+        if self.min_size:
+            predicates += ['-size', f"+{self.min_size - 1}c"]
+        if self.max_size is not None:
+            predicates += ['-size', f"-{self.max_size + 1}c"]
+        if self.device_now is not None:
+            if self.modified_after is not None:
+                minutes = int((self.device_now - self.modified_after) // 60) + 2
+                predicates += ['-mmin', f"-{max(minutes, 1)}"]
+            if self.modified_before is not None:
+                minutes = int((self.device_now - self.modified_before) // 60) - 2
+                if minutes >= 0:
+                    predicates += ['-mmin', f"+{minutes}"]
+        return predicates
+
 
 class ForensicScanner:
     """Advanced forensic file scanner for Android devices via ADB."""
@@ -28,22 +152,42 @@ class ForensicScanner:
         'all': []  # Empty list means all files
     }
     
+    # Directories skipped unless the caller passes its own exclude list
+    DEFAULT_EXCLUDES = ['/proc', '/sys', '/dev', '/acct', '/config']
+    
+    # stat format for the single-pass engine: mode string, size, mtime (epoch)
+    # and path. The path goes last so names containing spaces survive the split.
+    STAT_FORMAT = '%A %s %Y %n'
+    
+    # Process-wide cap on concurrent adb shell listings, shared by every
+    # scanner and worker so parallel scans can't overwhelm the USB link/adbd
+    MAX_CONCURRENT_ADB = 4
+    _adb_slots = threading.BoundedSemaphore(MAX_CONCURRENT_ADB)
+    
+    # Precompiled extension -> categories lookup (filled in below the class)
+    EXTENSION_CATEGORIES: Dict[str, frozenset] = {}
+    
     def __init__(self):
         self.device_connected = False
-        self.scan_results = []
+        self.scan_results = FileRecordStore()
         self.total_files = 0
         self.total_size = 0
+        self._find_supported = None  # Probed lazily, cached per scanner
+        self._stats_lock = threading.Lock()
+        self._exclude_tries = {}
+        self._local = threading.local()
+        self._channel_ids = itertools.count()
+    
+    @classmethod
+    def set_adb_concurrency(cls, limit: int):
+        """Change the global cap on concurrent adb listings (takes effect for new scans)."""
+        cls.MAX_CONCURRENT_ADB = max(1, int(limit))
+        cls._adb_slots = threading.BoundedSemaphore(cls.MAX_CONCURRENT_ADB)
         
     def check_connection(self) -> bool:
         """Check if ADB device is connected."""
         try:
-            result = subprocess.run(
-                ["adb", "devices"], 
-                capture_output=True, 
-                text=True, 
-                timeout=2
-            )
-            lines = result.stdout.strip().split('\n')
+            lines = adb_devices(timeout=2).strip().split('\n')
             for line in lines[1:]:
                 if line.strip() and "device" in line:
                     self.device_connected = True
@@ -54,6 +198,25 @@ class ForensicScanner:
             self.device_connected = False
             return False
     
+    def _session(self):
+        """
+        Persistent adb shell for the calling thread.
+        
+        A shell runs one command at a time, so each worker thread is pinned to
+        its own session channel (one per adb slot).
+        """
+        channel = getattr(self._local, 'channel', None)
+        if channel is None:
+            channel = self._local.channel = next(self._channel_ids) % self.MAX_CONCURRENT_ADB
+        return get_session(channel=channel)
+    
+    def _get_device_serial(self) -> str:
+        """Return the connected device's serial number (catalog key)."""
+        try:
+            return adb_serialno(timeout=5) or 'unknown'
+        except (FileNotFoundError, subprocess.TimeoutExpired):
+            return 'unknown'
+    
     def _get_file_extension(self, filename: str) -> str:
         """Extract file extension from filename."""
         if '.' in filename:
@@ -65,14 +228,35 @@ class ForensicScanner:
         if not file_types or 'all' in file_types:
             return True
         
-        ext = self._get_file_extension(filename)
-        for file_type in file_types:
-            if file_type in self.FILE_TYPES:
-                if not self.FILE_TYPES[file_type]:  # 'all' category
-                    return True
-                if ext in self.FILE_TYPES[file_type]:
-                    return True
-        return False
+        categories = self.EXTENSION_CATEGORIES.get(self._get_file_extension(filename))
+        return bool(categories) and not categories.isdisjoint(file_types)
+    
+    def _compile_filter(
+        self,
+        file_types: List[str],
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        modified_after: Optional[float] = None,
+        modified_before: Optional[float] = None
+    ) -> ScanFilter:
+        return ScanFilter(
+            file_types, self.EXTENSION_CATEGORIES,
+            min_size, max_size, modified_after, modified_before
+        )
+    
+    def _get_device_time(self) -> Optional[float]:
+        """Device clock (epoch seconds), used to turn mtime windows into -mmin."""
+        try:
+            value = self._session().run("date +%s", timeout=5).stdout.strip()
+            return float(value) if value.isdigit() else None
+        except (FileNotFoundError, subprocess.TimeoutExpired, AdbSessionError):
+            return None
+    
+    def _record_match(self, file_info: Dict):
+        """Count a matched file towards the scan totals (safe across workers)."""
+        with self._stats_lock:
+            self.total_files += 1
+            self.total_size += file_info['size']
     
     def _parse_ls_output(self, ls_output: str, base_path: str) -> List[Dict]:
         """Parse 'ls -la' output to extract file information."""
@@ -118,85 +302,331 @@ class ForensicScanner:
             
             file_path = f"{base_path.rstrip('/')}/{filename}"
             
+            # ls only gives minute resolution: "YYYY-MM-DD HH:MM"
+            try:
+                mtime = int(datetime.strptime(
+                    f"{parts[time_idx - 1]} {parts[time_idx]}", '%Y-%m-%d %H:%M'
+                ).timestamp())
+            except ValueError:
+                mtime = None
+            
             files.append({
                 'name': filename,
                 'path': file_path,
                 'size': int(size),
                 'is_dir': is_dir,
                 'is_link': is_link,
-                'permissions': permissions
+                'permissions': permissions,
+                'mtime': mtime
             })
         
         return files
     
-    def _scan_directory_recursive(
-        self, 
-        path: str, 
-        file_types: List[str],
-        max_depth: int = 10,
-        current_depth: int = 0,
-        exclude_patterns: Optional[List[str]] = None
-    ) -> List[Dict]:
-        """Recursively scan directory on device."""
-        if current_depth >= max_depth:
-            return []
+    def _parse_stat_line(self, line: str) -> Optional[Dict]:
+        """Parse one '%A %s %Y %n' line from the device-side find/stat stream."""
+        parts = line.rstrip('\n').split(' ', 3)
+        if len(parts) < 4 or not parts[1].isdigit():
+            return None
         
+        permissions, size, mtime, file_path = parts
+        return {
+            'name': file_path.rsplit('/', 1)[-1],
+            'path': file_path,
+            'size': int(size),
+            'is_dir': permissions.startswith('d'),
+            'is_link': permissions.startswith('l'),
+            'permissions': permissions,
+            'mtime': int(mtime) if mtime.isdigit() else None
+        }
+    
+    def _is_excluded(self, path: str, exclude_patterns: Optional[List[str]]) -> bool:
+        """Check whether a directory path falls under an excluded prefix."""
         if exclude_patterns is None:
-            exclude_patterns = ['/proc', '/sys', '/dev', '/acct', '/config']
+            exclude_patterns = self.DEFAULT_EXCLUDES
+        key = tuple(exclude_patterns)
+        trie = self._exclude_tries.get(key)
+        if trie is None:
+            trie = self._exclude_tries[key] = PrefixTrie(exclude_patterns)
+        return trie.matches_prefix(path)
+    
+    def _build_find_command(
+        self,
+        path: str,
+        max_depth: int,
+        exclude_patterns: Optional[List[str]] = None,
+        scan_filter: Optional[ScanFilter] = None
+    ) -> str:
+        """
+        Build the device-side find command for the single-pass engine.
         
-        # Check if path should be excluded
-        for pattern in exclude_patterns:
-            if path.startswith(pattern):
-                return []
+        Excluded directories are pruned on the device, and the scan filter's
+        name/size/mtime predicates are applied there too, so only candidate
+        files are handed to stat in batches via '-exec ... {} +'.
+        """
+        if exclude_patterns is None:
+            exclude_patterns = self.DEFAULT_EXCLUDES
         
-        results = []
+        # -H follows the start point if it is a symlink (/sdcard usually is)
+        cmd = ['find', '-H', shlex.quote(path), '-mindepth', '1', '-maxdepth', str(max_depth)]
+        if exclude_patterns:
+            prune = ' -o '.join(f"-path {shlex.quote(p + '*')}" for p in exclude_patterns)
+            cmd += ['-type', 'd', '\\(', prune, '\\)', '-prune', '-o']
+        cmd += ['!', '-type', 'd']
+        if scan_filter is not None:
+            cmd += scan_filter.find_predicates()
+        cmd += ['-exec', 'stat', '-c', shlex.quote(self.STAT_FORMAT), '{}', '+']
+        return ' '.join(cmd)
+    
+    def _supports_find(self) -> bool:
+        """Probe once whether the device shell has find and stat -c."""
+        if self._find_supported is None:
+            probe = f"find -H / -maxdepth 0 -exec stat -c {shlex.quote(self.STAT_FORMAT)} {{}} +"
+            try:
+                result = self._session().run(probe, timeout=10)
+                self._find_supported = (
+                    result.returncode == 0
+                    and self._parse_stat_line(result.stdout.strip()) is not None
+                )
+            except (FileNotFoundError, subprocess.TimeoutExpired, AdbSessionError):
+                self._find_supported = False
+        return self._find_supported
+    
+    def _iter_find_entries(
+        self,
+        path: str,
+        max_depth: int,
+        exclude_patterns: Optional[List[str]] = None,
+        scan_filter: Optional[ScanFilter] = None
+    ) -> Iterator[Dict]:
+        """
+        Stream file records from a single device-side find/stat invocation.
         
-        try:
-            # Get directory listing with details
-            result = subprocess.run(
-                ["adb", "shell", "ls", "-la", path],
-                capture_output=True,
+        Lines are parsed as they arrive, so latency scales with the size of the
+        listing rather than with the number of directories.
+        """
+        with self._adb_slots:
+            process = subprocess.Popen(
+                ["adb", "shell", self._build_find_command(
+                    path, max_depth, exclude_patterns, scan_filter
+                )],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,  # Permission denied noise from find
                 text=True,
-                timeout=10,
                 errors='replace'
             )
-            
-            if result.returncode != 0:
-                return []
-            
-            files = self._parse_ls_output(result.stdout, path)
-            
-            for file_info in files:
-                # Skip if it's a directory
-                if file_info['is_dir']:
-                    # Recursively scan subdirectories
-                    subdir_results = self._scan_directory_recursive(
-                        file_info['path'],
-                        file_types,
-                        max_depth,
-                        current_depth + 1,
-                        exclude_patterns
-                    )
-                    results.extend(subdir_results)
-                else:
-                    # Check if file matches filter
-                    if self._matches_filter(file_info['name'], file_types):
-                        results.append(file_info)
-                        self.total_files += 1
-                        self.total_size += file_info['size']
+            try:
+                for line in process.stdout:
+                    file_info = self._parse_stat_line(line)
+                    if file_info is not None:
+                        yield file_info
+            finally:
+                process.stdout.close()
+                if process.poll() is None:
+                    process.kill()
+                process.wait()
+    
+    def _iter_directory_find(
+        self,
+        path: str,
+        scan_filter: ScanFilter,
+        max_depth: int = 10,
+        exclude_patterns: Optional[List[str]] = None
+    ) -> Iterator[Dict]:
+        """Scan a directory tree with one streamed device-side find."""
+        if max_depth <= 0 or self._is_excluded(path, exclude_patterns):
+            return
         
+        try:
+            for file_info in self._iter_find_entries(
+                path, max_depth, exclude_patterns, scan_filter
+            ):
+                if scan_filter.matches(file_info):
+                    self._record_match(file_info)
+                    yield file_info
+        except Exception as e:
+            print(f"Error scanning {path}: {e}")
+    
+    def _list_directory(self, path: str) -> List[Dict]:
+        """List one device directory with 'ls -la' (holds a global adb slot)."""
+        # Trailing slash: a symlinked directory (/sdcard on most devices) lists its
+        # contents rather than the link itself
+        directory = path.rstrip('/') + '/'
+        with self._adb_slots:
+            # Get directory listing with details over the thread's persistent shell
+            result = self._session().run(f"ls -la {shlex.quote(directory)}", timeout=10, retry=True)
+        
+        if result.returncode != 0:
+            return []
+        
+        return self._parse_ls_output(result.stdout, path)
+    
+    def _in_scan_scope(
+        self,
+        path: str,
+        stored: Dict,
+        start_path: str,
+        scan_filter: ScanFilter,
+        max_depth: int,
+        exclude_patterns: Optional[List[str]]
+    ) -> bool:
+        """Whether a scan with these parameters would have listed path."""
+        prefix = start_path.rstrip('/') + '/'
+        if not path.startswith(prefix):
+            return False
+        if path[len(prefix):].count('/') + 1 > max_depth:
+            return False
+        parent, _, name = path.rpartition('/')
+        if self._is_excluded(parent or '/', exclude_patterns):
+            return False
+        return scan_filter.matches({'name': name, 'size': stored['size'], 'mtime': stored['mtime']})
+    
+    def _scan_subtree(
+        self,
+        path: str,
+        scan_filter: ScanFilter,
+        max_depth: int,
+        exclude_patterns: Optional[List[str]],
+        engine: str
+    ) -> List[Dict]:
+        """Scan one directory tree to max_depth with the chosen engine."""
+        if engine == 'find':
+            return list(self._iter_directory_find(path, scan_filter, max_depth, exclude_patterns))
+        return self._scan_directory_recursive(path, scan_filter, max_depth, 0, exclude_patterns)
+    
+    def _scan_parallel(
+        self,
+        path: str,
+        scan_filter: ScanFilter,
+        max_depth: int,
+        exclude_patterns: Optional[List[str]],
+        engine: str,
+        workers: int
+    ) -> List[Dict]:
+        """
+        Spread the top-level subtrees of path (DCIM, Download, Android, ...)
+        across a pool of workers. Each adb call still takes a global slot, and
+        the merged catalog is sorted by path so repeated runs are identical.
+        """
+        if max_depth <= 0 or self._is_excluded(path, exclude_patterns):
+            return []
+        
+        try:
+            entries = self._list_directory(path)
         except (subprocess.TimeoutExpired, Exception) as e:
             print(f"Error scanning {path}: {e}")
+            return []
+        
+        results = []
+        subtrees = []
+        for file_info in entries:
+            if file_info['is_dir']:
+                subtrees.append(file_info['path'])
+            elif scan_filter.matches(file_info):
+                results.append(file_info)
+                self._record_match(file_info)
+        
+        print(f"Scanning {len(subtrees)} subtrees with {workers} workers "
+              f"(global adb limit {self.MAX_CONCURRENT_ADB})")
         
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            subtree_results = pool.map(
+                lambda subtree: self._scan_subtree(
+                    subtree, scan_filter, max_depth - 1, exclude_patterns, engine
+                ),
+                subtrees
+            )
+            for files in subtree_results:
+                results.extend(files)
+        
+        results.sort(key=lambda f: f['path'])
         return results
     
+    def _iter_directory_recursive(
+        self, 
+        path: str, 
+        scan_filter: ScanFilter,
+        max_depth: int = 10,
+        current_depth: int = 0,
+        exclude_patterns: Optional[List[str]] = None
+    ) -> Iterator[Dict]:
+        """Recursively scan directory on device, yielding matches as they are listed."""
+        if current_depth >= max_depth:
+            return
+        
+        # Check if path should be excluded
+        if self._is_excluded(path, exclude_patterns):
+            return
+        
+        try:
+            files = self._list_directory(path)
+        except (subprocess.TimeoutExpired, Exception) as e:
+            print(f"Error scanning {path}: {e}")
+            return
+        
+        for file_info in files:
+            # Skip if it's a directory
+            if file_info['is_dir']:
+                # Recursively scan subdirectories
+                yield from self._iter_directory_recursive(
+                    file_info['path'],
+                    scan_filter,
+                    max_depth,
+                    current_depth + 1,
+                    exclude_patterns
+                )
+            elif scan_filter.matches(file_info):
+                # Check if file matches filter
+                self._record_match(file_info)
+                yield file_info
+    
+    def _scan_directory_recursive(
+        self, 
+        path: str, 
+        scan_filter: ScanFilter,
+        max_depth: int = 10,
+        current_depth: int = 0,
+        exclude_patterns: Optional[List[str]] = None
+    ) -> List[Dict]:
+        """Recursively scan directory on device."""
+        return list(self._iter_directory_recursive(
+            path, scan_filter, max_depth, current_depth, exclude_patterns
+        ))
+    
+    def _iter_matches(
+        self,
+        start_path: str,
+        scan_filter: ScanFilter,
+        max_depth: int,
+        exclude_patterns: Optional[List[str]],
+        engine: str,
+        workers: int
+    ) -> Iterator[Dict]:
+        """Yield matching files from the selected engine."""
+        if workers > 1:
+            return iter(self._scan_parallel(
+                start_path, scan_filter, max_depth, exclude_patterns, engine, workers
+            ))
+        if engine == 'find':
+            return self._iter_directory_find(start_path, scan_filter, max_depth, exclude_patterns)
+        # Perform recursive scan
+        return self._iter_directory_recursive(start_path, scan_filter, max_depth, 0, exclude_patterns)
+    
     def scan_device(
         self,
         start_path: str = '/sdcard',
         file_types: Optional[List[str]] = None,
         max_depth: int = 10,
         calculate_hashes: bool = False,
-        exclude_patterns: Optional[List[str]] = None
+        exclude_patterns: Optional[List[str]] = None,
+        engine: str = 'auto',
+        workers: int = 1,
+        catalog_path: Optional[str] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        modified_after: Optional[float] = None,
+        modified_before: Optional[float] = None,
+        drop_known: bool = False,
+        catalog_diff_paths: bool = False
     ) -> Dict:
         """
         Perform comprehensive forensic scan of device storage.
@@ -207,15 +637,181 @@ class ForensicScanner:
             max_depth: Maximum directory depth to scan
             calculate_hashes: Whether to pull files and calculate SHA-256 hashes
             exclude_patterns: Directory patterns to exclude from scan
+            engine: 'find' for a single streamed device-side find, 'recursive'
+                for one 'ls -la' per directory, or 'auto' to use find when the
+                device shell supports it and fall back to recursive otherwise
+            workers: Number of parallel workers; above 1, the top-level
+                subtrees of start_path are scanned concurrently and the
+                results are sorted by path
+            catalog_path: SQLite scan catalog for incremental rescans. Files
+                whose size and mtime match the stored entry reuse its hash, and
+                a diff against the previous scan (counts and a sample of
+                paths) is added to the result
+            min_size / max_size: Inclusive size range in bytes
+            modified_after / modified_before: Inclusive mtime window (epoch
+                seconds). With the find engine, type, size and mtime filters
+                are also applied on the device so non-matching files never
+                cross the USB link
+            drop_known: With calculate_hashes, leave files found in a loaded
+                known-good hash set out of the results. Matches against
+                known-good/known-bad sets are always tagged as record['known']
+            catalog_diff_paths: Put the complete added/removed/modified/unverifiable path
+                lists in the catalog diff instead of a sample
             
         Returns:
-            Dictionary containing scan results and metadata
+            Dictionary containing scan results and metadata. 'files' is a
+            FileRecordStore: a list-like container of dict-like records
+            (serialise with json.dumps(..., default=json_default))
+        """
+        result = None
+        for kind, payload in self._scan_events(
+            start_path, file_types, max_depth, calculate_hashes, exclude_patterns,
+            engine, workers, catalog_path, collect=True,
+            min_size=min_size, max_size=max_size,
+            modified_after=modified_after, modified_before=modified_before,
+            drop_known=drop_known, catalog_diff_paths=catalog_diff_paths
+        ):
+            if kind == 'error':
+                return {
+                    'success': False,
+                    'error': payload
+                }
+            if kind == 'summary':
+                result = payload
+        return result
+    
+    def iter_scan(
+        self,
+        start_path: str = '/sdcard',
+        file_types: Optional[List[str]] = None,
+        max_depth: int = 10,
+        calculate_hashes: bool = False,
+        exclude_patterns: Optional[List[str]] = None,
+        engine: str = 'auto',
+        workers: int = 1,
+        catalog_path: Optional[str] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        modified_after: Optional[float] = None,
+        modified_before: Optional[float] = None,
+        drop_known: bool = False,
+        catalog_diff_paths: bool = False,
+        progress_interval: float = 2.0,
+        heartbeat_interval: float = 5.0
+    ) -> Iterator[Dict]:
+        """
+        Stream a scan as JSON-ready events instead of one final result.
+        
+        Takes the same scan arguments as scan_device() and yields:
+            {'event': 'start', ...}      scan parameters, once
+            {'event': 'file', ...}       one per file record, as soon as it is final
+            {'event': 'progress', ...}   every progress_interval seconds
+            {'event': 'heartbeat', ...}  when nothing else was sent for heartbeat_interval
+            {'event': 'summary', ...}    scan metadata without the file list
+        or a single {'event': 'error', 'error': ...}.
+        
+        Plain listings are forwarded as they stream in and are not retained on
+        the scanner; hashing and catalog diffs still need the full listing first.
+        """
+        events = queue.Queue(maxsize=1000)
+        stop = threading.Event()
+        done = object()
+        
+        def offer(item) -> bool:
+            # Bounded queue: a slow consumer throttles the scan instead of growing memory
+            while not stop.is_set():
+                try:
+                    events.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def produce():
+            generator = self._scan_events(
+                start_path, file_types, max_depth, calculate_hashes, exclude_patterns,
+                engine, workers, catalog_path, collect=False,
+                min_size=min_size, max_size=max_size,
+                modified_after=modified_after, modified_before=modified_before,
+                drop_known=drop_known, catalog_diff_paths=catalog_diff_paths,
+                progress_interval=progress_interval
+            )
+            try:
+                for item in generator:
+                    if not offer(item):
+                        break
+            except Exception as e:
+                offer(('error', str(e)))
+            finally:
+                generator.close()
+                offer(done)
+        
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        started = time.time()
+        
+        try:
+            while True:
+                try:
+                    item = events.get(timeout=heartbeat_interval)
+                except queue.Empty:
+                    yield {'event': 'heartbeat', 'elapsed_seconds': round(time.time() - started, 2)}
+                    continue
+                
+                if item is done:
+                    break
+                kind, payload = item
+                if kind == 'error':
+                    yield {'event': 'error', 'error': payload}
+                else:
+                    yield {'event': kind, **payload}
+        finally:
+            stop.set()
+    
+    def stream_ndjson(self, out: TextIO, **scan_kwargs) -> None:
+        """
+        Write iter_scan() events to out as newline-delimited JSON.
+        
+        Console output from the scan goes to stderr meanwhile, so out can be
+        sys.stdout without corrupting the stream.
+        """
+        with contextlib.redirect_stdout(sys.stderr):
+            for count, event in enumerate(self.iter_scan(**scan_kwargs)):
+                out.write(json.dumps(event) + '\n')
+                # Flush control events immediately and file records in batches
+                if event['event'] != 'file' or count % 200 == 0:
+                    out.flush()
+        out.flush()
+    
+    def _scan_events(
+        self,
+        start_path: str,
+        file_types: Optional[List[str]],
+        max_depth: int,
+        calculate_hashes: bool,
+        exclude_patterns: Optional[List[str]],
+        engine: str,
+        workers: int,
+        catalog_path: Optional[str],
+        collect: bool,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        modified_after: Optional[float] = None,
+        modified_before: Optional[float] = None,
+        drop_known: bool = False,
+        catalog_diff_paths: bool = False,
+        progress_interval: float = 2.0
+    ) -> Iterator[tuple]:
+        """
+        Scan pipeline shared by scan_device() and iter_scan().
+        
+        Yields ('start', info), ('file', record), ('progress', stats) and finally
+        ('summary', metadata), or a single ('error', message). Only with
+        collect=True does the summary carry the 'files' list.
         """
         if not self.check_connection():
-            return {
-                'success': False,
-                'error': 'No device connected'
-            }
+            yield ('error', 'No device connected')
+            return
         
         if file_types is None:
             file_types = ['all']
@@ -224,35 +820,118 @@ class ForensicScanner:
         print(f"File types: {', '.join(file_types)}")
         print(f"Max depth: {max_depth}")
         
-        self.scan_results = []
+        self.scan_results = FileRecordStore()
         self.total_files = 0
         self.total_size = 0
         
         start_time = datetime.now()
         
-        # Perform recursive scan
-        files = self._scan_directory_recursive(
-            start_path,
-            file_types,
-            max_depth,
-            0,
-            exclude_patterns
+        if engine == 'auto':
+            engine = 'find' if self._supports_find() else 'recursive'
+        print(f"Scan engine: {engine}")
+        
+        scan_filter = self._compile_filter(
+            file_types, min_size, max_size, modified_after, modified_before
         )
+        if engine == 'find' and (modified_after is not None or modified_before is not None):
+            scan_filter.device_now = self._get_device_time()
+        
+        yield ('start', {
+            'scan_path': start_path,
+            'file_types': file_types,
+            'max_depth': max_depth,
+            'scan_engine': engine,
+            'workers': workers,
+            'timestamp': start_time.isoformat()
+        })
+        
+        # Hashing and catalog diffs need the complete listing before records are final
+        buffered = calculate_hashes or bool(catalog_path)
+        files = FileRecordStore()
+        found = 0
+        last_progress = time.time()
+        
+        for file_info in self._iter_matches(
+            start_path, scan_filter, max_depth, exclude_patterns, engine, workers
+        ):
+            found += 1
+            if buffered or collect:
+                files.append(file_info)
+            if not buffered:
+                yield ('file', file_info)
+            if time.time() - last_progress >= progress_interval:
+                last_progress = time.time()
+                yield ('progress', {
+                    'phase': 'listing',
+                    'files_found': found,
+                    'bytes_found': self.total_size,
+                    'elapsed_seconds': round((datetime.now() - start_time).total_seconds(), 2)
+                })
         
-        # Optionally calculate hashes (WARNING: This pulls files, can be slow!)
+        # Compare against the previous acquisition of this device
+        catalog = None
+        catalog_diff = None
+        if catalog_path:
+            catalog = ScanCatalog(catalog_path)
+            serial = self._get_device_serial()
+            previous = catalog.load(serial)
+            catalog_changes = catalog.diff(
+                previous,
+                files,
+                engine,
+                lambda path: self._in_scan_scope(
+                    path, previous[path], start_path, scan_filter, max_depth, exclude_patterns
+                )
+            )
+            catalog_diff = catalog_changes if catalog_diff_paths else ScanCatalog.summarize(catalog_changes)
+            print(f"Catalog diff: {catalog_diff['added']} added, "
+                  f"{catalog_diff['removed']} removed, {catalog_diff['modified']} modified, "
+                  f"{catalog_diff['unverifiable']} unverifiable")
+        
+        # Optionally calculate hashes (batched on device, pulls only on failure)
+        hash_stats = None
+        known_counts = None
         if calculate_hashes:
-            print(f"Calculating hashes for {len(files)} files...")
-            for i, file_info in enumerate(files):
-                if i % 10 == 0:
-                    print(f"Progress: {i}/{len(files)}")
-                
-                # For hash calculation, we'd need to pull the file
-                # This is optional and can be very slow for many files
-                try:
-                    hash_val = self._calculate_remote_hash(file_info['path'])
-                    file_info['sha256'] = hash_val
-                except Exception as e:
-                    file_info['sha256'] = f"Error: {str(e)}"
+            # Known-file lookups run inline as each hash lands
+            check_known = bool(known_hashes)
+            known_counts = {'known_good': 0, 'known_bad': 0, 'dropped': 0}
+            
+            def keep(file_info) -> bool:
+                category = known_hashes.tag(file_info) if check_known else None
+                if category:
+                    known_counts[category] += 1
+                    if drop_known and category == KNOWN_GOOD:
+                        known_counts['dropped'] += 1
+                        return False
+                return True
+            
+            to_hash = files
+            reused = 0
+            if catalog:
+                reused = catalog.reuse_hashes(previous, files, engine)
+                to_hash = [f for f in files if 'sha256' not in f]
+                if reused:
+                    for file_info in files:
+                        if 'sha256' in file_info and keep(file_info):
+                            yield ('file', file_info)
+            print(f"Calculating hashes for {len(to_hash)} files ({reused} reused from catalog)...")
+            for kind, payload in self._iter_remote_hashes(to_hash, progress_interval):
+                if kind == 'hash_stats':
+                    hash_stats = payload
+                elif kind != 'file' or keep(payload):
+                    yield (kind, payload)
+            hash_stats['hashes_reused'] = reused
+        elif buffered:
+            for file_info in files:
+                yield ('file', file_info)
+        
+        if catalog:
+            catalog.update(serial, previous, files, catalog_changes['removed_paths'], engine)
+            catalog.close()
+        
+        if known_counts and known_counts['dropped']:
+            files = FileRecordStore(f for f in files if f.get('known') != KNOWN_GOOD)
+            print(f"Dropped {known_counts['dropped']} known-good files")
         
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds()
@@ -261,77 +940,246 @@ class ForensicScanner:
             'success': True,
             'scan_path': start_path,
             'file_types': file_types,
-            'total_files_found': len(files),
+            'total_files_found': found,
             'total_size_bytes': self.total_size,
             'total_size_mb': round(self.total_size / (1024 * 1024), 2),
             'scan_duration_seconds': round(duration, 2),
+            'scan_engine': engine,
+            'mtime_precision': MTIME_PRECISION.get(engine),
+            'workers': workers,
             'timestamp': start_time.isoformat(),
             'hashes_calculated': calculate_hashes,
-            'files': files
+            'hash_stats': hash_stats,
+            'known_files': known_counts,
+            'catalog_diff': catalog_diff
         }
         
-        self.scan_results = files
+        if collect:
+            scan_metadata['files'] = files
+            self.scan_results = files
+        
+        print(f"Scan complete! Found {found} files ({scan_metadata['total_size_mb']} MB)")
         
-        print(f"Scan complete! Found {len(files)} files ({scan_metadata['total_size_mb']} MB)")
+        yield ('summary', scan_metadata)
+    
+    def _parse_hash_line(self, line: str) -> Optional[tuple]:
+        """Split a 'hash  path' line from sha256sum into (hash, path)."""
+        line = line.rstrip('\n')
+        # coreutils prefixes the line with a backslash when it escaped the name
+        escaped = line.startswith('\\')
+        if escaped:
+            line = line[1:]
         
-        return scan_metadata
+        hash_val, sep, remote_path = line.partition('  ')
+        if not sep or len(hash_val) != 64:
+            return None
+        if escaped:
+            remote_path = re.sub(r'\\(.)', lambda m: '\n' if m.group(1) == 'n' else m.group(1), remote_path)
+        return hash_val.lower(), remote_path
     
-    def _calculate_remote_hash(self, remote_path: str) -> str:
+    def _calculate_remote_hashes_batched(
+        self,
+        files: List[Dict],
+        progress_callback: Optional[Callable[[Dict], None]] = None,
+        progress_interval: float = 2.0
+    ) -> Dict:
         """
-        Calculate SHA-256 hash of a file on the device without pulling it.
-        Uses 'sha256sum' command on device if available.
+        Hash many device files through one long-running device shell.
+        
+        Sets 'sha256' on every record and returns throughput statistics.
         """
-        try:
-            # Try using sha256sum on device (faster, doesn't require pull)
-            result = subprocess.run(
-                ["adb", "shell", "sha256sum", f'"{remote_path}"'],
-                capture_output=True,
-                text=True,
-                timeout=30
+        for kind, payload in self._iter_remote_hashes(files, progress_interval):
+            if kind == 'progress' and progress_callback:
+                progress_callback(payload)
+            elif kind == 'hash_stats':
+                return payload
+    
+    def _iter_remote_hashes(
+        self,
+        files: List[Dict],
+        progress_interval: float = 2.0
+    ) -> Iterator[tuple]:
+        """
+        Paths are written NUL-separated to 'xargs -0 sha256sum' on the device and
+        the 'hash  path' lines streamed back are matched to records by path.
+        Only the files missing from that stream are pulled and hashed locally.
+        
+        Yields ('file', record) as each hash lands, ('progress', stats)
+        periodically and finally ('hash_stats', stats).
+        """
+        pending = {f['path']: f for f in files}
+        total = len(pending)
+        hashed_bytes = 0
+        done = 0
+        start = time.time()
+        last_report = start
+        
+        def stats(final: bool = False) -> Dict:
+            elapsed = max(time.time() - start, 1e-6)
+            return {
+                'files_total': total,
+                'files_done': done,
+                'bytes_done': hashed_bytes,
+                'duration_seconds': round(elapsed, 2),
+                'files_per_second': round(done / elapsed, 1),
+                'mb_per_second': round(hashed_bytes / (1024 * 1024) / elapsed, 2),
+                'final': final
+            }
+        
+        def report(final: bool = False) -> Dict:
+            current = stats(final)
+            print(
+                f"Progress: {done}/{total} files "
+                f"({current['files_per_second']} files/s, {current['mb_per_second']} MB/s)"
             )
-            
-            if result.returncode == 0 and result.stdout:
-                # Output format: "hash  filename"
-                hash_val = result.stdout.split()[0]
-                return hash_val
-            else:
-                # Fallback: pull file and hash locally (slower)
-                return self._pull_and_hash(remote_path)
+            return {'phase': 'hashing', **current}
         
-        except Exception as e:
-            raise Exception(f"Hash calculation failed: {e}")
+        def feed_paths(stdin):
+            try:
+                for remote_path in list(pending):
+                    stdin.write(remote_path.encode('utf-8', 'surrogateescape') + b'\0')
+                stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+        
+        if pending:
+            process = None
+            try:
+                process = subprocess.Popen(
+                    ["adb", "shell", "xargs -0 sha256sum 2>/dev/null"],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL
+                )
+                # Feed from a separate thread so a full stdout pipe can't deadlock us
+                writer = threading.Thread(target=feed_paths, args=(process.stdin,), daemon=True)
+                writer.start()
+                
+                for raw in process.stdout:
+                    parsed = self._parse_hash_line(raw.decode('utf-8', 'replace'))
+                    if parsed is None:
+                        continue
+                    hash_val, remote_path = parsed
+                    file_info = pending.pop(remote_path, None)
+                    if file_info is None:
+                        continue
+                    file_info['sha256'] = hash_val
+                    hashed_bytes += file_info['size']
+                    done += 1
+                    yield ('file', file_info)
+                    if time.time() - last_report >= progress_interval:
+                        last_report = time.time()
+                        yield ('progress', report())
+                
+                writer.join()
+                process.wait()
+            except (FileNotFoundError, OSError) as e:
+                print(f"Batched hashing unavailable: {e}")
+            finally:
+                if process is not None and process.poll() is None:
+                    process.kill()
+                    process.wait()
+        
+        hashed_on_device = done
+        
+        # Fallback: pull whatever the device could not hash
+        failed = 0
+        for remote_path, file_info in pending.items():
+            try:
+                file_info['sha256'] = self._pull_and_hash(remote_path, file_info.get('size'))
+                hashed_bytes += file_info['size']
+            except Exception as e:
+                # No digest at all, so the catalog never mistakes a failure for a hash
+                file_info['sha256'] = None
+                file_info['hash_error'] = str(e)
+                failed += 1
+            done += 1
+            yield ('file', file_info)
+            if time.time() - last_report >= progress_interval:
+                last_report = time.time()
+                yield ('progress', report())
+        
+        yield ('progress', report(final=True))
+        result = stats(final=True)
+        result.update({
+            'hashed_on_device': hashed_on_device,
+            'pulled': len(pending) - failed,
+            'failed': failed
+        })
+        yield ('hash_stats', result)
     
-    def _pull_and_hash(self, remote_path: str) -> str:
+    def _pull_and_hash(self, remote_path: str, expected_size: Optional[int] = None) -> str:
+        """
+        Stream the file over 'adb exec-out' straight into the hasher (no temp copy).
+        
+        exec-out does not pass cat's exit status back, so an unreadable or vanished
+        file would hash as empty input; the streamed byte count is checked against
+        expected_size instead. Without a size the file goes through 'adb pull',
+        which does report failures. A watchdog kills a transfer that stalls.
+        """
+        if expected_size is None:
+            return self._pull_to_temp_and_hash(remote_path)
+        
+        process = subprocess.Popen(
+            ["adb", "exec-out", f"cat {shlex.quote(remote_path)} 2>/dev/null"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        # A stalled transfer never reaches EOF; kill it after 60s plus 1s per MB
+        timeout = 60 + expected_size / (1024 * 1024)
+        timed_out = threading.Event()
+        
+        def expire():
+            timed_out.set()
+            process.kill()
+        
+        watchdog = threading.Timer(timeout, expire)
+        watchdog.start()
+        try:
+            streamed = hash_engine.hash_stream(process.stdout)
+        finally:
+            watchdog.cancel()
+            process.stdout.close()
+            process.wait()
+        
+        if timed_out.is_set():
+            raise Exception(f"Pull timed out after {timeout:.0f}s")
+        if process.returncode != 0:
+            raise Exception("Failed to pull file")
+        if streamed['bytes'] != expected_size:
+            raise Exception(f"Short read: {streamed['bytes']} of {expected_size} bytes")
+        
+        return streamed['digests']['sha256']
+    
+    def _pull_to_temp_and_hash(self, remote_path: str) -> str:
         """Pull file temporarily and calculate hash."""
         import tempfile
         
-        with tempfile.NamedTemporaryFile(delete=True) as tmp:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            local_path = os.path.join(tmp_dir, 'pulled')
             result = subprocess.run(
-                ["adb", "pull", remote_path, tmp.name],
+                ["adb", "pull", remote_path, local_path],
                 capture_output=True,
                 timeout=60
             )
             
-            if result.returncode != 0:
+            if result.returncode != 0 or not os.path.isfile(local_path):
                 raise Exception("Failed to pull file")
             
-            # Calculate hash
-            sha256_hash = hashlib.sha256()
-            with open(tmp.name, "rb") as f:
-                for byte_block in iter(lambda: f.read(4096), b""):
-                    sha256_hash.update(byte_block)
-            
-            return sha256_hash.hexdigest()
+            return hash_engine.hash_file(local_path, ('sha256',))['sha256']
     
     def export_to_json(self, output_file: str) -> bool:
-        """Export scan results to JSON file."""
+        """Export scan results to JSON file, one record at a time."""
         try:
             with open(output_file, 'w') as f:
-                json.dump({
-                    'total_files': self.total_files,
-                    'total_size_bytes': self.total_size,
-                    'files': self.scan_results
-                }, f, indent=2)
+                f.write('{\n')
+                f.write(f'  "total_files": {json.dumps(self.total_files)},\n')
+                f.write(f'  "total_size_bytes": {json.dumps(self.total_size)},\n')
+                f.write('  "files": [')
+                for i, file_info in enumerate(self.scan_results):
+                    f.write(',\n    ' if i else '\n    ')
+                    f.write(json.dumps(dict(file_info)))
+                f.write('\n  ]\n}\n')
             return True
         except Exception as e:
             print(f"Export error: {e}")
@@ -363,6 +1211,15 @@ class ForensicScanner:
             return False
 
 
+ForensicScanner.EXTENSION_CATEGORIES = {}
+for _category, _extensions in ForensicScanner.FILE_TYPES.items():
+    for _ext in _extensions:
+        ForensicScanner.EXTENSION_CATEGORIES.setdefault(_ext, set()).add(_category)
+ForensicScanner.EXTENSION_CATEGORIES = {
+    ext: frozenset(categories) for ext, categories in ForensicScanner.EXTENSION_CATEGORIES.items()
+}
+
+
 # Standalone test/CLI interface
 if __name__ == "__main__":
     import sys
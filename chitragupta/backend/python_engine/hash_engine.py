@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Hash Engine - Shared file hashing for the chitragupta engine.
+Computes several digests (SHA-256/SHA-1/MD5) in a single read pass using
+multi-MB buffers or mmap, and hashes many files concurrently: hashlib
+releases the GIL on large updates, so a thread pool keeps every core busy.
+"""
+
+import collections
+import hashlib
+import itertools
+import mmap
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+DEFAULT_ALGORITHMS = ('sha256',)
+SUPPORTED_ALGORITHMS = ('sha256', 'sha1', 'md5')
+
+
+class MultiDigest:
+    """Feeds the same bytes to several hashlib objects (e.g. while streaming a pull)."""
+
+    def __init__(self, algorithms: Sequence[str] = DEFAULT_ALGORITHMS):
+        for name in algorithms:
+            if name not in SUPPORTED_ALGORITHMS:
+                raise ValueError(f"Unsupported hash algorithm: {name}")
+        self._digests = [(name, hashlib.new(name)) for name in algorithms]
+        self.bytes_hashed = 0
+
+    def update(self, data):
+        for _, digest in self._digests:
+            digest.update(data)
+        self.bytes_hashed += len(data)
+
+    def hexdigests(self) -> Dict[str, str]:
+        return {name: digest.hexdigest() for name, digest in self._digests}
+
+
+class HashEngine:
+    """
+    Single-pass, multi-algorithm file hasher with a thread pool.
+
+    Files at least buffer_size long are mapped with mmap and hashed in
+    buffer_size slices (no copies); smaller files are read in one call.
+    """
+
+    def __init__(self, buffer_size: int = 8 * 1024 * 1024, workers: Optional[int] = None, use_mmap: bool = True):
+        self.buffer_size = buffer_size
+        self.workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        self.use_mmap = use_mmap
+        self.last_stats: Optional[Dict] = None
+
+    def hash_file(self, path: str, algorithms: Sequence[str] = DEFAULT_ALGORITHMS) -> Dict[str, str]:
+        """Return {algorithm: hexdigest} for one file (raises OSError on read errors)."""
+        digest = MultiDigest(algorithms)
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < self.buffer_size:
+                digest.update(f.read())
+            elif self.use_mmap:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    view = memoryview(mapped)
+                    try:
+                        for offset in range(0, len(view), self.buffer_size):
+                            digest.update(view[offset:offset + self.buffer_size])
+                    finally:
+                        view.release()
+            else:
+                buffer = bytearray(self.buffer_size)
+                view = memoryview(buffer)
+                while True:
+                    read = f.readinto(buffer)
+                    if not read:
+                        break
+                    digest.update(view[:read])
+        return digest.hexdigests()
+
+    def hash_stream(self, source, sink=None, algorithms: Sequence[str] = DEFAULT_ALGORITHMS) -> Dict:
+        """
+        Hash a binary stream (e.g. a pipe from 'adb exec-out') while optionally
+        teeing every chunk to sink, so the digest covers exactly the bytes
+        that were written.
+
+        A reader thread keeps draining source while the caller's thread
+        writes and hashes, so the producer never stalls on a full pipe.
+        Returns {'digests': {algorithm: hexdigest}, 'bytes': n}.
+        """
+        digest = MultiDigest(algorithms)
+        chunks: queue.Queue = queue.Queue(maxsize=8)
+        read_chunk = getattr(source, 'read1', source.read)
+        failure = []
+        stop = threading.Event()
+
+        def offer(item):
+            # Give up if the consumer failed, instead of blocking on a full queue
+            while not stop.is_set():
+                try:
+                    chunks.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def reader():
+            try:
+                while True:
+                    chunk = read_chunk(self.buffer_size)
+                    if not chunk or not offer(chunk):
+                        break
+            except (OSError, ValueError) as e:
+                failure.append(e)
+            finally:
+                offer(None)
+
+        thread = threading.Thread(target=reader, daemon=True)
+        thread.start()
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is None:
+                    break
+                if sink is not None:
+                    sink.write(chunk)
+                digest.update(chunk)
+        finally:
+            stop.set()
+        thread.join()
+        if failure:
+            raise failure[0]
+        return {'digests': digest.hexdigests(), 'bytes': digest.bytes_hashed}
+
+    def _hash_one(self, path: str, algorithms: Sequence[str]) -> Tuple[str, Dict[str, str], int]:
+        try:
+            size = os.path.getsize(path)
+            return path, self.hash_file(path, algorithms), size
+        except OSError as e:
+            return path, {'error': str(e)}, 0
+
+    def iter_hash_files(
+        self,
+        paths: Iterable[str],
+        algorithms: Sequence[str] = DEFAULT_ALGORITHMS
+    ) -> Iterator[Tuple[str, Dict[str, str], int]]:
+        """
+        Yield (path, digests, size) per file, in input order. Paths are read
+        lazily and at most 4 x workers files are in flight, so memory stays
+        flat however large the tree.
+        """
+        if self.workers <= 1:
+            for path in paths:
+                yield self._hash_one(path, algorithms)
+            return
+        paths = iter(paths)
+        window = self.workers * 4
+        in_flight = collections.deque()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            try:
+                for path in itertools.islice(paths, window):
+                    in_flight.append(pool.submit(self._hash_one, path, algorithms))
+                while in_flight:
+                    result = in_flight.popleft().result()
+                    for path in itertools.islice(paths, 1):
+                        in_flight.append(pool.submit(self._hash_one, path, algorithms))
+                    yield result
+            finally:
+                for future in in_flight:  # Consumer stopped early
+                    future.cancel()
+
+    def hash_files(
+        self,
+        paths: Iterable[str],
+        algorithms: Sequence[str] = DEFAULT_ALGORITHMS,
+        progress_callback: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
+        """
+        Hash many files concurrently.
+
+        Returns {'results': {path: {algorithm: hexdigest} or {'error': ...}},
+        'files', 'failed', 'bytes', 'seconds', 'mb_per_s'}; the same stats are
+        kept in last_stats. progress_callback receives the running stats after
+        every file.
+        """
+        start = time.perf_counter()
+        results: Dict[str, Dict[str, str]] = {}
+        total_bytes = 0
+        failed = 0
+
+        def stats() -> Dict:
+            elapsed = time.perf_counter() - start
+            return {
+                'files': len(results),
+                'failed': failed,
+                'bytes': total_bytes,
+                'seconds': round(elapsed, 3),
+                'mb_per_s': round(total_bytes / (1024 * 1024) / elapsed, 1) if elapsed > 0 else 0.0
+            }
+
+        for path, digests, size in self.iter_hash_files(paths, algorithms):
+            results[path] = digests
+            total_bytes += size
+            if 'error' in digests:
+                failed += 1
+            if progress_callback:
+                progress_callback(stats())
+
+        self.last_stats = stats()
+        return {'results': results, **self.last_stats}
+
+
+hash_engine = HashEngine()
@@ -1,33 +1,188 @@
 import hashlib
+import struct
+
+from hash_engine import hash_engine
+from known_hashes import known_hashes
+
+DIGEST_SIZE = 32
+
+# Domain separation (as in RFC 6962): a leaf can never be passed off as an inner node
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+def _digest_bytes(digest):
+    return bytes.fromhex(digest) if isinstance(digest, str) else bytes(digest)
+
+class MerkleTree:
+    """
+    Binary SHA-256 Merkle tree over raw 32-byte digests.
+
+    Every level is kept as one bytearray of concatenated digests, so appending
+    a leaf only rehashes the path to the root (O(log n)) and any leaf can be
+    proven with an inclusion proof. Leaf nodes are sha256(0x00 || digest),
+    parents sha256(0x01 || left || right); an odd node at the end of a level
+    is carried up unchanged.
+    """
+
+    MAGIC = b'CGMT'
+    VERSION = 2  # 1: no domain separation, odd nodes paired with themselves
+
+    def __init__(self, leaves=None):
+        self.levels = [bytearray()]
+        if leaves:
+            self.extend(leaves)
+
+    def __len__(self):
+        return len(self.levels[0]) // DIGEST_SIZE
+
+    def append(self, digest):
+        """Add one leaf (raw bytes or hex) and update the path to the root."""
+        self.extend([digest])
+
+    def extend(self, digests):
+        """Add many leaves, rehashing only the nodes whose subtrees changed."""
+        leaves = self.levels[0]
+        changed = len(leaves) // DIGEST_SIZE
+        digests = list(digests)
+        if all(isinstance(digest, str) for digest in digests):
+            raw = bytes.fromhex(''.join(digests))  # One decode for the whole batch
+        else:
+            raw = b''.join(_digest_bytes(digest) for digest in digests)
+        if len(raw) != len(digests) * DIGEST_SIZE:
+            raise ValueError("Merkle leaves must be 32-byte SHA-256 digests")
+        sha256 = hashlib.sha256
+        leaves += b''.join([sha256(LEAF_PREFIX + raw[i:i + DIGEST_SIZE]).digest()
+                            for i in range(0, len(raw), DIGEST_SIZE)])
+
+        pair = 2 * DIGEST_SIZE
+        level = 0
+        while len(self.levels[level]) > DIGEST_SIZE:
+            nodes = self.levels[level]
+            if level + 1 == len(self.levels):
+                self.levels.append(bytearray())
+            parents = self.levels[level + 1]
+            start = changed // 2
+            del parents[start * DIGEST_SIZE:]
+
+            # Rehash the changed suffix; slice a bytes copy so hashing runs on a flat buffer
+            tail = bytes(nodes[start * pair:])
+            full = len(tail) // pair * pair
+            parents += b''.join([sha256(NODE_PREFIX + tail[i:i + pair]).digest() for i in range(0, full, pair)])
+            if full < len(tail):
+                parents += tail[full:]  # Odd node carried up unchanged
+            changed = start
+            level += 1
+
+    def root(self):
+        """Root digest as raw bytes (None for an empty tree)."""
+        if not self.levels[0]:
+            return None
+        return bytes(self.levels[-1][:DIGEST_SIZE])
+
+    def root_hex(self):
+        root = self.root()
+        return root.hex() if root is not None else None
+
+    def leaf(self, index):
+        """Leaf node hash, sha256(0x00 || digest), at index."""
+        return bytes(self.levels[0][index * DIGEST_SIZE:(index + 1) * DIGEST_SIZE])
+
+    def proof(self, index):
+        """
+        Inclusion proof for leaf index: a list of (sibling hex, side) from the
+        leaf upwards, where side 'L'/'R' says where the sibling sits. Levels
+        where the node was carried up without a sibling have no entry.
+        """
+        if not 0 <= index < len(self):
+            raise IndexError('leaf index out of range')
+        path = []
+        for nodes in self.levels[:-1]:
+            count = len(nodes) // DIGEST_SIZE
+            sibling = index ^ 1
+            if sibling < count:
+                digest = nodes[sibling * DIGEST_SIZE:(sibling + 1) * DIGEST_SIZE].hex()
+                path.append((digest, 'L' if sibling < index else 'R'))
+            index //= 2
+        return path
+
+    @staticmethod
+    def verify_proof(leaf, proof, root):
+        """Check that the leaf digest (hex or bytes) is included under root using proof()."""
+        node = hashlib.sha256(LEAF_PREFIX + _digest_bytes(leaf)).digest()
+        for sibling, side in proof:
+            sibling = _digest_bytes(sibling)
+            pair = sibling + node if side == 'L' else node + sibling
+            node = hashlib.sha256(NODE_PREFIX + pair).digest()
+        return node == _digest_bytes(root)
+
+    def save(self, path):
+        """Persist all levels (header + concatenated level bytes)."""
+        with open(path, 'wb') as f:
+            f.write(self.MAGIC + struct.pack('<HQ', self.VERSION, len(self)))
+            for nodes in self.levels:
+                f.write(nodes)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            header = f.read(14)
+            if len(header) != 14 or header[:4] != cls.MAGIC:
+                raise ValueError(f"{path} is not a saved Merkle tree")
+            version, count = struct.unpack('<HQ', header[4:])
+            if version != cls.VERSION:
+                raise ValueError(f"Unsupported Merkle tree version {version}; rebuild it from the leaf digests")
+            tree = cls()
+            tree.levels = []
+            while True:
+                nodes = bytearray(f.read(count * DIGEST_SIZE))
+                if len(nodes) != count * DIGEST_SIZE:
+                    raise ValueError(f"{path} is truncated")
+                tree.levels.append(nodes)
+                if count <= 1:
+                    break
+                count = (count + 1) // 2
+        return tree
 
 class Hasher:
     def calculate_file_hash(self, filepath):
         """Calculates SHA-256 hash of a file."""
-        sha256_hash = hashlib.sha256()
         try:
-            with open(filepath, "rb") as f:
-                # Read key and update hash in chunks
-                for byte_block in iter(lambda: f.read(4096), b""):
-                    sha256_hash.update(byte_block)
-            return sha256_hash.hexdigest()
+            # Single pass with multi-MB buffers (mmap for large files)
+            return hash_engine.hash_file(filepath)['sha256']
         except FileNotFoundError:
             return None
 
+    def calculate_file_hashes(self, filepaths, algorithms=('sha256',), drop_known=False):
+        """
+        Hashes many files concurrently; returns per-file digests plus aggregate MB/s.
+        Files in a loaded known-good/known-bad hash set get a 'known' entry;
+        with drop_known, known-good files are left out of 'results'.
+        """
+        result = hash_engine.hash_files(filepaths, algorithms)
+        if known_hashes:
+            for path, digests in list(result['results'].items()):
+                category = known_hashes.lookup(digests)
+                if category == 'known_good' and drop_known:
+                    del result['results'][path]
+                elif category:
+                    digests['known'] = category
+        return result
+
+    def known_category(self, file_hash):
+        """'known_good', 'known_bad' or None for a hex SHA-256."""
+        return known_hashes.lookup(file_hash)
+
     def build_merkle_tree(self, hashes):
-        """Simple Merkle Tree implementation."""
+        """
+        Merkle root (hex) over hex SHA-256 digests, built as MerkleTree does, so
+        reports and signed package manifests publish the same root. None if empty.
+        """
         if not hashes:
             return None
-        
-        current_layer = hashes
-        while len(current_layer) > 1:
-            next_layer = []
-            for i in range(0, len(current_layer), 2):
-                left = current_layer[i]
-                right = current_layer[i+1] if i+1 < len(current_layer) else left
-                combined = left + right
-                next_layer.append(hashlib.sha256(combined.encode()).hexdigest())
-            current_layer = next_layer
-        
-        return current_layer[0]
+        return MerkleTree(hashes).root_hex()
+
+    def merkle_tree(self, hashes):
+        """Incremental MerkleTree over hex digests, with inclusion proofs."""
+        return MerkleTree(hashes)
 
 hasher = Hasher()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Known Hashes - NSRL-style known-good / known-bad hash set filtering.
+Hash lists are compiled once into a sorted array of raw digests with a
+65536-bucket prefix index (.cgkh). Loading maps the file with mmap, so even
+multi-million entry sets open in milliseconds, and a lookup is one bucket
+read plus a short binary search - cheap enough to run inline with hashing.
+"""
+
+import mmap
+import os
+import re
+import struct
+import threading
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+MAGIC = b'CGKH'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQ')  # magic, version, digest size, count
+PREFIX_BUCKETS = 65536
+INDEX = struct.Struct(f'<{PREFIX_BUCKETS + 1}I')
+DATA_OFFSET = HEADER.size + INDEX.size
+
+DIGEST_SIZES = {'md5': 16, 'sha1': 20, 'sha256': 32}
+ALGORITHM_BY_SIZE = {size: name for name, size in DIGEST_SIZES.items()}
+
+KNOWN_GOOD = 'known_good'
+KNOWN_BAD = 'known_bad'
+CATEGORIES = (KNOWN_GOOD, KNOWN_BAD)
+
+
+def _hex_pattern(digest_size: int):
+    return re.compile(rb'(?<![0-9A-Fa-f])[0-9A-Fa-f]{%d}(?![0-9A-Fa-f])' % (digest_size * 2))
+
+
+def compile_hash_set(sources: Iterable[str], output_path: str, algorithm: str = 'sha256') -> int:
+    """
+    Compile text hash lists into a .cgkh index; returns the number of unique digests.
+
+    Each line contributes its first hex token of the right length, so plain
+    'hash' lists, 'hash  path' sha256sum output and NSRL CSV rows (quoted,
+    comma separated) all work.
+    """
+    digest_size = DIGEST_SIZES[algorithm]
+    pattern = _hex_pattern(digest_size)
+    digests = set()
+    for source in ([sources] if isinstance(sources, str) else sources):
+        with open(source, 'rb') as f:
+            for line in f:
+                match = pattern.search(line)
+                if match:
+                    digests.add(bytes.fromhex(match.group().decode('ascii')))
+    ordered = sorted(digests)
+
+    # bucket b covers ordered[index[b]:index[b + 1]]
+    index = [0] * (PREFIX_BUCKETS + 1)
+    for digest in ordered:
+        index[((digest[0] << 8) | digest[1]) + 1] += 1
+    for bucket in range(PREFIX_BUCKETS):
+        index[bucket + 1] += index[bucket]
+
+    temp_path = f"{output_path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, digest_size, len(ordered)))
+        f.write(INDEX.pack(*index))
+        f.write(b''.join(ordered))
+    os.replace(temp_path, output_path)
+    return len(ordered)
+
+
+class KnownHashSet:
+    """One memory-mapped .cgkh hash set."""
+
+    def __init__(self, path: str, category: str = KNOWN_GOOD, name: Optional[str] = None):
+        if category not in CATEGORIES:
+            raise ValueError(f"Unknown hash set category: {category}")
+        self.path = path
+        self.category = category
+        self.name = name or os.path.basename(path)
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < DATA_OFFSET:
+                raise ValueError(f"{path} is not a compiled hash set")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.digest_size, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not a compiled hash set")
+        if size != DATA_OFFSET + self.count * self.digest_size:
+            self._map.close()
+            raise ValueError(f"{path} is truncated")
+        self.algorithm = ALGORITHM_BY_SIZE.get(self.digest_size)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, digest: Union[str, bytes]) -> bool:
+        if isinstance(digest, str):
+            try:
+                digest = bytes.fromhex(digest)
+            except ValueError:
+                return False
+        if len(digest) != self.digest_size:
+            return False
+        bucket = (digest[0] << 8) | digest[1]
+        lo, hi = struct.unpack_from('<II', self._map, HEADER.size + bucket * 4)
+        size = self.digest_size
+        data = self._map
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = DATA_OFFSET + mid * size
+            candidate = data[offset:offset + size]
+            if candidate < digest:
+                lo = mid + 1
+            elif candidate > digest:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def close(self):
+        self._map.close()
+
+
+class KnownHashes:
+    """
+    Registry of loaded known-good / known-bad sets.
+
+    Sets listed (os.pathsep separated) in CHITRAGUPTA_KNOWN_GOOD and
+    CHITRAGUPTA_KNOWN_BAD are loaded on first use. A known-bad match wins
+    over a known-good one.
+    """
+
+    def __init__(self):
+        self._sets: List[KnownHashSet] = []
+        self._lock = threading.Lock()
+        self._env_loaded = False
+
+    def _ensure_env(self):
+        if self._env_loaded:
+            return
+        with self._lock:
+            if self._env_loaded:
+                return
+            self._env_loaded = True
+            for variable, category in (('CHITRAGUPTA_KNOWN_GOOD', KNOWN_GOOD),
+                                       ('CHITRAGUPTA_KNOWN_BAD', KNOWN_BAD)):
+                for path in filter(None, os.environ.get(variable, '').split(os.pathsep)):
+                    try:
+                        self._sets.append(self._open(path, category))
+                    except (OSError, ValueError) as e:
+                        print(f"Could not load hash set {path}: {e}")
+
+    @staticmethod
+    def _open(path: str, category: str, algorithm: str = 'sha256') -> KnownHashSet:
+        """Open a .cgkh file, compiling (and caching) a text hash list first if needed."""
+        with open(path, 'rb') as f:
+            compiled = f.read(len(MAGIC)) == MAGIC
+        if not compiled:
+            cache_path = f"{path}.cgkh"
+            if not os.path.exists(cache_path) or os.path.getmtime(cache_path) < os.path.getmtime(path):
+                compile_hash_set(path, cache_path, algorithm)
+            path = cache_path
+        return KnownHashSet(path, category)
+
+    def load(self, path: str, category: str = KNOWN_GOOD, algorithm: str = 'sha256') -> Dict:
+        """Load a compiled set or a text hash list (compiled to <path>.cgkh on first load)."""
+        self._ensure_env()
+        hash_set = self._open(path, category, algorithm)
+        with self._lock:
+            self._sets.append(hash_set)
+        return {'name': hash_set.name, 'category': category,
+                'algorithm': hash_set.algorithm, 'count': len(hash_set)}
+
+    def clear(self):
+        with self._lock:
+            for hash_set in self._sets:
+                hash_set.close()
+            self._sets = []
+
+    def __bool__(self) -> bool:
+        self._ensure_env()
+        return bool(self._sets)
+
+    def stats(self) -> List[Dict]:
+        self._ensure_env()
+        return [{'name': s.name, 'category': s.category, 'algorithm': s.algorithm, 'count': len(s)}
+                for s in self._sets]
+
+    def lookup(self, digests: Union[str, Mapping[str, str]]) -> Optional[str]:
+        """
+        Category of a file, or None if it is in no set. digests is a hex
+        SHA-256 or an {algorithm: hexdigest} mapping (e.g. from hash_engine).
+        """
+        self._ensure_env()
+        if not self._sets or not digests:
+            return None  # No sets loaded, or a file that failed to hash
+        if isinstance(digests, str):
+            digests = {'sha256': digests}
+        found = None
+        for hash_set in self._sets:
+            digest = digests.get(hash_set.algorithm)
+            if digest and digest in hash_set:
+                if hash_set.category == KNOWN_BAD:
+                    return KNOWN_BAD
+                found = KNOWN_GOOD
+        return found
+
+    def tag(self, record, key: str = 'sha256') -> Optional[str]:
+        """Set record['known'] when the record's digest is in a set; returns the category."""
+        digest = record.get(key)
+        category = self.lookup(digest) if isinstance(digest, str) else None
+        if category:
+            record['known'] = category
+        return category
+
+    def filter_records(self, records: Iterable, drop_known_good: bool = False,
+                       key: str = 'sha256') -> Tuple[List, Dict[str, int]]:
+        """Tag every record; returns (kept records, counts per category plus 'dropped')."""
+        counts = {KNOWN_GOOD: 0, KNOWN_BAD: 0, 'dropped': 0}
+        kept = []
+        for record in records:
+            category = self.tag(record, key)
+            if category:
+                counts[category] += 1
+                if drop_known_good and category == KNOWN_GOOD:
+                    counts['dropped'] += 1
+                    continue
+            kept.append(record)
+        return kept, counts
+
+
+known_hashes = KnownHashes()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Log Classifier - Rule-based classification of log lines in a single pass.
+A rule set (keywords, logcat tags, regexes, minimum level, severity) is
+compiled once: all keywords become one case-insensitive regex built from
+prefix tries, one group per rule, so a line is scanned once however many
+keywords there are. Rules are tried in order and the first match wins.
+
+Standard library only, so the same module serves the live logcat monitor,
+archive queries and Sudarshana's package checks.
+"""
+
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+LEVELS = 'VDIWEFSA'  # logcat priority order
+
+# Level and tag of a '-v time' or '-v threadtime' line; the message is not needed
+_HEADER_RE = re.compile(
+    r'\d\d-\d\d \d\d:\d\d:\d\d\.\d+ +'
+    r'(?:([VDIWEFSA])/([^(]*?) *\(|\d+ +\d+ ([VDIWEFSA]) (.*?) *: )'
+)
+
+
+class Rule:
+    """
+    One classification rule. A line matches when its level is at least
+    min_level (if set) and any keyword (case-insensitive substring), tag
+    (exact) or pattern (regex, as written) matches. A rule with only
+    min_level matches every line at that level.
+    """
+
+    def __init__(self, name: str, keywords: Iterable[str] = (), tags: Iterable[str] = (),
+                 patterns: Iterable[str] = (), min_level: Optional[str] = None,
+                 severity: str = 'info'):
+        if min_level is not None and min_level not in LEVELS:
+            raise ValueError(f"Unknown log level: {min_level}")
+        self.name = name
+        self.keywords = [keyword.lower() for keyword in keywords if keyword]
+        self.tags = list(tags)
+        self.patterns = list(patterns)
+        self.min_level = min_level
+        self.min_levels = LEVELS[LEVELS.index(min_level):] if min_level else LEVELS
+        self.severity = severity
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Rule':
+        return cls(data['name'], data.get('keywords', ()), data.get('tags', ()),
+                   data.get('patterns', ()), data.get('min_level'), data.get('severity', 'info'))
+
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'keywords': self.keywords,
+            'tags': self.tags,
+            'patterns': self.patterns,
+            'min_level': self.min_level,
+            'severity': self.severity,
+        }
+
+    def __repr__(self):
+        return f"Rule({self.name!r})"
+
+
+# ADBBridge's original user/network/system split
+DEFAULT_RULES = [
+    Rule('user', keywords=['auth', 'login', 'password'], severity='medium'),
+    Rule('network', keywords=['socket', 'connect', 'http', 'ip'], severity='low'),
+]
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """
+    Regex alternation of words, factored into a prefix trie so the engine
+    never re-tries a shared prefix. At each position it matches the longest
+    word; shorter words that are prefixes of it are implied.
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = None  # End of word
+
+    def build(node) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        alternation = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f"(?:{alternation})?" if '' in node else alternation
+
+    return build(trie)
+
+
+def load_rules(path: str) -> List[Rule]:
+    """Rules from a JSON file: a list of {"name", "keywords", "tags", "patterns", "min_level", "severity"}."""
+    with open(path) as f:
+        return [Rule.from_dict(item) for item in json.load(f)]
+
+
+class LogClassifier:
+    """A compiled rule set. Lines matching no rule get the default category."""
+
+    def __init__(self, rules: Sequence[Union[Rule, Dict]] = DEFAULT_RULES, default: str = 'system',
+                 default_severity: str = 'info'):
+        self.rules = [rule if isinstance(rule, Rule) else Rule.from_dict(rule) for rule in rules]
+        self.default = default
+        self.default_severity = default_severity
+
+        # All keywords share one trie (which lets the regex engine skip ahead by first
+        # character); the matched keyword maps back to its rules. Since the longest
+        # keyword wins at a position, each keyword also carries the rules of its prefixes.
+        owners: Dict[str, List[int]] = {}
+        pattern_groups = []
+        self._tag_rules: Dict[str, List[int]] = {}
+        self._unconditional = []
+        for index, rule in enumerate(self.rules):
+            for keyword in rule.keywords:
+                owners.setdefault(keyword, []).append(index)
+            if rule.patterns:
+                # Named groups, since a pattern's own groups would shift the numbering
+                pattern_groups.append(f"(?P<r{index}>" + '|'.join(f"(?:{p})" for p in rule.patterns) + ')')
+            for tag in rule.tags:
+                self._tag_rules.setdefault(tag, []).append(index)
+            if not (rule.keywords or rule.patterns or rule.tags):
+                self._unconditional.append(index)
+        self._keyword_rules = {
+            keyword: sorted({index for end in range(1, len(keyword) + 1)
+                             for index in owners.get(keyword[:end], ())})
+            for keyword in owners
+        }
+        self._gates = [rule.min_levels if rule.min_level else None for rule in self.rules]
+
+        self._keywords = re.compile(_trie_pattern(owners)) if owners else None
+        self._patterns = re.compile('|'.join(pattern_groups)) if pattern_groups else None
+        self._needs_header = bool(self._tag_rules) or any(rule.min_level for rule in self.rules)
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> 'LogClassifier':
+        return cls(load_rules(path), **kwargs)
+
+    def classify(self, text: str, level: Optional[str] = None, tag: Optional[str] = None) -> Optional[Rule]:
+        """First rule matching text (with its logcat level and tag, when known), or None."""
+        gates = self._gates
+        best = len(self.rules)
+        for index in self._unconditional:
+            if gates[index] is None or (level is not None and level in gates[index]):
+                best = index
+                break
+        if tag is not None:
+            for index in self._tag_rules.get(tag, ()):
+                if index < best and (gates[index] is None or (level is not None and level in gates[index])):
+                    best = index
+                    break
+
+        # Every match, overlapping ones included, until nothing can outrank the best rule so far
+        if self._keywords is not None and best:
+            lowered = text.lower()
+            search = self._keywords.search
+            match = search(lowered)
+            while match is not None:
+                for index in self._keyword_rules[match.group()]:
+                    if index >= best:
+                        break
+                    if gates[index] is None or (level is not None and level in gates[index]):
+                        best = index
+                        break
+                if not best:
+                    break
+                match = search(lowered, match.start() + 1)
+        if self._patterns is not None and best:
+            search = self._patterns.search
+            match = search(text)
+            while match is not None:
+                index = int(match.lastgroup[1:])
+                if index < best and (gates[index] is None or (level is not None and level in gates[index])):
+                    best = index
+                    if not best:
+                        break
+                match = search(text, match.start() + 1)
+
+        return self.rules[best] if best < len(self.rules) else None
+
+    def classify_line(self, line: str) -> Optional[Rule]:
+        """Classify a raw logcat (or any text) line."""
+        level = tag = None
+        if self._needs_header:
+            header = _HEADER_RE.match(line)
+            if header is not None:
+                level, tag = (header.group(1), header.group(2)) if header.group(1) else (header.group(3), header.group(4))
+        return self.classify(line, level, tag)
+
+    def classify_record(self, record) -> Optional[Rule]:
+        """Classify a parsed LogRecord; keywords and patterns see 'tag: message'."""
+        text = f"{record.tag}: {record.message}" if record.tag else record.message
+        return self.classify(text, record.level, record.tag)
+
+    def category(self, line: str) -> str:
+        rule = self.classify_line(line)
+        return rule.name if rule is not None else self.default
+
+    def label(self, rule: Optional[Rule]) -> Dict[str, str]:
+        """{'type', 'severity'} for a classify*() result."""
+        if rule is None:
+            return {'type': self.default, 'severity': self.default_severity}
+        return {'type': rule.name, 'severity': rule.severity}
+
+
+def _default_classifier() -> LogClassifier:
+    path = os.environ.get('CHITRAGUPTA_LOG_RULES')
+    return LogClassifier.from_file(path) if path else LogClassifier()
+
+
+log_classifier = _default_classifier()
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Logcat Archive - Rolling, compressed on-disk segments of parsed logcat records.
+Records are written in blocks of about a thousand lines. Each segment has a
+sparse index with one entry per block (offset, record count, time span,
+levels present), so a time-range or level query only reads the blocks that
+can match. Within a block, level and tag are compressed as a separate small
+stream from the rest of the record, and tag/level filters run as one regex
+over that stream. The bulky body stream is deflated in independently
+decodable frames of FRAME_RECORDS lines, so a hit costs one small frame,
+not the whole block. Bodies keep the original logcat line, with the message
+as its tail.
+
+Layout under the archive root:
+    00000001.seg   blocks: BLOCK header + zlib(levels/tags)
+                           + u32 frame end offsets + raw deflate(bodies)
+    00000001.idx   one INDEX_ENTRY per block of the matching .seg
+"""
+
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from logcat_store import LogRecord
+
+DEFAULT_ARCHIVE_PATH = os.path.join(os.path.expanduser("~"), ".chitragupta", "logcat_archive")
+
+BLOCK_MAGIC = b'CGLB'
+BLOCK = struct.Struct('<4sIIIddH')  # magic, meta size, body size, records, min ts, max ts, level mask
+INDEX_ENTRY = struct.Struct('<QIIIddH')  # block offset, meta size, body size, records, min ts, max ts, level mask
+
+LEVELS = 'VDIWEFSA'  # logcat priority order (S = silent, A = assert)
+LEVEL_BITS = {level: 1 << i for i, level in enumerate(LEVELS)}
+UNPARSED_BIT = 1 << len(LEVELS)
+RAW_LINES_BIT = 1 << 15  # Level mask flag: bodies carry the original line (blocks written since)
+
+FRAME_RECORDS = 32  # Body lines per full-flush deflate frame
+
+
+def _levels_at_least(min_level: str) -> str:
+    return LEVELS[LEVELS.index(min_level):]
+
+
+def _matching_rows(pattern, text: str) -> Dict[int, str]:
+    """{row: first group} for the lines in text where pattern (which starts with a newline) matches."""
+    text = '\n' + text + '\n'
+    rows, row, position = {}, 0, 0
+    for match in pattern.finditer(text):
+        row += text.count('\n', position, match.start())
+        position = match.start()
+        rows[row] = match.group(1)
+    return rows
+
+
+class BlockInfo:
+    __slots__ = ('offset', 'meta_size', 'body_size', 'count', 'min_ts', 'max_ts', 'levels')
+
+    def __init__(self, offset, meta_size, body_size, count, min_ts, max_ts, levels):
+        self.offset = offset
+        self.meta_size = meta_size
+        self.body_size = body_size
+        self.count = count
+        self.min_ts = min_ts
+        self.max_ts = max_ts
+        self.levels = levels
+
+    @property
+    def end(self) -> int:
+        return self.offset + BLOCK.size + self.meta_size + self.body_size
+
+    def pack_index(self) -> bytes:
+        return INDEX_ENTRY.pack(self.offset, self.meta_size, self.body_size, self.count,
+                                self.min_ts, self.max_ts, self.levels)
+
+
+class Segment:
+    """One .seg data file and its in-memory copy of the .idx block index."""
+
+    def __init__(self, root: str, number: int):
+        self.number = number
+        self.data_path = os.path.join(root, f"{number:08d}.seg")
+        self.index_path = os.path.join(root, f"{number:08d}.idx")
+        self.blocks: List[BlockInfo] = []
+        self.size = 0
+
+    def load(self):
+        """Read the .idx file, rebuilding it from block headers if it lags the data (e.g. after a crash)."""
+        self.size = os.path.getsize(self.data_path) if os.path.exists(self.data_path) else 0
+        self.blocks = []
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'rb') as f:
+                raw = f.read()
+            usable = len(raw) - len(raw) % INDEX_ENTRY.size
+            self.blocks = [BlockInfo(*entry) for entry in INDEX_ENTRY.iter_unpack(raw[:usable])]
+        if (self.blocks[-1].end if self.blocks else 0) != self.size:
+            self._rebuild()
+
+    def _rebuild(self):
+        self.blocks = []
+        offset = 0
+        with open(self.data_path, 'ab+') as f:
+            f.seek(0)
+            while True:
+                header = f.read(BLOCK.size)
+                if len(header) < BLOCK.size:
+                    break
+                magic, meta_size, body_size, count, min_ts, max_ts, levels = BLOCK.unpack(header)
+                block = BlockInfo(offset, meta_size, body_size, count, min_ts, max_ts, levels)
+                if magic != BLOCK_MAGIC or not meta_size or not body_size or block.end > self.size:
+                    break
+                self.blocks.append(block)
+                offset = block.end
+                f.seek(offset)
+        if offset != self.size:  # Drop a torn trailing block
+            os.truncate(self.data_path, offset)
+            self.size = offset
+        with open(self.index_path, 'wb') as f:
+            f.write(b''.join(block.pack_index() for block in self.blocks))
+
+
+class _BlockBodies:
+    """Body lines of one block, inflating only the frames that are asked for."""
+
+    def __init__(self, payload: bytes, block: BlockInfo):
+        frame_count = -(-block.count // FRAME_RECORDS)
+        self._ends = struct.unpack_from(f'<{frame_count}I', payload, block.meta_size)
+        self._data = memoryview(payload)[block.meta_size + 4 * frame_count:]
+        self._lines: Optional[List[str]] = None
+        self._frames: Dict[int, List[str]] = {}
+
+    def text(self) -> str:
+        """Every body line, newline terminated (inflates the whole block)."""
+        text = zlib.decompressobj(-15).decompress(self._data).decode('utf-8')
+        self._lines = text.split('\n')
+        return text
+
+    def line(self, row: int) -> str:
+        if self._lines is not None:
+            return self._lines[row]
+        frame, offset = divmod(row, FRAME_RECORDS)
+        lines = self._frames.get(frame)
+        if lines is None:
+            start = self._ends[frame - 1] if frame else 0
+            raw = zlib.decompressobj(-15).decompress(self._data[start:self._ends[frame]])
+            lines = self._frames[frame] = raw.decode('utf-8').split('\n')
+        return lines[offset]
+
+
+def _encode_meta(record: LogRecord) -> str:
+    return f"{record.level or ''}\t{record.tag or ''}"
+
+
+def _encode_body(record: LogRecord) -> str:
+    # The line is last and may itself hold tabs; the message is its tail after `header` chars
+    timestamp = '' if record.timestamp is None else repr(record.timestamp)
+    pid = '' if record.pid is None else record.pid
+    tid = '' if record.tid is None else record.tid
+    line = record.to_line()
+    header = len(line) - len(record.message) if line.endswith(record.message) else -1
+    if header < 0:
+        line, header = record.message, 0  # Message not taken from the line: keep the message
+    line = line.replace('\n', ' ')
+    return f"{timestamp}\t{record.received!r}\t{pid}\t{tid}\t{header}\t{line}"
+
+
+def _decode(meta: str, body: str, raw_lines: bool = True) -> LogRecord:
+    level, tag = meta.split('\t', 1)
+    if raw_lines:
+        timestamp, received, pid, tid, header, line = body.split('\t', 5)
+        message = line[int(header):]
+    else:
+        timestamp, received, pid, tid, message = body.split('\t', 4)
+        line = None
+    return LogRecord(
+        float(timestamp) if timestamp else None,
+        int(pid) if pid else None,
+        int(tid) if tid else None,
+        level or None,
+        tag if level else None,
+        message,
+        float(received),
+        line,
+    )
+
+
+def _record_time(record: LogRecord) -> float:
+    return record.timestamp if record.timestamp is not None else record.received
+
+
+class LogcatArchive:
+    """
+    Append-only archive of LogRecords. append() buffers records and writes a
+    block once block_records are pending or flush_interval seconds have
+    passed; queries also see records not yet written. A new segment is
+    started when the current one passes segment_bytes, and with max_bytes
+    set the oldest segments are deleted to stay under it.
+    """
+
+    def __init__(self, root: Optional[str] = None, block_records: int = 1024,
+                 segment_bytes: int = 16 * 1024 * 1024, max_bytes: Optional[int] = None,
+                 flush_interval: float = 2.0, level: int = 6):
+        self.root = root or os.environ.get("CHITRAGUPTA_LOGCAT_ARCHIVE", DEFAULT_ARCHIVE_PATH)
+        self.block_records = block_records
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.level = level
+        self._lock = threading.Lock()
+        self._pending: List[LogRecord] = []
+        self._pending_since = time.monotonic()
+        self._data = None
+        self._index = None
+
+        os.makedirs(self.root, exist_ok=True)
+        numbers = sorted(int(name[:-4]) for name in os.listdir(self.root)
+                         if name.endswith('.seg') and name[:-4].isdigit())
+        self.segments: List[Segment] = []
+        for number in numbers:
+            segment = Segment(self.root, number)
+            segment.load()
+            self.segments.append(segment)
+        if not self.segments:
+            self.segments.append(Segment(self.root, 1))
+
+    # --- Writing ---
+
+    def append(self, records: Iterable[LogRecord]):
+        with self._lock:
+            self._pending.extend(records)
+            if time.monotonic() - self._pending_since >= self.flush_interval:
+                self._write_pending()
+            elif len(self._pending) >= self.block_records:
+                self._write_pending(full_blocks_only=True)
+
+    def flush(self):
+        with self._lock:
+            self._write_pending()
+
+    def close(self):
+        with self._lock:
+            self._write_pending()
+            self._close_files()
+
+    def _close_files(self):
+        for handle in (self._data, self._index):
+            if handle is not None:
+                handle.close()
+        self._data = self._index = None
+
+    def _write_pending(self, full_blocks_only: bool = False):
+        pending = self._pending
+        keep = len(pending) % self.block_records if full_blocks_only else 0
+        if keep:
+            self._pending = pending[len(pending) - keep:]
+            pending = pending[:len(pending) - keep]
+        else:
+            self._pending = []
+            self._pending_since = time.monotonic()
+        for start in range(0, len(pending), self.block_records):
+            self._write_block(pending[start:start + self.block_records])
+        if pending:
+            self._data.flush()
+            self._index.flush()
+
+    def _write_block(self, records: List[LogRecord]):
+        segment = self.segments[-1]
+        if segment.size >= self.segment_bytes:
+            self._close_files()
+            segment = Segment(self.root, segment.number + 1)
+            self.segments.append(segment)
+            self._enforce_retention()
+        if self._data is None:
+            self._data = open(segment.data_path, 'ab')
+            self._index = open(segment.index_path, 'ab')
+
+        times = [_record_time(record) for record in records]
+        levels = RAW_LINES_BIT
+        for record in records:
+            levels |= LEVEL_BITS.get(record.level, UNPARSED_BIT)
+        meta = zlib.compress('\n'.join(map(_encode_meta, records)).encode('utf-8'), self.level)
+        # One deflate stream, fully flushed after every frame so each can be inflated on its own
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15)
+        frames, frame_ends = [], []
+        for start in range(0, len(records), FRAME_RECORDS):
+            text = '\n'.join(map(_encode_body, records[start:start + FRAME_RECORDS])) + '\n'
+            frames.append(compressor.compress(text.encode('utf-8')))
+            frames.append(compressor.flush(zlib.Z_FULL_FLUSH))
+            frame_ends.append((frame_ends[-1] if frame_ends else 0) + len(frames[-2]) + len(frames[-1]))
+        body = struct.pack(f'<{len(frame_ends)}I', *frame_ends) + b''.join(frames)
+        block = BlockInfo(segment.size, len(meta), len(body), len(records), min(times), max(times), levels)
+
+        self._data.write(BLOCK.pack(BLOCK_MAGIC, block.meta_size, block.body_size, block.count,
+                                    block.min_ts, block.max_ts, levels))
+        self._data.write(meta)
+        self._data.write(body)
+        self._index.write(block.pack_index())
+        segment.blocks.append(block)
+        segment.size = block.end
+
+    def _enforce_retention(self):
+        if self.max_bytes is None:
+            return
+        total = sum(segment.size for segment in self.segments)
+        while len(self.segments) > 1 and total > self.max_bytes:
+            oldest = self.segments.pop(0)
+            total -= oldest.size
+            for path in (oldest.data_path, oldest.index_path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    # --- Reading ---
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None,
+              tags: Optional[Iterable[str]] = None, min_level: Optional[str] = None,
+              contains: Optional[str] = None, limit: Optional[int] = None) -> Iterator[LogRecord]:
+        """
+        Records with start <= time <= end (epoch seconds; the received time
+        for unparsed lines), in arrival order. tags matches exactly,
+        min_level keeps that priority and above (unparsed lines are dropped),
+        contains is a case-sensitive substring of the message.
+        """
+        lo = float('-inf') if start is None else start
+        hi = float('inf') if end is None else end
+        tags = [tags] if isinstance(tags, str) else list(tags or [])
+        levels = _levels_at_least(min_level) if min_level else None
+        level_mask = sum(LEVEL_BITS[level] for level in levels) if levels else None
+
+        # Patterns start with a literal newline so the regex engine jumps from line to line
+        meta_filter = body_filter = None
+        if tags or levels:
+            level_part = f"[{levels}]" if levels else "[^\t\n]*"
+            tag_part = '|'.join(map(re.escape, tags)) if tags else "[^\n]*"
+            meta_filter = re.compile(rf"\n({level_part}\t(?:{tag_part}))(?=\n)")
+        if contains:
+            body_filter = re.compile(rf"\n([^\n]*?){re.escape(contains)}")
+
+        with self._lock:
+            # Snapshot: blocks are only ever appended, so this list stays valid while reading
+            plan = [(segment, [block for block in segment.blocks
+                               if block.max_ts >= lo and block.min_ts <= hi
+                               and (level_mask is None or block.levels & level_mask)])
+                    for segment in self.segments if segment.blocks]
+            pending = list(self._pending)
+
+        remaining = float('inf') if limit is None else limit
+        for segment, blocks in plan:
+            if not blocks or remaining <= 0:
+                continue
+            try:
+                handle = open(segment.data_path, 'rb')
+            except FileNotFoundError:  # Removed by retention since the snapshot
+                continue
+            with handle:
+                for block in blocks:
+                    handle.seek(block.offset + BLOCK.size)
+                    payload = handle.read(block.meta_size + block.body_size)
+                    meta = zlib.decompress(payload[:block.meta_size]).decode('utf-8')
+                    if meta_filter:
+                        # The match already holds each hit's level and tag, so meta is never split
+                        metas = _matching_rows(meta_filter, meta)
+                        if not metas:
+                            continue  # The body stream is never inflated
+                        rows = list(metas)
+                    else:
+                        metas = meta.split('\n')
+                        rows = range(block.count)
+                    bodies = _BlockBodies(payload, block)
+                    if body_filter:
+                        text = bodies.text()
+                        if contains not in text:
+                            continue
+                        hits = _matching_rows(body_filter, text)
+                        rows = list(hits) if meta_filter is None else [row for row in rows if row in hits]
+                    for row in rows:
+                        record = _decode(metas[row], bodies.line(row), bool(block.levels & RAW_LINES_BIT))
+                        if not lo <= _record_time(record) <= hi:
+                            continue
+                        if contains and contains not in record.message:
+                            continue  # Matched in another field
+                        yield record
+                        remaining -= 1
+                        if remaining <= 0:
+                            return
+
+        for record in pending:
+            if remaining <= 0:
+                return
+            if not lo <= _record_time(record) <= hi:
+                continue
+            if tags and record.tag not in tags:
+                continue
+            if levels and (record.level is None or record.level not in levels):
+                continue
+            if contains and contains not in record.message:
+                continue
+            yield record
+            remaining -= 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            blocks = [block for segment in self.segments for block in segment.blocks]
+            return {
+                'root': self.root,
+                'segments': sum(1 for segment in self.segments if segment.blocks),
+                'blocks': len(blocks),
+                'records': sum(block.count for block in blocks) + len(self._pending),
+                'pending': len(self._pending),
+                'bytes': sum(segment.size for segment in self.segments),
+                'first_timestamp': min((block.min_ts for block in blocks), default=None),
+                'last_timestamp': max((block.max_ts for block in blocks), default=None),
+            }
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Logcat Store - Fixed-capacity ring buffer of parsed logcat records.
+Each '-v time' or '-v threadtime' line is parsed once with a single
+precompiled pattern into a compact LogRecord (epoch timestamp, pid, tid,
+level, tag, message, and the line as received). Appends are O(1) under a short lock, so a logcat storm
+never blocks API readers for long.
+
+Every record gets a monotonically increasing sequence number, so clients
+can poll incrementally with read_since(cursor) or long-poll with
+wait_since(cursor, timeout) instead of re-reading the whole buffer.
+"""
+
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# -v threadtime: "01-01 12:00:00.123  1234  1240 I Tag     : message"
+# -v time:       "01-01 12:00:00.123 I/Tag( 1234): message"
+# The common case (tag without parentheses) is matched first, without backtracking
+_LINE_RE = re.compile(
+    r'(\d\d-\d\d \d\d:\d\d):(\d\d\.\d+) +'
+    r'(?:([VDIWEFSA])/([^(]*)\( *(\d+)\): ?'
+    r'|(\d+) +(\d+) ([VDIWEFSA]) ([^:]*?) *: '
+    r'|([VDIWEFSA])/(.*?)\( *(\d+)\): ?)'
+    r'(.*)'
+)
+
+
+class LogRecord:
+    """One logcat line. Unparseable lines keep level/tag None and the text as message."""
+
+    __slots__ = ('timestamp', 'pid', 'tid', 'level', 'tag', 'message', 'received', 'raw', 'seq')
+
+    def __init__(self, timestamp, pid, tid, level, tag, message, received, raw=None, seq=None):
+        self.timestamp = timestamp
+        self.pid = pid
+        self.tid = tid
+        self.level = level
+        self.tag = tag
+        self.message = message
+        self.received = received
+        self.raw = raw  # The line exactly as logcat printed it, if known
+        self.seq = seq  # Assigned by LogcatStore on ingest
+
+    def to_line(self) -> str:
+        """The original line, or a '-v time' style rendering for records built without one."""
+        if self.raw is not None:
+            return self.raw
+        if self.level is None:
+            return self.message
+        stamp = time.strftime('%m-%d %H:%M:%S', time.localtime(self.timestamp))
+        millis = int(round((self.timestamp % 1) * 1000)) % 1000
+        return f"{stamp}.{millis:03d} {self.level}/{self.tag}({self.pid:5d}): {self.message}"
+
+    def to_dict(self) -> Dict:
+        return {
+            'timestamp': self.timestamp,
+            'pid': self.pid,
+            'tid': self.tid,
+            'level': self.level,
+            'tag': self.tag,
+            'message': self.message,
+            'received': self.received,
+            'seq': self.seq,
+        }
+
+    def __repr__(self):
+        return f"LogRecord({self.to_line()!r})"
+
+
+class LogcatParser:
+    """
+    Parses logcat lines. logcat prints no year, so epoch seconds are built
+    from a per-minute cache of mktime() results (the current year, or the
+    previous one if that would put the line in the future).
+    """
+
+    def __init__(self):
+        self._minute_cache: Dict[str, float] = {}
+        self.failures = 0
+
+    def _minute_epoch(self, minute: str) -> float:
+        """Epoch seconds for a 'MM-DD HH:MM' prefix."""
+        month, day, hour, minute_of_hour = int(minute[0:2]), int(minute[3:5]), int(minute[6:8]), int(minute[9:11])
+        now = time.time()
+        year = time.localtime(now).tm_year
+        epoch = time.mktime((year, month, day, hour, minute_of_hour, 0, 0, 0, -1))
+        if epoch > now + 86400:
+            epoch = time.mktime((year - 1, month, day, hour, minute_of_hour, 0, 0, 0, -1))
+        if len(self._minute_cache) > 4096:
+            self._minute_cache.clear()
+        self._minute_cache[minute] = epoch
+        return epoch
+
+    def parse(self, line: str, received: Optional[float] = None) -> LogRecord:
+        received = time.time() if received is None else received
+        match = _LINE_RE.match(line)
+        if match is None:
+            self.failures += 1
+            return LogRecord(None, None, None, None, None, line, received, line)
+        (minute, seconds, level, tag, pid, tt_pid, tt_tid, tt_level, tt_tag,
+         paren_level, paren_tag, paren_pid, message) = match.groups()
+        epoch = self._minute_cache.get(minute)
+        if epoch is None:
+            try:
+                epoch = self._minute_epoch(minute)
+            except (OverflowError, ValueError):
+                epoch = None
+        timestamp = epoch + float(seconds) if epoch is not None else None
+        if level is not None:
+            return LogRecord(timestamp, int(pid), None, level, tag.rstrip(), message, received, line)
+        if tt_level is not None:
+            return LogRecord(timestamp, int(tt_pid), int(tt_tid), tt_level, tt_tag, message, received, line)
+        return LogRecord(timestamp, int(paren_pid), None, paren_level, paren_tag.rstrip(), message, received, line)
+
+
+class RingBuffer:
+    """
+    Fixed-capacity FIFO; the oldest item is overwritten once full. The n-th
+    item ever appended has sequence number n (from 0), and clear() does not
+    reset the numbering.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._items: List = [None] * capacity
+        self._total = 0  # Items ever appended
+        self._floor = 0  # Sequence number of the first item after the last clear()
+
+    def __len__(self) -> int:
+        return min(self._total - self._floor, self.capacity)
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    @property
+    def oldest(self) -> int:
+        """Sequence number of the oldest item still held."""
+        return self._total - len(self)
+
+    def append(self, item):
+        self._items[self._total % self.capacity] = item
+        self._total += 1
+
+    def extend(self, items: Iterable):
+        for item in items:
+            self._items[self._total % self.capacity] = item
+            self._total += 1
+
+    def latest(self, n: int) -> List:
+        """Up to n most recent items, oldest first."""
+        n = max(0, min(n, len(self)))
+        if not n:
+            return []
+        end = self._total % self.capacity
+        start = (end - n) % self.capacity
+        if start < end:
+            return self._items[start:end]
+        return self._items[start:] + self._items[:end]
+
+    def since(self, seq: int, limit: int) -> List:
+        """Up to limit items with sequence numbers from seq on (seq must be >= oldest)."""
+        stop = min(self._total, seq + max(0, limit))
+        if seq >= stop:
+            return []
+        start, end = seq % self.capacity, stop % self.capacity
+        if start < end:
+            return self._items[start:end]
+        return self._items[start:] + self._items[:end]
+
+    def clear(self):
+        self._items = [None] * self.capacity
+        self._floor = self._total
+
+
+class LogcatStore:
+    """
+    Thread-safe ring of parsed records fed by the logcat monitor. With an
+    archive (a LogcatArchive), every ingested batch is also appended to disk.
+    """
+
+    def __init__(self, capacity: int = 2000, archive=None):
+        self.parser = LogcatParser()
+        self.archive = archive
+        self._ring = RingBuffer(capacity)
+        self._lock = threading.Lock()
+        self._new_data = threading.Condition(self._lock)
+
+    @property
+    def capacity(self) -> int:
+        return self._ring.capacity
+
+    def __len__(self) -> int:
+        return len(self._ring)
+
+    def ingest(self, line: str) -> LogRecord:
+        record = self.parser.parse(line)  # Parse outside the lock
+        with self._lock:
+            record.seq = self._ring.total
+            self._ring.append(record)
+            self._new_data.notify_all()
+        if self.archive is not None:
+            self.archive.append((record,))
+        return record
+
+    def ingest_many(self, lines: Iterable[str]) -> int:
+        """Parse a batch and append it under one lock acquisition."""
+        received = time.time()
+        records = [self.parser.parse(line, received) for line in lines]
+        with self._lock:
+            seq = self._ring.total
+            for record in records:
+                record.seq = seq
+                seq += 1
+            self._ring.extend(records)
+            self._new_data.notify_all()
+        if self.archive is not None:
+            self.archive.append(records)
+        return len(records)
+
+    def latest(self, n: int = 100) -> List[LogRecord]:
+        with self._lock:
+            return self._ring.latest(n)
+
+    @property
+    def cursor(self) -> int:
+        """Sequence number the next ingested record will get."""
+        with self._lock:
+            return self._ring.total
+
+    def _read_since(self, cursor: int, limit: int) -> Tuple[List[LogRecord], int, int]:
+        ring = self._ring
+        if cursor < 0 or cursor > ring.total:
+            cursor = ring.oldest  # Cursor from before a restart: resend what is buffered
+        start = max(cursor, ring.oldest)
+        records = ring.since(start, limit)
+        return records, start + len(records), start - cursor
+
+    def read_since(self, cursor: int = 0, limit: int = 100) -> Tuple[List[LogRecord], int, int]:
+        """
+        Records with sequence numbers >= cursor, oldest first.
+
+        Returns (records, next_cursor, missed), where missed counts records
+        that were overwritten before this client read them. Pass next_cursor
+        back in on the following call.
+        """
+        with self._lock:
+            return self._read_since(cursor, limit)
+
+    def wait_since(self, cursor: int = 0, limit: int = 100,
+                   timeout: Optional[float] = None) -> Tuple[List[LogRecord], int, int]:
+        """Like read_since, but blocks up to timeout seconds until a record past cursor arrives."""
+        with self._new_data:
+            self._new_data.wait_for(lambda: self._ring.total != cursor, timeout)
+            return self._read_since(cursor, limit)
+
+    def clear(self):
+        with self._lock:
+            self._ring.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'capacity': self._ring.capacity,
+                'buffered': len(self._ring),
+                'total_lines': self._ring.total,
+                'unparsed_lines': self.parser.failures,
+            }
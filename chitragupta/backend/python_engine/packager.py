@@ -1,9 +1,25 @@
+import hashlib
+import json
 import os
-import zipfile
 import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
 
-from modules.sudarshana.adb_bridge import adb_bridge
+from adb_bridge import adb_bridge
+from hash_engine import hash_engine
+from hasher import MerkleTree
+from known_hashes import known_hashes
+from signer import signer
+from zip_writer import EvidenceZipWriter
+
+# selection key -> (output file, streaming extractor, description)
+ARTIFACTS = {
+    'calls': ("Calls/call_log.jsonl", lambda: adb_bridge.iter_call_logs(), "Call Logs via content query"),
+    'chat': ("Chat/sms_dump.jsonl", lambda: adb_bridge.iter_sms_logs(), "SMS Logs via content query"),
+    'system': ("System/logcat_full.jsonl", lambda: adb_bridge.iter_system_logs(), "System Logcat"),
+}
 
 class ForensicPackager:
     def __init__(self, base_extraction_path="/tmp/forensics_extraction"):
@@ -11,53 +27,151 @@ class ForensicPackager:
         # For demo, ensure the path exists
         self.base_path.mkdir(parents=True, exist_ok=True)
 
+    def _extract_artifact(self, key):
+        """Streams one extractor's records to its JSONL file as they arrive."""
+        relative, extractor, description = ARTIFACTS[key]
+        output = self.base_path / relative
+        start = time.perf_counter()
+        records = 0
+        error = None
+        try:
+            with open(output, "w", encoding="utf-8") as f:
+                for record in extractor():
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    records += 1
+        except Exception as e:
+            error = str(e)
+            print(f"{description} extraction error: {e}")
+        return {
+            'artifact': key,
+            'description': description,
+            'file': relative,
+            'records': records,
+            'seconds': round(time.perf_counter() - start, 3),
+            'error': error,
+        }
+
     def extract_real_data(self, selections):
-        """Pulls real data from the device based on frontend selections."""
+        """
+        Pulls real data from the device based on frontend selections. The
+        selected extractors share one connection check and run concurrently,
+        each streaming its records to a JSONL file; per-artifact record
+        counts and timings go to extraction_metadata.json.
+        """
         (self.base_path / "Calls").mkdir(exist_ok=True)
         (self.base_path / "Chat").mkdir(exist_ok=True)
         (self.base_path / "System").mkdir(exist_ok=True)
 
+        start = time.perf_counter()
         metadata_report = []
+        artifacts = []
+        selected = [key for key in ARTIFACTS if selections.get(key)]
 
-        if selections.get('calls'):
-            call_data = adb_bridge.extract_call_logs()
-            (self.base_path / "Calls" / "call_log.txt").write_text(call_data)
-            metadata_report.append("Extracted Call Logs via dumpsys")
-
-        if selections.get('chat'):
-            sms_data = adb_bridge.extract_sms_logs()
-            (self.base_path / "Chat" / "sms_dump.txt").write_text(sms_data)
-            metadata_report.append("Extracted SMS Logs via content query")
+        if selected and not adb_bridge.check_connection():
+            metadata_report.append("No device connected - device artifacts skipped")
+            selected = []
 
-        if selections.get('system'):
-            sys_data = adb_bridge.extract_system_logs()
-            (self.base_path / "System" / "logcat_full.txt").write_text(sys_data)
-            metadata_report.append("Extracted Full System Logcat")
+        if selected:
+            with ThreadPoolExecutor(max_workers=len(selected)) as pool:
+                artifacts = list(pool.map(self._extract_artifact, selected))
+            for result in artifacts:
+                if result['error']:
+                    metadata_report.append(f"Failed to extract {result['description']}: {result['error']}")
+                else:
+                    metadata_report.append(
+                        f"Extracted {result['description']}: {result['records']} records in {result['seconds']}s"
+                    )
 
         if selections.get('deleted'):
             # Simulation of deleted data carving
             (self.base_path / "System" / "deleted_fragments.txt").write_text("Searching for orphaned SQLite pages...\nNo recoverable fragments found in unprotected storage.")
             metadata_report.append("Performed Forensic Scan for deleted fragments")
 
+        total = round(time.perf_counter() - start, 3)
+        metadata_report.append(f"Total extraction time: {total}s")
         (self.base_path / "extraction_metadata.txt").write_text("\n".join(metadata_report))
+        (self.base_path / "extraction_metadata.json").write_text(json.dumps({
+            'artifacts': artifacts,
+            'total_seconds': total,
+            'sum_of_artifact_seconds': round(sum(a['seconds'] for a in artifacts), 3),
+        }, indent=2))
         return metadata_report
 
-    def create_package(self, case_id, selections=None):
+    def _build_manifest(self, case_id, entries, excluded=None):
+        """Manifest of every evidence member; the Merkle root commits to them in order."""
+        if known_hashes:
+            for entry in entries:
+                known_hashes.tag(entry)
+        tree = MerkleTree(entry['sha256'] for entry in entries)
+        return {
+            'case_id': case_id,
+            'created': datetime.now(timezone.utc).isoformat(),
+            'hash_algorithm': 'sha256',
+            'member_count': len(entries),
+            'total_bytes': sum(entry['size'] for entry in entries),
+            'merkle_root': tree.root_hex() if entries else None,
+            'members': entries,
+            'excluded_known_good': excluded or [],
+        }
+
+    def create_package(self, case_id, selections=None, output_dir=None, workers=None, drop_known=False):
+        """
+        Zips the extraction directory in a single streaming pass. Each member
+        is stored or deflated (in parallel chunks when large) while its SHA-256
+        is computed; MANIFEST.json lists every member with its hash and the
+        Merkle root, and MANIFEST.sig carries the RSA-PSS signature over it.
+        Members in a loaded known-hash set are tagged in the manifest; with
+        drop_known, known-good files are hashed up front and left out (listed
+        under 'excluded_known_good').
+        """
         if selections:
             self.extract_real_data(selections)
-            
-        desktop_path = Path.home() / "Desktop"
+
+        output_path = Path(output_dir) if output_dir else Path.home() / "Desktop"
         zip_filename = f"{case_id}_Evidence_Package.zip"
-        zip_path = desktop_path / zip_filename
+        zip_path = output_path / zip_filename
 
         try:
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, dirs, files in os.walk(self.base_path):
-                    for file in files:
-                        file_path = Path(root) / file
-                        arcname = file_path.relative_to(self.base_path)
-                        zipf.write(file_path, arcname)
-            
+            start = time.time()
+            output_path.mkdir(parents=True, exist_ok=True)
+            file_paths = []
+            for root, dirs, files in os.walk(self.base_path):
+                dirs.sort()
+                file_paths.extend(str(Path(root) / file) for file in sorted(files))
+
+            excluded = []
+            if drop_known and known_hashes:
+                hashed = hash_engine.hash_files(file_paths)['results']
+                kept = []
+                for file_path in file_paths:
+                    digest = hashed[file_path].get('sha256')
+                    if digest and known_hashes.lookup(digest) == 'known_good':
+                        excluded.append({'name': Path(file_path).relative_to(self.base_path).as_posix(),
+                                         'sha256': digest})
+                    else:
+                        kept.append(file_path)
+                file_paths = kept
+
+            with EvidenceZipWriter(str(zip_path), workers=workers) as zipf:
+                for file_path in file_paths:
+                    arcname = Path(file_path).relative_to(self.base_path).as_posix()
+                    zipf.write_file(file_path, arcname)
+
+                manifest = self._build_manifest(case_id, zipf.entries, excluded)
+                manifest_bytes = json.dumps(manifest, indent=2).encode('utf-8')
+                signature = {
+                    'manifest_sha256': hashlib.sha256(manifest_bytes).hexdigest(),
+                    'merkle_root': manifest['merkle_root'],
+                    'algorithm': 'RSA-PSS-SHA256',
+                    'signature': signer.sign_data(manifest_bytes),
+                    'public_key': signer.get_public_key_pem(),
+                }
+                zipf.write_bytes("MANIFEST.json", manifest_bytes)
+                zipf.write_bytes("MANIFEST.sig", json.dumps(signature, indent=2).encode('utf-8'))
+
+            elapsed = time.time() - start
+            print(f"Packaged {manifest['member_count']} files ({manifest['total_bytes'] / (1024 * 1024):.1f} MB) "
+                  f"in {elapsed:.1f}s -> {zip_path}")
             return str(zip_path)
         except Exception as e:
             print(f"Packaging error: {e}")
@@ -3,23 +3,66 @@ import shlex
 import threading
 import time
 import re
+import os
+
+from adb_session import get_session, adb_devices, adb_serialno
+from hash_engine import hash_engine
+from logcat_store import LogcatStore
+from logcat_archive import LogcatArchive
+from log_classifier import log_classifier
+
+
+class ContentQueryError(Exception):
+    """A content query page failed: provider error, cut-off output or timeout."""
+
+
+def _content_row_parser(columns):
+    """
+    Single-pass tokenizer for 'content query' rows, which print columns in
+    projection order: "Row: 12 _id=5, address=..., body=...". Each value runs
+    up to the next ', <column>=' marker and the last column takes the rest of
+    the line, so free text (an SMS body) must be projected last.
+    """
+    first = columns[0] + "="
+    markers = [(column, f", {following}=") for column, following in zip(columns, columns[1:])]
+    last = columns[-1]
+
+    def parse(line):
+        position = line.find(" ", 5) + 1  # Skip "Row: <n> "
+        if not position or not line.startswith(first, position):
+            return None
+        position += len(first)
+        row = {}
+        for column, marker in markers:
+            end = line.find(marker, position)
+            if end < 0:
+                return None
+            row[column] = line[position:end]
+            position = end + len(marker)
+        row[last] = line[position:]
+        return row
+
+    return parse
 
 class ADBBridge:
-    def __init__(self):
+    def __init__(self, log_capacity=2000, archive_dir=None):
         self.device_connected = False
-        self.logs = []
-        self.interesting_events = []
+        self.logcat = LogcatStore(log_capacity)  # Parsed logcat ring buffer
+        self.archive_dir = archive_dir  # None: $CHITRAGUPTA_LOGCAT_ARCHIVE or ~/.chitragupta/logcat_archive
         self.lock = threading.Lock()
         self.monitoring = False
         self.monitor_thread = None
         self.previous_connection_state = False  # Track previous connection state
 
+    def _shell(self, command, timeout=None):
+        """Runs a device command over the shared persistent adb shell."""
+        return get_session().run(command, timeout=timeout)
+
     def check_connection(self):
         """Checks if a device is connected via ADB."""
         try:
-            # Add timeout for robustness
-            result = subprocess.run(["adb", "devices"], capture_output=True, text=True, timeout=2)
-            lines = result.stdout.strip().split('\n')
+            # Answered by the adb server directly; timeout for robustness
+            lines = adb_devices(timeout=2).strip().split('\n')
 
             # Determine current connection state. A device is connected if there's more than one line
             # (the first line is "List of devices attached") and the second line contains "device".
@@ -32,9 +75,7 @@ class ADBBridge:
             
             # Detect reconnection: previous state was False (disconnected), current state is True (connected)
             if not self.previous_connection_state and current_state:
-                with self.lock:
-                    self.logs.clear()
-                    self.interesting_events.clear()
+                self.logcat.clear()
                 print("Device reconnected - cleared all previous logs")
             
             self.device_connected = current_state # Update the instance variable
@@ -45,145 +86,321 @@ class ADBBridge:
             self.device_connected = False
             return False
 
+    def _archive(self):
+        """On-disk logcat archive, opened on first use."""
+        with self.lock:
+            if self.logcat.archive is None:
+                self.logcat.archive = LogcatArchive(self.archive_dir)
+            return self.logcat.archive
+
     def start_logcat_monitor(self):
         """Starts a background thread to read logcat."""
         if self.monitoring:
             return
         self.monitoring = True
+        self._archive()
         self.monitor_thread = threading.Thread(target=self._read_logcat, daemon=True)
         self.monitor_thread.start()
 
     def _read_logcat(self):
         """Internal method to read logcat stream."""
         # clear buffer first
-        subprocess.run(["adb", "logcat", "-c"])
+        self._shell("logcat -c")
         process = subprocess.Popen(
             ["adb", "logcat", "-v", "time"],
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            errors='replace' # Fix UnicodeDecodeError crash
+            stderr=subprocess.PIPE
         )
-        
+        fd = process.stdout.fileno()
+        pending = b""
+
         while self.monitoring:
-            line = process.stdout.readline()
-            if not line:
+            # Take whatever the pipe holds: one line when quiet, thousands in a storm,
+            # so the ring buffer lock is taken once per batch
+            chunk = os.read(fd, 256 * 1024)
+            if not chunk:
                 break
-            
-            # User requested "literally everything".
-            # To prevent UI crash, we'll still buffer, but allow ALL non-empty lines through.
-            line_str = line.strip()
-            if not line_str:
-                continue
+            pending += chunk
+            lines = pending.split(b"\n")
+            pending = lines.pop()
 
-            with self.lock:
-                self.logs.append(line_str)
-                if len(self.logs) > 2000:
-                    self.logs.pop(0)
-                
-                # Push EVERYTHING to the feed.
-                # The Dashboard will just scroll fast if it's spammy.
-                self.interesting_events.append({
-                    "timestamp": time.time(),
-                    "raw": line_str,
-                    "type": "system"
-                })
-                if len(self.interesting_events) > 500: # Increase buffer
-                    self.interesting_events.pop(0)
+            # User requested "literally everything": every non-empty line is kept
+            batch = [line.decode('utf-8', 'replace').strip() for line in lines]
+            self.logcat.ingest_many([line for line in batch if line])
+
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+        self.logcat.archive.flush()
+
+    @property
+    def logs(self):
+        """Buffered logcat lines, oldest first."""
+        return [record.to_line() for record in self.logcat.latest(self.logcat.capacity)]
+
+    @staticmethod
+    def _event(record):
+        event = {
+            "seq": record.seq,
+            "timestamp": record.received,
+            "raw": record.to_line(),
+            "level": record.level,
+            "tag": record.tag,
+            "pid": record.pid
+        }
+        event.update(log_classifier.label(log_classifier.classify_record(record)))
+        return event
 
     def get_interesting_events(self):
-        with self.lock:
-            # Return larger slice for continuous feel
-            return list(self.interesting_events)[-100:]
+        # Return larger slice for continuous feel
+        return [self._event(record) for record in self.logcat.latest(100)]
+
+    def read_events_since(self, cursor=0, limit=100, timeout=0):
+        """
+        Events ingested since cursor (a sequence number), oldest first.
+        With a timeout, blocks until at least one new event arrives or the
+        timeout passes. Returns the events, the cursor for the next call and
+        how many events were overwritten before they could be read.
+        """
+        if timeout:
+            records, cursor, missed = self.logcat.wait_since(cursor, limit, timeout)
+        else:
+            records, cursor, missed = self.logcat.read_since(cursor, limit)
+        return {
+            "events": [self._event(record) for record in records],
+            "cursor": cursor,
+            "missed": missed
+        }
 
     def get_latest_logs(self, n=100):
-        with self.lock:
-            return self.logs[-n:]
+        return [record.to_line() for record in self.logcat.latest(n)]
+
+    def query_logs(self, start=None, end=None, tags=None, min_level=None, contains=None, category=None, limit=1000):
+        """
+        Archived logcat records between start and end (epoch seconds), served
+        from disk without touching the device. Includes lines from earlier
+        monitor sessions. Each result is classified; category keeps one class.
+        """
+        records = self._archive().query(start, end, tags, min_level, contains,
+                                        None if category else limit)
+        results = []
+        for record in records:
+            label = log_classifier.label(log_classifier.classify_record(record))
+            if category and label["type"] != category:
+                continue
+            results.append(dict(record.to_dict(), raw=record.to_line(), **label))
+            if limit is not None and len(results) >= limit:
+                break
+        return results
 
     def get_installed_packages(self):
         if not self.check_connection():
             return []
         try:
-            result = subprocess.run(["adb", "shell", "pm", "list", "packages"], capture_output=True, text=True)
+            result = self._shell("pm list packages")
             packages = [line.replace("package:", "").strip() for line in result.stdout.split('\n') if line]
             return packages
         except:
             return []
 
+    def _stream_lines(self, command, timeout=60, keepends=False, check_timeout=False):
+        """
+        Yields a device command's output line by line as it arrives. Each call
+        gets its own adb process, so several extractors can stream side by side.
+        With check_timeout, a watchdog kill raises TimeoutExpired instead of
+        just ending the output.
+        """
+        process = subprocess.Popen(
+            ["adb", "exec-out", command],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            errors='replace'
+        )
+        timed_out = threading.Event()
+
+        def expire():
+            timed_out.set()
+            process.kill()
+
+        watchdog = threading.Timer(timeout, expire) if timeout else None
+        if watchdog:
+            watchdog.daemon = True
+            watchdog.start()
+        try:
+            for line in process.stdout:
+                yield line if keepends else line.rstrip('\r\n')
+            if check_timeout and timed_out.is_set():
+                raise subprocess.TimeoutExpired(command, timeout)
+        finally:
+            if watchdog:
+                watchdog.cancel()
+            if process.poll() is None:
+                process.kill()
+            process.stdout.close()
+            process.wait()
+
+    def _content_page(self, command, parse, columns, timeout):
+        """
+        Runs one content query and yields its rows. A row is only yielded once
+        the next row (or a clean end of output) shows it is complete, so a
+        failed page never yields a cut-off row. A line only starts a row when
+        it carries the next "Row: <n> " index and parses; anything else
+        continues the previous row's last column (an SMS body may itself hold
+        "Row: " lines). A row that cannot be split into columns is yielded
+        with every column but _id None, "unparsed": True and the text as
+        "raw"; without an _id it is skipped.
+        """
+        last_column = columns[-1]
+        pending = None
+        index = 0
+        errors = []
+        try:
+            for line in self._stream_lines(command, timeout, keepends=True, check_timeout=True):
+                if not line.endswith("\n"):
+                    raise ContentQueryError("output cut off mid-row")
+                text = line.rstrip("\r\n")
+                starts_row = text.startswith(f"Row: {index} ")
+                row = parse(text) if starts_row else None
+                if row is None and starts_row and not (pending and pending.get(last_column) is not None):
+                    row_id = re.search(r"\b_id=(\d+)", text)
+                    if row_id is not None:
+                        row = dict.fromkeys(columns)
+                        row.update({"_id": row_id.group(1), "unparsed": True, "raw": text})
+                    else:
+                        print(f"Skipping unparseable row: {text[:120]}")
+                        row = {}  # Placeholder: swallows its continuation lines, never yielded
+                if row is not None:
+                    if pending:
+                        yield pending
+                    pending = row
+                    index += 1
+                elif pending is not None:
+                    # Values may hold newlines: the line continues the last column
+                    if pending.get("unparsed"):
+                        pending["raw"] += "\n" + text
+                    elif last_column in pending:
+                        pending[last_column] += "\n" + text
+                elif text.startswith("No result found"):
+                    return
+                elif text.strip():
+                    errors.append(text.strip())  # "Error while accessing provider" and its exception
+        except subprocess.TimeoutExpired as e:
+            raise ContentQueryError(f"page timed out after {timeout}s") from e
+        if errors:
+            raise ContentQueryError(" ".join(errors))
+        if pending:
+            yield pending
+
+    def iter_content_rows(self, uri, columns, page_size=2000, retries=3, page_timeout=30, unpaged_timeout=10):
+        """
+        Streams a content provider in _id order, one --where/--sort LIMIT window
+        at a time, yielding rows (dicts keyed by column, _id first) as they
+        arrive. A failed page is retried from the last row yielded, up to
+        retries times in a row. Put free-text columns last. Providers that
+        reject LIMIT are streamed with a single sorted query instead, which
+        is killed after unpaged_timeout seconds.
+        """
+        columns = ["_id"] + [column for column in columns if column != "_id"]
+        parse = _content_row_parser(columns)
+        base = f"content query --uri {uri} --projection {','.join(columns)}"
+        last_id = None
+        failures = 0
+        paged = True
+
+        while True:
+            command = base
+            if last_id is not None:
+                command += " --where " + shlex.quote(f"_id>{last_id}")
+            command += " --sort " + shlex.quote(f"_id ASC LIMIT {int(page_size)}" if paged else "_id ASC")
+            rows = 0
+            try:
+                for row in self._content_page(command, parse, columns, page_timeout if paged else unpaged_timeout):
+                    last_id = int(row["_id"])
+                    rows += 1
+                    failures = 0
+                    yield row
+            except ContentQueryError as e:
+                if paged and last_id is None and "LIMIT" in str(e):
+                    paged = False
+                    continue
+                failures += 1
+                if failures > retries:
+                    raise
+                print(f"Content query page failed ({e}); retrying after _id {last_id}")
+                time.sleep(0.5 * 2 ** (failures - 1))
+                continue
+            # A short page can also mean cut-off output, so only an empty page ends the walk
+            if not rows or not paged:
+                return
+
+    def iter_call_logs(self, page_size=2000):
+        """
+        Yields call log rows page by page as the provider returns them (no
+        connection check). Falls back to dumpsys when the provider returns
+        nothing or fails before the first row (common on locked-down ROMs).
+        """
+        rows = 0
+        try:
+            for row in self.iter_content_rows("content://call_log/calls", ["number", "date", "duration", "type"],
+                                              page_size=page_size):
+                rows += 1
+                yield row
+        except ContentQueryError as e:
+            if rows:
+                raise
+            print(f"Call log provider failed ({e}); falling back to dumpsys")
+        if not rows:
+            # Fallback: dumpsys
+            result = self._shell("dumpsys call_log", timeout=5)
+            if result.stdout.strip():
+                yield {"raw": result.stdout[:500]}
+
+    def iter_sms_logs(self, page_size=2000):
+        """Yields SMS rows page by page as the provider returns them (no connection check)."""
+        # body goes last: it is free text and may contain ", type=" or newlines
+        yield from self.iter_content_rows("content://sms", ["address", "date", "type", "body"],
+                                          page_size=page_size)
+
+    def iter_system_logs(self, limit=100):
+        """Yields classified logcat events as they are read (no connection check)."""
+        for line in self._stream_lines(f"logcat -d -t {int(limit)}"):
+            if not line.strip(): continue
+            # One pass over the compiled rule set (user/network/system by default)
+            yield {
+                "timestamp": line[:18].strip(), # Approx timestamp from -v time
+                "description": line[18:].strip(),
+                **log_classifier.label(log_classifier.classify_line(line))
+            }
+
     def extract_call_logs(self):
         """Extracts and parses call logs."""
         if not self.check_connection():
             return []
+        rows = []
         try:
-            # Primary: content query (more structured)
-            result = subprocess.run(["adb", "shell", "content", "query", "--uri", "content://call_log/calls", "--projection", "number,date,duration,type"], capture_output=True, text=True, timeout=10)
-            if "Row" in result.stdout:
-                calls = []
-                for line in result.stdout.split('\n'):
-                    if "Row" in line:
-                        match = re.search(r"number=(.*?), date=(.*?), duration=(.*?), type=(.*)", line)
-                        if match:
-                            calls.append({
-                                "number": match.group(1),
-                                "date": match.group(2),
-                                "duration": match.group(3),
-                                "type": match.group(4)
-                            })
-                return calls
-            
-            # Fallback: dumpsys
-            result = subprocess.run(["adb", "shell", "dumpsys", "call_log"], capture_output=True, text=True, timeout=5)
-            # Basic parsing if needed
-            return [{"raw": result.stdout[:500]}] if result.stdout.strip() else []
+            rows.extend(self.iter_call_logs())
         except Exception as e:
-            print(f"Call extraction error: {e}")
-            return []
+            print(f"Call extraction error after {len(rows)} rows: {e}")
+        return rows
 
     def extract_sms_logs(self):
         """Extracts and parses SMS logs."""
         if not self.check_connection():
             return []
+        rows = []
         try:
-            result = subprocess.run(["adb", "shell", "content", "query", "--uri", "content://sms", "--projection", "address,date,body,type"], capture_output=True, text=True, timeout=10)
-            if "Row" in result.stdout:
-                messages = []
-                for line in result.stdout.split('\n'):
-                    if "Row" in line:
-                        match = re.search(r"address=(.*?), date=(.*?), body=(.*?), type=(.*)", line)
-                        if match:
-                            messages.append({
-                                "address": match.group(1),
-                                "date": match.group(2),
-                                "body": match.group(3),
-                                "type": match.group(4)
-                            })
-                return messages
-            return []
+            rows.extend(self.iter_sms_logs())
         except Exception as e:
-            print(f"SMS extraction error: {e}")
-            return []
+            print(f"SMS extraction error after {len(rows)} rows: {e}")
+        return rows
 
     def extract_system_logs(self, limit=100):
         """Extracts security-relevant system events for timeline."""
         if not self.check_connection():
             return []
         try:
-            # Get latest logcat with timestamps
-            result = subprocess.run(["adb", "logcat", "-d", "-t", str(limit)], capture_output=True, text=True, timeout=5)
-            events = []
-            for line in result.stdout.split('\n'):
-                if not line.strip(): continue
-                # Basic classification
-                etype = "system"
-                if any(x in line.lower() for x in ["auth", "login", "password"]): etype = "user"
-                elif any(x in line.lower() for x in ["socket", "connect", "http", "ip"]): etype = "network"
-                
-                events.append({
-                    "timestamp": line[:18].strip(), # Approx timestamp from -v time
-                    "description": line[18:].strip(),
-                    "type": etype
-                })
-            return events
+            return list(self.iter_system_logs(limit))
         except Exception as e:
              print(f"System extraction error: {e}")
              return []
@@ -195,7 +412,7 @@ class ADBBridge:
         try:
             # Use ls -l to get more info, though parsing can be tricky.
             # -p adds a / to directories
-            result = subprocess.run(["adb", "shell", "ls", "-p", path], capture_output=True, text=True, timeout=5)
+            result = self._shell(f"ls -p {shlex.quote(path)}", timeout=5)
             entries = []
             for line in result.stdout.split('\n'):
                 line = line.strip()
@@ -225,17 +442,18 @@ class ADBBridge:
         }
         
         try:
-            # Model
-            r = subprocess.run(["adb", "shell", "getprop", "ro.product.model"], capture_output=True, text=True)
-            details["model"] = r.stdout.strip()
+            # Model and version, pipelined over the shared shell
+            model, version = get_session().run_many([
+                "getprop ro.product.model",
+                "getprop ro.build.version.release"
+            ])
+            details["model"] = model.stdout.strip()
             
             # Serial
-            r = subprocess.run(["adb", "get-serialno"], capture_output=True, text=True)
-            details["serial"] = r.stdout.strip()
+            details["serial"] = adb_serialno()
             
             # Version
-            r = subprocess.run(["adb", "shell", "getprop", "ro.build.version.release"], capture_output=True, text=True)
-            details["android_version"] = r.stdout.strip()
+            details["android_version"] = version.stdout.strip()
 
             print(f"Device Handshake Complete: {details}")
             return details
@@ -243,44 +461,124 @@ class ADBBridge:
             print(f"Handshake error: {e}")
             return details
 
-    def pull_file_with_hash(self, remote_path, local_destination):
-        """Stage 2: Indrajaal Extraction - Pull & Immediate Hash."""
+    def _stream_pull(self, remote_path, local_destination):
+        """Tees 'adb exec-out cat' into the destination file and the hasher in one pass."""
+        process = subprocess.Popen(
+            ["adb", "exec-out", f"cat {shlex.quote(remote_path)} 2>/dev/null"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        try:
+            with open(local_destination, "wb") as f:
+                streamed = hash_engine.hash_stream(process.stdout, sink=f)
+        finally:
+            process.stdout.close()
+            stderr = process.stderr.read().decode('utf-8', 'replace')
+            process.wait()
+        return process.returncode, stderr, streamed
+
+    def pull_file_with_hash(self, remote_path, local_destination, streaming=True, verify_on_device=False):
+        """
+        Stage 2: Indrajaal Extraction - Pull & Immediate Hash.
+
+        With streaming (default) the file is read once: 'adb exec-out cat' is
+        written to disk and hashed chunk by chunk, so the first hash covers
+        exactly the bytes that crossed the wire. verify_on_device runs
+        sha256sum on the device meanwhile and fails the pull on a mismatch.
+        Falls back to 'adb pull' followed by a hash of the landed file when
+        the device size is unknown or nothing came through exec-out.
+        """
         if not self.check_connection():
             return {"success": False, "error": "No device"}
         
+        device_check = None
         try:
             print(f"INDRAJAAL: Pulling {remote_path}...")
             start_time = time.time()
-            
-            # 1. Pull
-            result = subprocess.run(["adb", "pull", remote_path, local_destination], capture_output=True, text=True, timeout=60)
-            
-            if result.returncode != 0:
-                 return {"success": False, "error": result.stderr}
-
-            # 2. Immediate Hash (The First Hash)
-            # This simulates checking the file immediately upon arrival
-            import hashlib
-            sha256_hash = hashlib.sha256()
-            with open(local_destination, "rb") as f:
-                # Read and update hash string value in blocks of 4K
-                for byte_block in iter(lambda: f.read(4096), b""):
-                    sha256_hash.update(byte_block)
-            
-            file_hash = sha256_hash.hexdigest()
+            quoted = shlex.quote(remote_path)
+
+            if verify_on_device:
+                # Own adb shell, so it neither queues behind nor interleaves with the
+                # shared sessions, and can be killed if the pull fails first
+                device_check = subprocess.Popen(
+                    ["adb", "shell", f"sha256sum {quoted}"],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    text=True
+                )
+
+            method = "pull"
+            file_hash = None
+            logs = "Transfer Success"
+            transferred = None
+            if streaming:
+                stat = self._shell(f"stat -c %s {quoted}", timeout=10)
+                expected = stat.stdout.strip()
+                # exec-out does not report cat's exit status, so a read is only
+                # trusted against a known size
+                if stat.returncode == 0 and expected.isdigit():
+                    returncode, stderr, streamed = self._stream_pull(remote_path, local_destination)
+                    if returncode == 0 and streamed["bytes"] == int(expected):
+                        method = "exec-out"
+                        file_hash = streamed["digests"]["sha256"]
+                        transferred = streamed["bytes"]
+                    elif streamed["bytes"]:
+                        return {
+                            "success": False,
+                            "error": f"Short read: {streamed['bytes']} of {expected} bytes ({stderr.strip() or 'exec-out failed'})"
+                        }
+                # No size (other stat format, permissions) or nothing came through
+                # exec-out (old adbd?): use adb pull instead
+
+            if file_hash is None:
+                # 1. Pull
+                result = subprocess.run(["adb", "pull", remote_path, local_destination], capture_output=True, text=True, timeout=60)
+                
+                if result.returncode != 0:
+                     return {"success": False, "error": result.stderr}
+
+                # 2. Immediate Hash (The First Hash)
+                file_hash = hash_engine.hash_file(local_destination)['sha256']
+                logs = result.stderr or logs
+                transferred = os.path.getsize(local_destination)
+
+            device_hash = None
+            if device_check is not None:
+                output, _ = device_check.communicate(timeout=600)
+                device_hash = output.split()[0] if device_check.returncode == 0 and output.strip() else None
+
+            elapsed = time.time() - start_time
             print(f"INDRAJAAL: File Landed. Hash: {file_hash}")
 
-            return {
+            response = {
                 "success": True,
                 "local_path": local_destination,
                 "hash": file_hash,
                 "timestamp": time.ctime(),
-                "logs": result.stderr or "Transfer Success"
+                "logs": logs,
+                "method": method,
+                "bytes": transferred,
+                "seconds": round(elapsed, 3),
+                "mb_per_s": round(transferred / (1024 * 1024) / elapsed, 1) if elapsed > 0 else 0.0
             }
+            if verify_on_device:
+                response["device_hash"] = device_hash
+                response["device_verified"] = device_hash == file_hash
+                if device_hash != file_hash:
+                    response["success"] = False
+                    response["error"] = (
+                        f"Device hash mismatch: device {device_hash}, received {file_hash}"
+                        if device_hash else "Device-side sha256sum failed"
+                    )
+            return response
             
         except Exception as e:
             print(f"Pull/Hash error: {e}")
             return {"success": False, "error": str(e)}
+        finally:
+            if device_check is not None and device_check.poll() is None:
+                device_check.kill()
+                device_check.wait()
 
     def stop(self):
         self.monitoring = False
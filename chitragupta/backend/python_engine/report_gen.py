@@ -3,10 +3,57 @@ from reportlab.pdfgen import canvas
 from reportlab.lib import colors
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
 from reportlab.lib.styles import getSampleStyleSheet
+import csv
+import hashlib
+import json
 import os
 import time
 
+from known_hashes import known_hashes
+
+STATUS_LABELS = {None: "VERIFIED", 'known_good': "KNOWN GOOD", 'known_bad': "KNOWN BAD"}
+UNHASHED_LABEL = "NOT HASHED"  # Hashing failed: no digest to verify or look up
+
+# Integrity log layout: fixed column widths and row heights mean reportlab
+# never has to measure the cells, and both styles are shared by every chunk
+INTEGRITY_COL_WIDTHS = [120, 310, 70]
+SAMPLE_COL_WIDTHS = [45, 105, 290, 60]
+INTEGRITY_HEADER_HEIGHT = 24
+INTEGRITY_ROW_HEIGHT = 10
+
+INTEGRITY_HEADER_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.navy),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+    ('FONTSIZE', (0, 1), (-1, -1), 6),
+    ('TOPPADDING', (0, 1), (-1, -1), 1),
+    ('BOTTOMPADDING', (0, 1), (-1, -1), 2),
+])
+INTEGRITY_BODY_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+    ('FONTSIZE', (0, 0), (-1, -1), 6),
+    ('TOPPADDING', (0, 0), (-1, -1), 1),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+])
+
+
 class ReportGenerator:
+    def __init__(self, large_threshold=5000, chunk_rows=50, sample_rows=200, manifest_format="csv"):
+        """
+        large_threshold: above this many files the full integrity log goes to
+        a CSV/JSONL manifest next to the PDF, and the PDF keeps the summary,
+        Merkle root and sample_rows evenly spaced rows.
+        chunk_rows: rows per integrity table, so no single Table spans pages.
+        """
+        self.large_threshold = large_threshold
+        self.chunk_rows = chunk_rows
+        self.sample_rows = sample_rows
+        self.manifest_format = manifest_format
+
     def _add_watermark(self, canvas, doc):
         canvas.saveState()
         canvas.setFont('Helvetica-Bold', 40)
@@ -79,7 +126,79 @@ class ReportGenerator:
         story.append(t)
         story.append(Spacer(1, 18))
 
-    def generate_report(self, metadata, files_data, root_hash, signature, output_path="report.pdf", extras=None):
+    def _add_chunked_table(self, story, header, rows, col_widths):
+        """Lays rows out as consecutive chunk_rows-sized tables that read as one."""
+        for start in range(0, max(len(rows), 1), self.chunk_rows):
+            chunk = rows[start:start + self.chunk_rows]
+            if start == 0:
+                t = Table([header] + chunk, colWidths=col_widths,
+                          rowHeights=[INTEGRITY_HEADER_HEIGHT] + [INTEGRITY_ROW_HEIGHT] * len(chunk))
+                t.setStyle(INTEGRITY_HEADER_STYLE)
+            else:
+                t = Table(chunk, colWidths=col_widths, rowHeights=[INTEGRITY_ROW_HEIGHT] * len(chunk))
+                t.setStyle(INTEGRITY_BODY_STYLE)
+            story.append(t)
+
+    def _integrity_rows(self, files_data, drop_known):
+        """[name, hash, status] per file, tagged against loaded known-hash sets."""
+        check_known = bool(known_hashes)
+        rows = []
+        counts = {'known_good': 0, 'known_bad': 0}
+        for f in files_data:
+            digest = f.get('hash')
+            hashed = isinstance(digest, str) and len(digest) == 64
+            category = f.get('known') or (known_hashes.lookup(digest) if check_known and hashed else None)
+            if category:
+                counts[category] += 1
+                if drop_known and category == 'known_good':
+                    continue
+            status = STATUS_LABELS[category] if hashed or category else UNHASHED_LABEL
+            rows.append([f['name'], digest or '', status])
+        return rows, counts
+
+    def _write_manifest(self, rows, output_path):
+        """Streams the full integrity log next to the PDF; returns (path, sha256)."""
+        extension = "jsonl" if self.manifest_format == "jsonl" else "csv"
+        manifest_path = f"{os.path.splitext(output_path)[0]}_integrity.{extension}"
+        with open(manifest_path, "w", newline="", encoding="utf-8") as f:
+            if extension == "jsonl":
+                for index, (name, file_hash, status) in enumerate(rows, 1):
+                    f.write(json.dumps({'index': index, 'name': name,
+                                        'sha256': file_hash, 'status': status}) + "\n")
+            else:
+                writer = csv.writer(f)
+                writer.writerow(["index", "name", "sha256", "status"])
+                writer.writerows([index] + row for index, row in enumerate(rows, 1))
+        digest = hashlib.sha256()
+        with open(manifest_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return manifest_path, digest.hexdigest()
+
+    def _add_large_integrity_section(self, story, rows, output_path, styles):
+        manifest_path, manifest_hash = self._write_manifest(rows, output_path)
+        total = len(rows)
+        story.append(Paragraph(
+            f"<b>{total:,}</b> files were hashed. The complete integrity log is in the attached manifest "
+            f"<b>{os.path.basename(manifest_path)}</b>; this report shows {min(self.sample_rows, total):,} "
+            f"evenly spaced rows, numbered as in the manifest.", styles['Normal']))
+        story.append(Paragraph(f"<b>Manifest SHA-256:</b> {manifest_hash}", styles['Normal']))
+        story.append(Spacer(1, 12))
+
+        step = max(1, total // self.sample_rows)
+        sampled = [[str(i + 1)] + rows[i] for i in range(0, total, step)][:self.sample_rows]
+        self._add_chunked_table(story, ["#", "Filename", "Full Hashing Integrity Value (SHA-256)", "Status"],
+                                sampled, SAMPLE_COL_WIDTHS)
+
+    def generate_report(self, metadata, files_data, root_hash, signature, output_path="report.pdf", extras=None,
+                        drop_known=False):
+        """
+        Builds the PDF report. Files matching a loaded known-hash set are
+        marked KNOWN GOOD / KNOWN BAD; with drop_known the known-good ones are
+        left out of the integrity log and only counted.
+        """
+        start = time.time()
+        files_data = files_data if isinstance(files_data, list) else list(files_data)
         doc = SimpleDocTemplate(output_path, pagesize=letter)
         styles = getSampleStyleSheet()
         story = []
@@ -124,21 +243,18 @@ class ReportGenerator:
 
         # Evidence Integrity Table
         story.append(Paragraph("EVIDENCE INTEGRITY LOG (SHA-256)", styles['Heading2']))
-        data = [["Filename", "Full Hashing Integrity Value (SHA-256)", "Status"]]
-        for f in files_data:
-            data.append([f['name'], f['hash'], "VERIFIED"])
-        
-        t = Table(data, colWidths=[120, 310, 70])
-        t.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.navy),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-            ('FONTSIZE', (0, 1), (-1, -1), 6),
-        ]))
-        story.append(t)
+        rows, known_counts = self._integrity_rows(files_data, drop_known)
+        if known_counts['known_good'] or known_counts['known_bad']:
+            omitted = " (omitted below)" if drop_known else ""
+            story.append(Paragraph(
+                f"Known-file filter: <b>{known_counts['known_good']:,}</b> known-good files{omitted}, "
+                f"<b>{known_counts['known_bad']:,}</b> known-bad files flagged.", styles['Normal']))
+            story.append(Spacer(1, 6))
+        if len(rows) > self.large_threshold:
+            self._add_large_integrity_section(story, rows, output_path, styles)
+        else:
+            self._add_chunked_table(story, ["Filename", "Full Hashing Integrity Value (SHA-256)", "Status"],
+                                    rows, INTEGRITY_COL_WIDTHS)
         story.append(Spacer(1, 24))
 
         # Indrajaal Integrity
@@ -171,6 +287,7 @@ class ReportGenerator:
         
         # Build with watermark on every page
         doc.build(story, onLaterPages=self._add_watermark, onFirstPage=self._add_watermark)
+        print(f"Report for {len(files_data)} files built in {time.time() - start:.1f}s -> {output_path}")
         return output_path
 
 report_gen = ReportGenerator()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Scan Catalog - Persistent per-device file catalog for incremental rescans.
+Stores size, mtime, permissions and hash for every scanned path so repeat
+acquisitions only need to hash new or changed files. A stored hash is only
+reused when both scans read second-resolution mtimes with the same engine.
+"""
+
+import sqlite3
+import time
+from typing import Callable, Dict, List, Optional
+
+DIFF_SAMPLE = 20  # Paths of each kind kept in a diff summary
+
+# Seconds of mtime resolution per scan engine: 'ls -l' prints HH:MM in the
+# device's local time, stat in find prints epoch seconds
+MTIME_PRECISION = {'find': 1, 'recursive': 60}
+
+DIFF_KINDS = ('added', 'removed', 'modified', 'unverifiable')
+
+
+class ScanCatalog:
+    """SQLite-backed catalog of scanned files keyed by (device serial, path)."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            serial      TEXT NOT NULL,
+            path        TEXT NOT NULL,
+            size        INTEGER NOT NULL,
+            mtime       INTEGER,
+            permissions TEXT,
+            sha256      TEXT,
+            last_seen   REAL NOT NULL,
+            engine      TEXT,
+            mtime_precision INTEGER,
+            PRIMARY KEY (serial, path)
+        ) WITHOUT ROWID
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(self.SCHEMA)
+        # Catalogs written before engines were recorded: their rows never reuse a hash
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(files)")}
+        for name, kind in (('engine', 'TEXT'), ('mtime_precision', 'INTEGER')):
+            if name not in columns:
+                self.conn.execute(f"ALTER TABLE files ADD COLUMN {name} {kind}")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def load(self, serial: str) -> Dict[str, Dict]:
+        """Return the stored records for a device, keyed by path."""
+        rows = self.conn.execute(
+            "SELECT path, size, mtime, permissions, sha256, engine, mtime_precision FROM files WHERE serial = ?",
+            (serial,)
+        )
+        return {
+            path: {'size': size, 'mtime': mtime, 'permissions': permissions, 'sha256': sha256,
+                   'engine': engine, 'mtime_precision': precision}
+            for path, size, mtime, permissions, sha256, engine, precision in rows
+        }
+
+    @staticmethod
+    def _compare(stored: Dict, file_info: Dict, engine: str) -> str:
+        """
+        'modified' when size or mtime differ, 'unchanged' when both match to
+        the second, 'unverifiable' when the mtimes cannot prove it: minute
+        resolution, a missing mtime, or a different engine (ls times are
+        parsed in the host's timezone, find's are epoch seconds).
+        """
+        if stored['size'] != file_info['size']:
+            return 'modified'
+        mtime = file_info.get('mtime')
+        if stored['mtime'] is None or mtime is None or stored['engine'] != engine:
+            return 'unverifiable'
+        if stored['mtime'] != mtime:
+            return 'modified'
+        if stored['mtime_precision'] != 1 or MTIME_PRECISION.get(engine) != 1:
+            return 'unverifiable'
+        return 'unchanged'
+
+    @staticmethod
+    def _has_hash(stored: Dict) -> bool:
+        sha256 = stored.get('sha256')
+        return bool(sha256) and len(sha256) == 64
+
+    def diff(
+        self,
+        previous: Dict[str, Dict],
+        files: List[Dict],
+        engine: str,
+        in_scope: Optional[Callable[[str], bool]] = None
+    ) -> Dict:
+        """
+        Compare a fresh scan against the stored catalog.
+
+        Args:
+            previous: Stored records as returned by load()
+            files: File records from the current scan
+            engine: Scan engine that produced files ('find' or 'recursive')
+            in_scope: Predicate telling whether a stored path was covered by
+                this scan (start path, filters, depth). Stored paths outside
+                the scan's scope are never reported as removed.
+
+        Returns:
+            Dictionary with added/removed/modified/unverifiable counts and
+            full path lists; summarize() trims it for API responses
+        """
+        current_paths = set()
+        added, modified, unverifiable = [], [], []
+        unchanged = 0
+
+        for file_info in files:
+            path = file_info['path']
+            current_paths.add(path)
+            stored = previous.get(path)
+            if stored is None:
+                added.append(path)
+                continue
+            state = self._compare(stored, file_info, engine)
+            if state == 'unchanged':
+                unchanged += 1
+            elif state == 'modified':
+                modified.append(path)
+            else:
+                unverifiable.append(path)
+
+        removed = [
+            path for path in previous
+            if path not in current_paths and (in_scope is None or in_scope(path))
+        ]
+
+        return {
+            'added': len(added),
+            'removed': len(removed),
+            'modified': len(modified),
+            'unverifiable': len(unverifiable),
+            'unchanged': unchanged,
+            'added_paths': added,
+            'removed_paths': removed,
+            'modified_paths': modified,
+            'unverifiable_paths': unverifiable
+        }
+
+    @staticmethod
+    def summarize(diff: Dict, sample: int = DIFF_SAMPLE) -> Dict:
+        """Counts plus at most sample paths of each kind (a first scan lists the whole tree)."""
+        summary = {key: diff[key] for key in DIFF_KINDS + ('unchanged',)}
+        for kind in DIFF_KINDS:
+            summary[f'{kind}_sample'] = diff[f'{kind}_paths'][:sample]
+        summary['truncated'] = any(diff[kind] > sample for kind in DIFF_KINDS)
+        return summary
+
+    def reuse_hashes(self, previous: Dict[str, Dict], files: List[Dict], engine: str) -> int:
+        """Copy stored hashes onto provably unchanged files; returns how many were reused."""
+        reused = 0
+        for file_info in files:
+            stored = previous.get(file_info['path'])
+            if stored and self._has_hash(stored) and self._compare(stored, file_info, engine) == 'unchanged':
+                file_info['sha256'] = stored['sha256']
+                reused += 1
+        return reused
+
+    def update(
+        self,
+        serial: str,
+        previous: Dict[str, Dict],
+        files: List[Dict],
+        removed_paths: List[str],
+        engine: str
+    ):
+        """
+        Write the current scan back to the catalog in one transaction.
+
+        Unchanged files keep their stored hash when the scan did not compute
+        one; changed or unverifiable files without a fresh hash have their
+        stored hash cleared.
+        """
+        now = time.time()
+        precision = MTIME_PRECISION.get(engine)
+        rows = []
+        for file_info in files:
+            sha256 = file_info.get('sha256')
+            if not sha256 or len(sha256) != 64:
+                stored = previous.get(file_info['path'])
+                keep = (stored and self._has_hash(stored)
+                        and self._compare(stored, file_info, engine) == 'unchanged')
+                sha256 = stored['sha256'] if keep else None
+            rows.append((
+                serial,
+                file_info['path'],
+                file_info['size'],
+                file_info.get('mtime'),
+                file_info.get('permissions'),
+                sha256,
+                now,
+                engine,
+                precision
+            ))
+
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO files (serial, path, size, mtime, permissions, sha256, last_seen, engine, mtime_precision)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (serial, path) DO UPDATE SET
+                    size = excluded.size,
+                    mtime = excluded.mtime,
+                    permissions = excluded.permissions,
+                    sha256 = excluded.sha256,
+                    last_seen = excluded.last_seen,
+                    engine = excluded.engine,
+                    mtime_precision = excluded.mtime_precision
+                """,
+                rows
+            )
+            self.conn.executemany(
+                "DELETE FROM files WHERE serial = ? AND path = ?",
+                [(serial, path) for path in removed_paths]
+            )
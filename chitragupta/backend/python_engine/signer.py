@@ -1,41 +1,140 @@
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.exceptions import InvalidSignature
 import base64
 import os
+import tempfile
+import threading
+
+# Where the case signing key lives; override per deployment
+DEFAULT_KEY_PATH = os.path.join(os.path.expanduser("~"), ".chitragupta", "signing_key.pem")
 
 class Signer:
-    def __init__(self):
-        self.private_key = None
-        self.public_key = None
-        self._generate_keys()
-
-    def _generate_keys(self):
-        # Generate generic keys for demo session
-        self.private_key = rsa.generate_private_key(
+    def __init__(self, key_path=None, passphrase=None):
+        """
+        Signing key manager. The key is loaded from key_path (or
+        CHITRAGUPTA_SIGNING_KEY) on first use and only generated - and then
+        persisted - if no key exists yet, so signatures stay verifiable across
+        runs. Set CHITRAGUPTA_SIGNING_KEY_PASSPHRASE to keep it encrypted at rest.
+        """
+        self.key_path = key_path or os.environ.get("CHITRAGUPTA_SIGNING_KEY", DEFAULT_KEY_PATH)
+        if passphrase is None:
+            passphrase = os.environ.get("CHITRAGUPTA_SIGNING_KEY_PASSPHRASE")
+        self._passphrase = passphrase.encode('utf-8') if isinstance(passphrase, str) else passphrase
+        self._private_key = None
+        self._public_key_pem = None
+        self._verify_keys = {}  # PEM -> loaded public key
+        self._lock = threading.Lock()
+        self._padding = padding.PSS(
+            mgf=padding.MGF1(hashes.SHA256()),
+            salt_length=padding.PSS.MAX_LENGTH
+        )
+
+    @property
+    def private_key(self):
+        if self._private_key is None:
+            with self._lock:
+                if self._private_key is None:
+                    self._private_key = self._load_or_create_key()
+        return self._private_key
+
+    @property
+    def public_key(self):
+        return self.private_key.public_key()
+
+    def _load_or_create_key(self):
+        if os.path.exists(self.key_path):
+            with open(self.key_path, "rb") as f:
+                return serialization.load_pem_private_key(f.read(), password=self._passphrase)
+
+        private_key = rsa.generate_private_key(
             public_exponent=65537,
             key_size=4096,
         )
-        self.public_key = self.private_key.public_key()
+        encryption = (
+            serialization.BestAvailableEncryption(self._passphrase)
+            if self._passphrase else serialization.NoEncryption()
+        )
+        pem = private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=encryption
+        )
+
+        key_dir = os.path.dirname(os.path.abspath(self.key_path))
+        os.makedirs(key_dir, exist_ok=True)
+        # Write a complete private copy first and link it into place, so the key
+        # file is never seen empty or half-written, even after a crash
+        fd, tmp_path = tempfile.mkstemp(prefix=".signing_key.", dir=key_dir)  # mode 0600
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(pem)
+                f.flush()
+                os.fsync(f.fileno())
+            try:
+                os.link(tmp_path, self.key_path)
+            except FileExistsError:
+                # Another process saved a key meanwhile: use theirs
+                with open(self.key_path, "rb") as f:
+                    return serialization.load_pem_private_key(f.read(), password=self._passphrase)
+        finally:
+            os.unlink(tmp_path)
+        print(f"Generated new signing key at {self.key_path}")
+        return private_key
+
+    @staticmethod
+    def _to_bytes(data):
+        return data if isinstance(data, bytes) else data.encode('utf-8')
 
     def sign_data(self, data_string):
         """Signs string data (e.g., hash) and returns base64 signature."""
         if not self.private_key: return None
-        
+
         signature = self.private_key.sign(
-            data_string.encode('utf-8'),
-            padding.PSS(
-                mgf=padding.MGF1(hashes.SHA256()),
-                salt_length=padding.PSS.MAX_LENGTH
-            ),
+            self._to_bytes(data_string),
+            self._padding,
             hashes.SHA256()
         )
         return base64.b64encode(signature).decode('utf-8')
 
+    def sign_many(self, items):
+        """Signs many strings/digests in one call; returns base64 signatures in order."""
+        key = self.private_key
+        algorithm = hashes.SHA256()
+        return [
+            base64.b64encode(key.sign(self._to_bytes(item), self._padding, algorithm)).decode('utf-8')
+            for item in items
+        ]
+
+    def verify(self, data_string, signature_b64, public_key_pem=None):
+        """
+        Checks a base64 signature made by sign_data()/sign_many(). Verifies
+        against this signer's key unless another PEM public key is given;
+        loaded public keys are cached.
+        """
+        pem = public_key_pem or self.get_public_key_pem()
+        public_key = self._verify_keys.get(pem)
+        if public_key is None:
+            public_key = serialization.load_pem_public_key(self._to_bytes(pem))
+            self._verify_keys[pem] = public_key
+        try:
+            public_key.verify(
+                base64.b64decode(signature_b64),
+                self._to_bytes(data_string),
+                self._padding,
+                hashes.SHA256()
+            )
+            return True
+        except (InvalidSignature, ValueError):
+            return False
+
     def get_public_key_pem(self):
-        pem = self.public_key.public_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PublicFormat.SubjectPublicKeyInfo
-        )
-        return pem.decode('utf-8')
+        if self._public_key_pem is None:
+            pem = self.public_key.public_bytes(
+                encoding=serialization.Encoding.PEM,
+                format=serialization.PublicFormat.SubjectPublicKeyInfo
+            )
+            self._public_key_pem = pem.decode('utf-8')
+        return self._public_key_pem
 
 signer = Signer()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Zip Writer - Streaming evidence ZIP writer.
+Writes each member in one read pass: SHA-256 and CRC-32 are computed while
+the data is stored or deflated, large members are deflated in parallel
+chunks (pigz-style, each chunk primed with the previous 32 KB), and ZIP64
+records are emitted whenever sizes, offsets or the entry count need them.
+"""
+
+import hashlib
+import io
+import math
+import os
+import struct
+import time
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP_MAX_ENTRIES = 0xFFFF
+
+# Formats that are already compressed: deflating them only burns CPU
+COMPRESSED_EXTENSIONS = frozenset({
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.heic', '.heif',
+    '.mp4', '.mkv', '.mov', '.3gp', '.webm', '.avi',
+    '.mp3', '.aac', '.m4a', '.ogg', '.opus', '.amr', '.flac',
+    '.zip', '.apk', '.jar', '.aab', '.gz', '.tgz', '.xz', '.bz2', '.7z', '.rar', '.zst', '.br',
+})
+
+ENTROPY_SAMPLE = 64 * 1024
+ENTROPY_THRESHOLD = 7.5  # bits per byte; random/compressed data sits near 8
+
+
+def byte_entropy(data: bytes) -> float:
+    """Shannon entropy of a byte sample in bits per byte."""
+    if not data:
+        return 0.0
+    total = len(data)
+    return -sum(count / total * math.log2(count / total) for count in Counter(data).values())
+
+
+def _dos_datetime(timestamp: float):
+    t = time.localtime(max(timestamp, 0))
+    if t.tm_year < 1980:
+        # ZIP cannot express dates before 1980; clamp in local time, as DOS dates
+        # are local (1980-01-01 UTC is still 1979 west of Greenwich)
+        return 0, (1 << 5) | 1
+    return (
+        (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2),
+        ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    )
+
+
+class EvidenceZipWriter:
+    """
+    Minimal ZIP/ZIP64 writer for evidence packages.
+
+    Members are written sequentially to a seekable file; the local header is
+    patched with CRC and sizes once the member is done, so every byte of the
+    source is read exactly once. write_file() returns the member's manifest
+    entry (sizes, method, CRC-32 and SHA-256).
+    """
+
+    def __init__(self, path: str, chunk_size: int = 4 * 1024 * 1024, workers: Optional[int] = None,
+                 level: int = 6):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.level = level
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = ThreadPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        self._fp = open(path, 'wb')
+        self._entries: List[Dict] = []
+        self._names = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    # --- Method selection ---
+
+    def choose_method(self, path: str) -> int:
+        """STORED for known compressed formats or high-entropy content, else DEFLATE."""
+        if os.path.splitext(path)[1].lower() in COMPRESSED_EXTENSIONS:
+            return ZIP_STORED
+        with open(path, 'rb') as f:
+            sample = f.read(ENTROPY_SAMPLE)
+        return ZIP_STORED if byte_entropy(sample) >= ENTROPY_THRESHOLD else ZIP_DEFLATED
+
+    # --- Compression ---
+
+    def _deflate_chunk(self, data: bytes, zdict: Optional[bytes], final: bool) -> bytes:
+        # Raw deflate; non-final chunks end on a sync flush so the pieces concatenate
+        if zdict:
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15, zdict=zdict)
+        else:
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15)
+        return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+    def _write_data(self, source, method: int) -> Dict:
+        """Copy source into the archive, hashing and (optionally) deflating in one pass."""
+        sha256 = hashlib.sha256()
+        crc = 0
+        size = 0
+        compressed = 0
+        write = self._fp.write
+
+        if method == ZIP_STORED:
+            while True:
+                chunk = source.read(self.chunk_size)
+                if not chunk:
+                    break
+                sha256.update(chunk)
+                crc = zlib.crc32(chunk, crc)
+                write(chunk)
+                size += len(chunk)
+            return {'sha256': sha256.hexdigest(), 'crc': crc, 'size': size, 'compressed_size': size}
+
+        in_flight = []
+        window = self.workers * 2
+        previous_tail = None
+        chunk = source.read(self.chunk_size)
+        while True:
+            next_chunk = source.read(self.chunk_size) if chunk else b''
+            final = not next_chunk
+            sha256.update(chunk)
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            if self._pool is not None:
+                in_flight.append(self._pool.submit(self._deflate_chunk, chunk, previous_tail, final))
+            else:
+                out = self._deflate_chunk(chunk, previous_tail, final)
+                write(out)
+                compressed += len(out)
+            previous_tail = chunk[-32768:]
+            # Keep output in order and memory bounded
+            while in_flight and (len(in_flight) >= window or final):
+                out = in_flight.pop(0).result()
+                write(out)
+                compressed += len(out)
+            if final:
+                break
+            chunk = next_chunk
+        return {'sha256': sha256.hexdigest(), 'crc': crc, 'size': size, 'compressed_size': compressed}
+
+    # --- Members ---
+
+    def write_file(self, path: str, arcname: str, method: Optional[int] = None,
+                   force_zip64: bool = False) -> Dict:
+        """Add a file; method None picks STORED/DEFLATE from type and entropy."""
+        stat = os.stat(path)
+        if method is None:
+            method = self.choose_method(path)
+        with open(path, 'rb') as source:
+            return self._write_member(
+                arcname, source, method, stat.st_mtime, stat.st_mode,
+                zip64=force_zip64 or stat.st_size * 1.05 > ZIP64_LIMIT
+            )
+
+    def write_bytes(self, arcname: str, data: bytes, method: int = ZIP_DEFLATED) -> Dict:
+        return self._write_member(arcname, io.BytesIO(data), method, time.time(), 0o100644,
+                                  zip64=len(data) * 1.05 > ZIP64_LIMIT)
+
+    def _write_member(self, arcname: str, source, method: int, mtime: float, mode: int, zip64: bool) -> Dict:
+        arcname = arcname.replace(os.sep, '/').lstrip('/')
+        if arcname in self._names:
+            raise ValueError(f"Duplicate archive member: {arcname}")
+        self._names.add(arcname)
+
+        name = arcname.encode('utf-8')
+        dos_time, dos_date = _dos_datetime(mtime)
+        offset = self._fp.tell()
+        version = 45 if zip64 else 20
+        extra = struct.pack('<HHQQ', 0x0001, 16, 0, 0) if zip64 else b''
+
+        # Placeholder local header, patched below once CRC and sizes are known
+        self._fp.write(struct.pack(
+            '<IHHHHHIIIHH', 0x04034b50, version, 0x0800, method, dos_time, dos_date,
+            0, 0, 0, len(name), len(extra)
+        ) + name + extra)
+
+        result = self._write_data(source, method)
+        end = self._fp.tell()
+
+        if not zip64 and (result['size'] > ZIP64_LIMIT or result['compressed_size'] > ZIP64_LIMIT):
+            raise ValueError(f"{arcname} grew past 4 GiB without ZIP64 headers; retry with force_zip64")
+
+        self._fp.seek(offset + 14)
+        if zip64:
+            self._fp.write(struct.pack('<III', result['crc'], ZIP64_LIMIT, ZIP64_LIMIT))
+            self._fp.seek(offset + 30 + len(name) + 4)
+            self._fp.write(struct.pack('<QQ', result['size'], result['compressed_size']))
+        else:
+            self._fp.write(struct.pack('<III', result['crc'], result['compressed_size'], result['size']))
+        self._fp.seek(end)
+
+        entry = {
+            'name': arcname,
+            'method': 'deflate' if method == ZIP_DEFLATED else 'stored',
+            'size': result['size'],
+            'compressed_size': result['compressed_size'],
+            'crc32': f"{result['crc']:08x}",
+            'sha256': result['sha256'],
+            'mtime': int(mtime),
+        }
+        self._entries.append({
+            **entry, '_name': name, '_method': method, '_crc': result['crc'], '_offset': offset,
+            '_time': dos_time, '_date': dos_date, '_mode': mode, '_version': version
+        })
+        return entry
+
+    # --- Central directory ---
+
+    def close(self):
+        if self._fp is None:
+            return
+        cd_start = self._fp.tell()
+        for e in self._entries:
+            zip64_fields = []
+            size, compressed, offset = e['size'], e['compressed_size'], e['_offset']
+            if size >= ZIP64_LIMIT:
+                zip64_fields.append(size)
+                size = ZIP64_LIMIT
+            if compressed >= ZIP64_LIMIT:
+                zip64_fields.append(compressed)
+                compressed = ZIP64_LIMIT
+            if offset >= ZIP64_LIMIT:
+                zip64_fields.append(offset)
+                offset = ZIP64_LIMIT
+            extra = b''
+            version = e['_version']
+            if zip64_fields:
+                extra = struct.pack('<HH', 0x0001, 8 * len(zip64_fields)) + struct.pack(f'<{len(zip64_fields)}Q', *zip64_fields)
+                version = 45
+            self._fp.write(struct.pack(
+                '<IHHHHHHIIIHHHHHII', 0x02014b50, (3 << 8) | version, version, 0x0800, e['_method'],
+                e['_time'], e['_date'], e['_crc'], compressed, size,
+                len(e['_name']), len(extra), 0, 0, 0, (e['_mode'] & 0xFFFF) << 16, offset
+            ) + e['_name'] + extra)
+        cd_end = self._fp.tell()
+        cd_size = cd_end - cd_start
+        count = len(self._entries)
+
+        if count >= ZIP_MAX_ENTRIES or cd_size >= ZIP64_LIMIT or cd_start >= ZIP64_LIMIT:
+            self._fp.write(struct.pack(
+                '<IQHHIIQQQQ', 0x06064b50, 44, (3 << 8) | 45, 45, 0, 0, count, count, cd_size, cd_start
+            ))
+            self._fp.write(struct.pack('<IIQI', 0x07064b50, 0, cd_end, 1))
+        self._fp.write(struct.pack(
+            '<IHHHHIIH', 0x06054b50, 0, 0, min(count, ZIP_MAX_ENTRIES), min(count, ZIP_MAX_ENTRIES),
+            min(cd_size, ZIP64_LIMIT), min(cd_start, ZIP64_LIMIT), 0
+        ))
+        self._fp.close()
+        self._fp = None
+        if self._pool is not None:
+            self._pool.shutdown()
+
+    def abort(self):
+        """Close without a central directory and remove the partial archive."""
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+            os.remove(self.path)
+        if self._pool is not None:
+            self._pool.shutdown()
+
+    @property
+    def entries(self) -> List[Dict]:
+        return [{k: v for k, v in e.items() if not k.startswith('_')} for e in self._entries]
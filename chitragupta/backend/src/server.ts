@@ -7,6 +7,7 @@ import crypto from 'crypto';
 import { fileURLToPath } from 'url';
 import { dirname } from 'path';
 import { CryptoService } from './services/crypto.service.js';
+import { EngineService } from './services/engine.service.js';
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = dirname(__filename);
@@ -200,50 +201,18 @@ app.post('/api/generate-report', async (req, res) => {
 
 // --- Pipeline ADB Routes ---
 
-// Stage 1: Handshake (Python)
+// Stage 1: Handshake (Python engine)
 app.get('/api/data-pipeline/handshake', async (req, res) => {
-    const { spawn } = await import('child_process');
-    // Using a one-off python script to call the wrapper class method
-    // We basically need to instantiate ADBBridge and call get_device_details
-    const pythonScript = `
-import sys
-sys.path.append('${path.join(__dirname, '../python_engine')}')
-from pipeline_wrapper import ADBBridge
-import json
-
-bridge = ADBBridge()
-details = bridge.get_device_details()
-print(json.dumps(details))
-`;
-
-    const pythonProcess = spawn('python3', ['-c', pythonScript]);
-
-    let dataBuffer = '';
-    pythonProcess.stdout.on('data', (data) => {
-        dataBuffer += data.toString();
-    });
-
-    pythonProcess.stderr.on('data', (data) => {
-        console.error(`Python Error: ${data}`);
-    });
-
-    pythonProcess.on('close', (code) => {
-        try {
-            // Find the JSON part in stdout (ignore 'Device Handshake Complete' logs)
-            const lines = dataBuffer.trim().split('\n');
-            const jsonLine = lines[lines.length - 1];
-            const details = JSON.parse(jsonLine);
-            res.json(details || { connected: false });
-        } catch (e) {
-            console.error('[Handshake] Parse error:', e);
-            console.error('[Handshake] Raw output:', dataBuffer);
-            res.status(500).json({
-                error: 'Handshake failed',
-                details: 'Could not parse device information',
-                raw: dataBuffer.substring(0, 500) // Limit output
-            });
-        }
-    });
+    try {
+        const details = await EngineService.call('bridge.get_device_details');
+        res.json(details || { connected: false });
+    } catch (e) {
+        console.error('[Handshake] Engine error:', e);
+        res.status(500).json({
+            error: 'Handshake failed',
+            details: e instanceof Error ? e.message : 'Could not read device information'
+        });
+    }
 });
 
 // Helper for listing files (keep using simple ADB shell for speed in browsing)
@@ -269,74 +238,51 @@ app.get('/api/device/files', async (req, res) => {
 
 // Stage 2: Extraction & Immediate Hash (Python)
 app.post('/api/data-pipeline/pull', async (req, res) => {
-    const { filePath } = req.body;
+    const { filePath, verifyOnDevice } = req.body;
     if (!filePath) return res.status(400).json({ error: 'No file path provided' });
 
     const fileName = filePath.split('/').pop();
     const destPath = path.join(uploadDir, fileName);
 
-    const { spawn } = await import('child_process');
-    const pythonScript = `
-import sys
-sys.path.append('${path.join(__dirname, '../python_engine')}')
-from pipeline_wrapper import ADBBridge
-import json
-
-bridge = ADBBridge()
-result = bridge.pull_file_with_hash('${filePath}', '${destPath}')
-print(json.dumps(result))
-`;
-
-    const pythonProcess = spawn('python3', ['-c', pythonScript]);
+    try {
+        const result = await EngineService.call('bridge.pull_file_with_hash', {
+            remote_path: filePath,
+            local_destination: destPath,
+            verify_on_device: Boolean(verifyOnDevice)
+        });
 
-    let dataBuffer = '';
-    pythonProcess.stdout.on('data', (data) => {
-        dataBuffer += data.toString();
-    });
+        if (result.success) {
+            // Ingest into memory
+            const id = crypto.randomUUID();
 
-    pythonProcess.on('close', (code) => {
-        try {
-            const lines = dataBuffer.trim().split('\n');
-            const jsonLine = lines[lines.length - 1]; // Last line should be our JSON
-            const result = JSON.parse(jsonLine);
-
-            if (result.success && result.success !== 'False') { // Python might serialize True/False differently depending on dumps, usually true/false
-                // Ingest into memory
-                const buffer = fs.readFileSync(destPath);
-                const id = crypto.randomUUID();
-
-                const forensicFile: ForensicFile = {
-                    id,
-                    name: fileName,
-                    size: fs.statSync(destPath).size,
-                    type: 'application/octet-stream',
-                    extractedAt: new Date(),
-                    currentHash: result.hash,
-                    originalHash: result.hash, // The Stage 2 Immediate Hash
-                    verified: true,
-                    metadata: {
-                        path: 'device://' + filePath,
-                        pullLog: result.logs,
-                        custodyTimestamp: result.timestamp
-                    }
-                };
-                uploadedFiles.set(id, forensicFile);
-                saveMetadata(); // Persist to disk
-                res.json({ message: 'Extraction Complete', file: forensicFile, details: result });
-            } else {
-                res.status(500).json({ error: result.error || 'Pull failed' });
-            }
-        } catch (e) {
-            console.error('[Pull] Parse error:', e);
-            console.error('[Pull] Raw output:', dataBuffer);
-            res.status(500).json({
-                error: 'Pipeline Extraction Logic Failed',
-                details: e instanceof Error ? e.message : 'Unknown error',
-                raw: dataBuffer.substring(0, 500)
-            });
+            const forensicFile: ForensicFile = {
+                id,
+                name: fileName,
+                size: fs.statSync(destPath).size,
+                type: 'application/octet-stream',
+                extractedAt: new Date(),
+                currentHash: result.hash,
+                originalHash: result.hash, // The Stage 2 Immediate Hash
+                verified: true,
+                metadata: {
+                    path: 'device://' + filePath,
+                    pullLog: result.logs,
+                    custodyTimestamp: result.timestamp
+                }
+            };
+            uploadedFiles.set(id, forensicFile);
+            saveMetadata(); // Persist to disk
+            res.json({ message: 'Extraction Complete', file: forensicFile, details: result });
+        } else {
+            res.status(500).json({ error: result.error || 'Pull failed' });
         }
-    });
-
+    } catch (e) {
+        console.error('[Pull] Engine error:', e);
+        res.status(500).json({
+            error: 'Pipeline Extraction Logic Failed',
+            details: e instanceof Error ? e.message : 'Unknown error'
+        });
+    }
 });
 
 // --- Forensic Scanner Endpoint ---
@@ -350,59 +296,67 @@ app.post('/api/forensic-scan', async (req, res) => {
     const depth = maxDepth || 5;
     const doHashes = calculateHashes || false;
 
-    const { spawn } = await import('child_process');
-    const pythonScript = `
-import sys
-sys.path.append('${path.join(__dirname, '../python_engine')}')
-from forensic_scanner import ForensicScanner
-import json
-
-scanner = ForensicScanner()
-results = scanner.scan_device(
-    start_path='${scanPath}',
-    file_types=${JSON.stringify(types)},
-    max_depth=${depth},
-    calculate_hashes=${doHashes ? 'True' : 'False'}
-)
-print(json.dumps(results))
-`;
-
     console.log('[Forensic Scan] Starting scan of', scanPath);
-    const pythonProcess = spawn('python3', ['-c', pythonScript]);
-
-    let dataBuffer = '';
-    pythonProcess.stdout.on('data', (data) => {
-        dataBuffer += data.toString();
-    });
-
-    pythonProcess.stderr.on('data', (data) => {
-        console.error(`[Forensic Scan] Python: ${data}`);
-    });
+    try {
+        const results = await EngineService.call('scanner.scan_device', {
+            start_path: scanPath,
+            file_types: types,
+            max_depth: depth,
+            calculate_hashes: doHashes
+        });
 
-    pythonProcess.on('close', (code) => {
-        try {
-            const lines = dataBuffer.trim().split('\n');
-            const jsonLine = lines[lines.length - 1];
-            const results = JSON.parse(jsonLine);
-
-            if (results.success) {
-                console.log(`[Forensic Scan] Complete: ${results.total_files_found} files found`);
-                res.json(results);
-            } else {
-                res.status(500).json({
-                    error: results.error || 'Scan failed',
-                    details: 'Forensic scan could not complete'
-                });
-            }
-        } catch (e) {
-            console.error('[Forensic Scan] Parse error:', e);
+        if (results.success) {
+            console.log(`[Forensic Scan] Complete: ${results.total_files_found} files found`);
+            res.json(results);
+        } else {
             res.status(500).json({
-                error: 'Forensic scan failed',
-                details: e instanceof Error ? e.message : 'Unknown error',
-                raw: dataBuffer.substring(0, 500)
+                error: results.error || 'Scan failed',
+                details: 'Forensic scan could not complete'
             });
         }
+    } catch (e) {
+        console.error('[Forensic Scan] Engine error:', e);
+        res.status(500).json({
+            error: 'Forensic scan failed',
+            details: e instanceof Error ? e.message : 'Unknown error'
+        });
+    }
+});
+
+// Stage 2.5 (streaming): one NDJSON event per line - start, file records as they
+// are found, progress/heartbeat updates and a final summary without the file list
+app.post('/api/forensic-scan/stream', async (req, res) => {
+    const { startPath, fileTypes, maxDepth, calculateHashes } = req.body;
+
+    const scanPath = startPath || '/sdcard';
+    const types = fileTypes || ['all'];
+    const depth = maxDepth || 5;
+    const doHashes = calculateHashes || false;
+
+    console.log('[Forensic Scan] Starting streaming scan of', scanPath);
+    res.setHeader('Content-Type', 'application/x-ndjson');
+    res.setHeader('Cache-Control', 'no-cache');
+
+    const scan = EngineService.start('scanner.iter_scan', {
+        start_path: scanPath,
+        file_types: types,
+        max_depth: depth,
+        calculate_hashes: doHashes
+    }, (event) => {
+        res.write(JSON.stringify(event) + '\n');
     });
+
+    // Stop scanning the device if the client goes away mid-stream
+    res.on('close', () => scan.cancel());
+
+    try {
+        await scan.result;
+    } catch (e) {
+        if (!res.writableEnded) {
+            res.write(JSON.stringify({ event: 'error', error: e instanceof Error ? e.message : 'Unknown error' }) + '\n');
+        }
+    }
+    res.end();
 });
 
 app.listen(PORT, () => {
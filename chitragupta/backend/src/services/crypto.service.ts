@@ -38,19 +38,34 @@ export class CryptoService {
     }
 
     /**
-     * Calculates a Merkle Root from a list of hashes.
+     * Calculates a Merkle Root from a list of hex SHA-256 hashes, the same
+     * construction as MerkleTree in python_engine/hasher.py: leaves are
+     * sha256(0x00 || digest), parents sha256(0x01 || left || right) over raw
+     * bytes, and an odd node at the end of a level is carried up unchanged.
      */
     static calculateMerkleRoot(hashes: string[]): string {
         if (hashes.length === 0) return '';
-        if (hashes.length === 1) return hashes[0];
 
-        const newLevel: string[] = [];
-        for (let i = 0; i < hashes.length; i += 2) {
-            const left = hashes[i];
-            const right = i + 1 < hashes.length ? hashes[i + 1] : left; // Duplicate last if odd
-            const combined = this.generateHash(left + right);
-            newLevel.push(combined);
+        let level = hashes.map((hash) => {
+            if (!/^[0-9a-fA-F]{64}$/.test(hash)) {
+                throw new Error(`Merkle leaves must be SHA-256 hex digests, got "${hash}"`);
+            }
+            return this.sha256(Buffer.from([0x00]), Buffer.from(hash, 'hex'));
+        });
+        while (level.length > 1) {
+            const next: Buffer[] = [];
+            for (let i = 0; i + 1 < level.length; i += 2) {
+                next.push(this.sha256(Buffer.from([0x01]), level[i], level[i + 1]));
+            }
+            if (level.length % 2 === 1) next.push(level[level.length - 1]); // Carried up unchanged
+            level = next;
         }
-        return this.calculateMerkleRoot(newLevel);
+        return level[0].toString('hex');
+    }
+
+    private static sha256(...parts: Buffer[]): Buffer {
+        const hash = crypto.createHash('sha256');
+        for (const part of parts) hash.update(part);
+        return hash.digest();
     }
 }
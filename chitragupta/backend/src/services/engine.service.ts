@@ -0,0 +1,109 @@
+import { spawn, ChildProcessWithoutNullStreams } from 'child_process';
+import path from 'path';
+import readline from 'readline';
+import { fileURLToPath } from 'url';
+
+const __dirname = path.dirname(fileURLToPath(import.meta.url));
+const WORKER_SCRIPT = path.join(__dirname, '../../python_engine/engine_worker.py');
+
+interface PendingCall {
+    resolve: (result: any) => void;
+    reject: (error: Error) => void;
+    onPartial?: (partial: any) => void;
+}
+
+export class EngineError extends Error {
+    constructor(message: string, public code: number, public data?: unknown) {
+        super(message);
+        this.name = 'EngineError';
+    }
+}
+
+export class EngineService {
+    private static worker: ChildProcessWithoutNullStreams | null = null;
+    private static pending = new Map<number, PendingCall>();
+    private static nextId = 1;
+
+    /**
+     * Starts the resident Python engine (python_engine/engine_worker.py) once.
+     * If it exits, in-flight calls are rejected and the next call starts a new one.
+     */
+    private static ensureWorker(): ChildProcessWithoutNullStreams {
+        if (this.worker) return this.worker;
+
+        const worker = spawn('python3', [WORKER_SCRIPT], { stdio: ['pipe', 'pipe', 'pipe'] });
+        this.worker = worker;
+
+        readline.createInterface({ input: worker.stdout }).on('line', (line) => this.handleMessage(line));
+
+        worker.stderr.on('data', (data) => {
+            process.stderr.write(`[Engine] ${data}`);
+        });
+
+        const onExit = (reason: string) => {
+            if (this.worker !== worker) return;
+            this.worker = null;
+            const error = new EngineError(`Python engine ${reason}`, -32000);
+            for (const call of this.pending.values()) call.reject(error);
+            this.pending.clear();
+        };
+        worker.on('exit', (code) => onExit(`exited with code ${code}`));
+        worker.on('error', (err) => onExit(`failed: ${err.message}`));
+        // A write after the worker died emits EPIPE here; unhandled, it would crash the server
+        worker.stdin.on('error', (err) => {
+            onExit(`stdin closed: ${err.message}`);
+            worker.kill();
+        });
+
+        return worker;
+    }
+
+    private static handleMessage(line: string) {
+        let message: any;
+        try {
+            message = JSON.parse(line);
+        } catch {
+            console.error('[Engine] Unparseable message:', line.substring(0, 200));
+            return;
+        }
+
+        const call = this.pending.get(message.id);
+        if (!call) return;
+
+        if ('partial' in message) {
+            call.onPartial?.(message.partial);
+        } else if ('error' in message) {
+            this.pending.delete(message.id);
+            call.reject(new EngineError(message.error.message, message.error.code, message.error.data));
+        } else {
+            this.pending.delete(message.id);
+            call.resolve(message.result);
+        }
+    }
+
+    /**
+     * Calls an engine method, e.g. call('bridge.get_device_details').
+     * Streaming methods (scanner.iter_scan) deliver events through onPartial
+     * before the promise resolves with the final result.
+     */
+    static call<T = any>(method: string, params?: object, onPartial?: (partial: any) => void): Promise<T> {
+        return this.start(method, params, onPartial).result;
+    }
+
+    /**
+     * Like call(), but also returns a cancel() that stops a streaming call early.
+     */
+    static start<T = any>(method: string, params?: object, onPartial?: (partial: any) => void): { result: Promise<T>; cancel: () => void } {
+        const id = this.nextId++;
+        const result = new Promise<T>((resolve, reject) => {
+            this.pending.set(id, { resolve, reject, onPartial });
+            this.ensureWorker().stdin.write(JSON.stringify({ jsonrpc: '2.0', id, method, params: params ?? {} }) + '\n');
+        });
+        const cancel = () => {
+            if (this.pending.has(id) && this.worker) {
+                this.worker.stdin.write(JSON.stringify({ jsonrpc: '2.0', method: '$/cancel', params: { id } }) + '\n');
+            }
+        };
+        return { result, cancel };
+    }
+}
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Sync Vendored - Keep the vendored copies of shared engine modules in step.
+Inderjaal and Sudarshana run as separate backends and cannot import
+chitragupta's python_engine, so a few stdlib-only modules are copied into
+them. The chitragupta file is the single source of truth; each copy is that
+file behind a generated header and must not be edited in place.
+
+Usage (from the repository root):
+    python tools/sync_vendored.py           # rewrite every copy from its source
+    python tools/sync_vendored.py --check   # exit 1 if any copy is out of date
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# canonical file -> vendored copies (paths relative to the repository root)
+VENDORED = {
+    'chitragupta/backend/python_engine/adb_session.py': [
+        'Inderjaal/backend/src/core/adb_session.py',
+        'Sudarshana/backend/modules/sudarshana/adb_session.py',
+    ],
+    'chitragupta/backend/python_engine/log_classifier.py': [
+        'Sudarshana/backend/modules/sudarshana/log_classifier.py',
+    ],
+}
+
+HEADER = (
+    "# Vendored copy of {source} - do not edit here.\n"
+    "# Edit the canonical file and run: python tools/sync_vendored.py\n"
+)
+
+
+def render(source):
+    with open(os.path.join(ROOT, source), encoding='utf-8') as f:
+        text = f.read()
+    # Keep a shebang on the first line
+    shebang = ''
+    if text.startswith('#!'):
+        shebang, _, text = text.partition('\n')
+        shebang += '\n'
+    return shebang + HEADER.format(source=source) + text
+
+
+def main(argv):
+    check = '--check' in argv
+    stale = []
+    for source, copies in VENDORED.items():
+        expected = render(source)
+        for copy in copies:
+            path = os.path.join(ROOT, copy)
+            try:
+                with open(path, encoding='utf-8') as f:
+                    current = f.read()
+            except FileNotFoundError:
+                current = None
+            if current == expected:
+                continue
+            stale.append(copy)
+            if not check:
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(expected)
+                print(f"Updated {copy}")
+
+    if check and stale:
+        for copy in stale:
+            print(f"Out of date: {copy}", file=sys.stderr)
+        print("Run: python tools/sync_vendored.py", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))